@@ -0,0 +1,139 @@
+"""
+分块（外存）处理模块 - 总表超出内存时按分块流式处理
+去重：已出现的去重键哈希保存在外存哈希索引中（每块排序后写为 .npy 有序段，内存映射后二分查找），
+  段数过多时合并为一段，每条记录只占8字节磁盘空间，不需要把历史记录读入内存。
+排序：每块按发布时间降序排好后写为 Parquet 有序段，最后多路归并各有序段，逐行输出。
+内存占用只与分块大小有关，与总表记录数无关。
+"""
+
+import os
+import heapq
+import logging
+from typing import Iterator, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+# 有序段中的排序键（发布时间的微秒数，无法解析为最小值）和输入顺序（保证相同时间的记录保持原顺序）
+SORT_KEY_COLUMN = '_sort_key'
+SEQUENCE_COLUMN = '_sequence'
+
+# 归并时每个有序段每次读取的最少行数
+MIN_MERGE_BATCH_ROWS = 1000
+
+
+def publish_sort_keys(publish_ts: pd.Series) -> np.ndarray:
+    """发布时间转为 int64 排序键，无法解析（NaT）的为 int64 最小值，降序排列时排到最后"""
+    values = pd.to_datetime(publish_ts, errors='coerce').to_numpy(dtype='datetime64[us]')
+    return values.view(np.int64)
+
+
+class ExternalHashIndex:
+    """外存去重哈希索引：uint64 有序段保存为 .npy 文件，以内存映射方式查找"""
+
+    def __init__(self, directory: str, max_runs: int = 16):
+        self.logger = logging.getLogger(__name__)
+        self.directory = directory
+        self.max_runs = max_runs
+        self._runs: List[np.ndarray] = []
+        self._run_count = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _write_run(self, hashes: np.ndarray) -> np.ndarray:
+        self._run_count += 1
+        path = os.path.join(self.directory, f'hashes_{self._run_count:06d}.npy')
+        np.save(path, hashes)
+        return np.load(path, mmap_mode='r')
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """各哈希是否已在索引中"""
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            positions = np.searchsorted(run, hashes)
+            in_range = positions < len(run)
+            found[in_range] |= run[positions[in_range]] == hashes[in_range]
+        return found
+
+    def add(self, hashes: np.ndarray) -> None:
+        """加入一批哈希（写为新的有序段，段数超过上限时合并）"""
+        hashes = np.unique(np.asarray(hashes, dtype=np.uint64))
+        if len(hashes) == 0:
+            return
+        self._runs.append(self._write_run(hashes))
+        if len(self._runs) > self.max_runs:
+            self._compact()
+
+    def _compact(self) -> None:
+        """合并全部有序段（各段互不重复，合并后排序即可）"""
+        merged = np.sort(np.concatenate(self._runs), kind='stable')
+        old_paths = [run.filename for run in self._runs]
+        self._runs = [self._write_run(merged)]
+        for path in old_paths:
+            try:
+                os.remove(path)
+            except OSError as e:
+                # Windows 下仍被内存映射的文件无法删除，随临时目录一并清理
+                self.logger.debug(f"删除哈希有序段失败: {e}")
+
+    def first_occurrence_mask(self, hashes: np.ndarray) -> np.ndarray:
+        """与 DataProcessor.deduplicate_records 规则一致：空键（哈希为0）不保留，每个去重键只保留最早出现的一条
+        （包括之前各块中出现过的），保留的哈希加入索引"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        mask = (hashes != 0) & ~pd.Index(hashes).duplicated(keep='first')
+        mask[mask] = ~self.contains(hashes[mask])
+        self.add(hashes[mask])
+        return mask
+
+    def __len__(self) -> int:
+        return sum(len(run) for run in self._runs)
+
+
+class SortedRunMerger:
+    """按排序键降序的 Parquet 有序段，多路归并后逐行输出"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._paths: List[str] = []
+        self._next_sequence = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def add_run(self, df: pd.DataFrame, sort_keys: np.ndarray) -> None:
+        """一块记录按排序键降序（相同键保持原顺序）写为一个有序段"""
+        if len(df) == 0:
+            return
+        run = df.reset_index(drop=True)
+        run[SORT_KEY_COLUMN] = sort_keys
+        run[SEQUENCE_COLUMN] = np.arange(self._next_sequence, self._next_sequence + len(run), dtype=np.int64)
+        self._next_sequence += len(run)
+        run = run.sort_values(SORT_KEY_COLUMN, ascending=False, kind='stable')
+
+        path = os.path.join(self.directory, f'run_{len(self._paths) + 1:06d}.parquet')
+        run.to_parquet(path, index=False)
+        self._paths.append(path)
+
+    def _iter_run(self, path: str, columns: Sequence[str], batch_rows: int) -> Iterator:
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=batch_rows,
+                                               columns=[SORT_KEY_COLUMN, SEQUENCE_COLUMN] + list(columns)):
+            values = [batch.column(i).to_pylist() for i in range(batch.num_columns)]
+            for key, sequence, row in zip(values[0], values[1], zip(*values[2:])):
+                # heapq.merge 按升序归并，排序键取负实现降序
+                yield -key, sequence, row
+
+    def iter_rows(self, columns: Sequence[str], batch_rows: int) -> Iterator[tuple]:
+        """按排序键降序逐行输出 columns 各字段的值，各有序段同时只读取一批"""
+        batch_rows = max(MIN_MERGE_BATCH_ROWS, batch_rows // max(len(self._paths), 1))
+        runs = [self._iter_run(path, columns, batch_rows) for path in self._paths]
+        for _, _, row in heapq.merge(*runs):
+            yield row
+
+    def __len__(self) -> int:
+        return self._next_sequence
@@ -63,14 +63,16 @@ RUN_MODES = {
         'max_records_per_category': None,
         'description': '月度更新 - 获取上个月发布的数据',
         'update_master': True,
-        'target_mode': 'last_month'  # 获取上个月的数据
+        'target_mode': 'last_month',  # 获取上个月的数据
+        'skip_known_records': True  # 跳过总表中已有的记录
     },
     'daily': {
         'max_pages_per_category': 3,  # 每日更新最大页数（较少页数）
         'max_records_per_category': None,
         'description': '每日更新 - 获取昨天发布的数据',
         'update_master': True,
-        'target_mode': 'yesterday'  # 获取昨天的数据
+        'target_mode': 'yesterday',  # 获取昨天的数据
+        'skip_known_records': True  # 跳过总表中已有的记录
     },
     'full': {
         'max_pages_per_category': None,  # 不限制页数
@@ -110,6 +112,90 @@ LOG_CONFIG = {
     'backup_count': 5,  # 保留5个日志备份
 }
 
+# 性能指标配置
+METRICS_CONFIG = {
+    'enabled': True,  # 启用阶段耗时统计
+    'output_dir': 'metrics_output',  # 耗时统计JSON输出目录
+    'http_port': None,  # 指标HTTP端点端口，None表示不启动（可用 --metrics-port 指定）
+    'http_host': '127.0.0.1',  # 指标HTTP端点监听地址（无认证，默认只监听本机；远程采集时显式改为 0.0.0.0）
+    'metric_prefix': 'nfra',  # 指标名前缀
+}
+
+# 详情页追踪日志配置（NDJSON，每个详情链接一条事件）
+TRACE_LOG_CONFIG = {
+    'enabled': True,  # 启用详情页追踪日志
+    'filename': 'logs/detail_trace.ndjson',  # 追踪日志文件
+    'max_file_size': 50 * 1024 * 1024,  # 50MB后滚动
+    'backup_count': 10,  # 保留10个滚动文件
+}
+
+# 详情页HTML解析配置
+HTML_PARSE_CONFIG = {
+    'engine': 'lxml',  # lxml：XPath定位表格后只解析表格片段；html.parser：整页解析（旧逻辑）
+}
+
+# 详情页解析进程池配置（浏览器抓取与表格解析并行）
+PARSE_POOL_CONFIG = {
+    'enabled': True,  # 启用解析进程池，False时在抓取线程内逐条解析
+    'max_workers': 2,  # 解析进程数（每页解析远快于请求间隔，一两个进程即可），None表示默认值2
+    'max_pending': 8,  # 最多排队等待解析的页面数
+}
+
+# 性能剖析配置（main.py --profile）
+PROFILE_CONFIG = {
+    'output_dir': 'profiles',  # 剖析结果输出目录
+    'sampling_interval': 0.005,  # 采样剖析间隔（秒）
+    'tracemalloc_frames': 10,  # tracemalloc 保留的栈深度
+    'top_n': 30,  # 报告中列出的条目数
+}
+
+# Excel导出配置
+EXCEL_EXPORT_CONFIG = {
+    'max_rows_per_sheet': 1000000,  # 单个工作表的最大数据行数（Excel上限1048576行），超出后续写到新工作表
+}
+
+# 总表数据源配置（Parquet需要pyarrow，未安装时仍直接更新总表Excel）
+MASTER_STORE_CONFIG = {
+    'enabled': True,  # 是否以数据源作为总表
+    'backend': 'parquet',  # parquet：按发布年月分区的数据集；sqlite：单文件数据库（适合小规模安装）
+    'dataset_dir': 'master_store',  # Parquet数据集目录
+    'sqlite_path': 'master_store/master.db',  # SQLite数据库文件
+    'excel_filename': 'excel_output/金融监管总局行政处罚信息_总表.xlsx',  # 总表Excel（导出文件）
+    'export_excel_on_update': False,  # 每次更新后是否重新导出总表Excel（否则使用 python main.py export 按需导出）
+}
+
+# 已知记录索引配置（开启 skip_known_records 的模式在抓取详情页前跳过总表中已有的记录）
+KNOWN_RECORDS_CONFIG = {
+    'enabled': True,  # 是否启用
+    'filename': 'cache/known_records.npz',  # 索引文件（删除后由总表重新建立）
+    'false_positive_rate': 0.01,  # 布隆过滤器误判率（命中后由精确集合确认，不会错误跳过）
+}
+
+# 近似重复检测配置（MinHash + LSH，对比 当事人名称 + 主要违法违规行为 + 行政处罚内容）
+NEAR_DUPLICATE_CONFIG = {
+    'enabled': True,  # 是否启用
+    'filename': 'cache/near_duplicates.npz',  # 签名文件（删除或参数变化后由总表重新建立）
+    'num_perm': 128,  # MinHash签名长度
+    'bands': 16,  # LSH分段数（每段 num_perm/bands 个签名值）
+    'threshold': 0.8,  # 估计相似度达到该值且当事人名称相同时视为近似重复
+    'shingle_size': 3,  # 字符n-gram长度
+    'action': 'flag',  # flag：只记录日志；merge：丢弃新记录，保留总表中已有的记录
+}
+
+# 分块（外存）处理配置：总表记录数较多时按分块流式导出，内存占用只与分块大小有关
+CHUNKED_PROCESSING_CONFIG = {
+    'enabled': True,  # 是否启用
+    'threshold_rows': 500000,  # 总表记录数达到该值时使用分块处理
+    'chunk_rows': 100000,  # 每块记录数
+    'spill_dir': 'cache/chunked',  # 有序段和去重哈希索引的临时目录（处理完成后删除）
+}
+
+# 流式导出配置（--stream）
+STREAM_EXPORT_CONFIG = {
+    'output_dir': 'excel_output',  # 输出目录
+    'formats': ['ndjson', 'xlsx'],  # 输出格式：ndjson（逐条刷新）/ xlsx（只写模式）
+}
+
 # 定时任务配置
 SCHEDULE_CONFIG = {
     'update_time': '09:00',  # 每天更新时间
@@ -74,14 +74,16 @@ RUN_MODES = {
         'max_records_per_category': None,
         'description': '月度更新 - 获取上个月发布的数据',
         'update_master': True,
-        'target_mode': 'last_month'
+        'target_mode': 'last_month',
+        'skip_known_records': True
     },
     'daily': {
         'max_pages_per_category': 3,
         'max_records_per_category': None,
         'description': '每日更新 - 获取昨天发布的数据',
         'update_master': True,
-        'target_mode': 'yesterday'
+        'target_mode': 'yesterday',
+        'skip_known_records': True
     },
     'full': {
         'max_pages_per_category': None,
@@ -124,6 +126,80 @@ LOGGING_CONFIG = {
     'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 }
 
+# 性能指标配置 - 相对于exe程序目录
+METRICS_CONFIG = {
+    'enabled': True,
+    'output_dir': str(BASE_DIR / 'metrics_output'),
+    'http_port': None,
+    'http_host': '127.0.0.1',
+    'metric_prefix': 'nfra',
+}
+
+HTML_PARSE_CONFIG = {
+    'engine': 'lxml',
+}
+
+PARSE_POOL_CONFIG = {
+    'enabled': False,  # 打包环境下默认不启用多进程解析
+    'max_workers': 2,
+    'max_pending': 8,
+}
+
+PROFILE_CONFIG = {
+    'output_dir': str(BASE_DIR / 'profiles'),
+    'sampling_interval': 0.005,
+    'tracemalloc_frames': 10,
+    'top_n': 30,
+}
+
+EXCEL_EXPORT_CONFIG = {
+    'max_rows_per_sheet': 1000000,
+}
+
+MASTER_STORE_CONFIG = {
+    'enabled': True,
+    'backend': 'parquet',
+    'dataset_dir': str(BASE_DIR / 'master_store'),
+    'sqlite_path': str(BASE_DIR / 'master_store' / 'master.db'),
+    'excel_filename': str(BASE_DIR / 'excel_output' / '金融监管总局行政处罚信息_总表.xlsx'),
+    'export_excel_on_update': True,  # EXE用户直接使用总表Excel，更新后自动导出
+}
+
+KNOWN_RECORDS_CONFIG = {
+    'enabled': True,
+    'filename': str(BASE_DIR / 'cache' / 'known_records.npz'),
+    'false_positive_rate': 0.01,
+}
+
+NEAR_DUPLICATE_CONFIG = {
+    'enabled': True,
+    'filename': str(BASE_DIR / 'cache' / 'near_duplicates.npz'),
+    'num_perm': 128,
+    'bands': 16,
+    'threshold': 0.8,
+    'shingle_size': 3,
+    'action': 'flag',
+}
+
+CHUNKED_PROCESSING_CONFIG = {
+    'enabled': True,
+    'threshold_rows': 500000,
+    'chunk_rows': 100000,
+    'spill_dir': str(BASE_DIR / 'cache' / 'chunked'),
+}
+
+STREAM_EXPORT_CONFIG = {
+    'output_dir': str(BASE_DIR / 'excel_output'),
+    'formats': ['ndjson', 'xlsx'],
+}
+
+TRACE_LOG_CONFIG = {
+    'enabled': True,
+    'filename': str(BASE_DIR / 'logs' / 'detail_trace.ndjson'),
+    'max_file_size': 50 * 1024 * 1024,
+    'backup_count': 10,
+}
+
 # 确保输出目录存在
 def ensure_directories():
     """确保所有必要的目录存在"""
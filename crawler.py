@@ -6,7 +6,7 @@ import time
 import logging
 import re
 import os
-from typing import List, Dict, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -18,16 +18,24 @@ from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 import urllib.parse
 import random
+from collections import deque
 
 # 检测exe模式并导入相应配置
 if os.environ.get('NFRA_EXE_MODE') == '1':
     # EXE模式：使用exe专用配置
-    from config_exe import BASE_URLS, SELENIUM_CONFIG, WEBDRIVER_CONFIG, CRAWL_CONFIG
+    from config_exe import BASE_URLS, SELENIUM_CONFIG, WEBDRIVER_CONFIG, CRAWL_CONFIG, PARSE_POOL_CONFIG
 else:
     # 正常模式：使用标准配置
-    from config import BASE_URLS, SELENIUM_CONFIG, CRAWL_CONFIG, WEBDRIVER_CONFIG
+    from config import BASE_URLS, SELENIUM_CONFIG, CRAWL_CONFIG, WEBDRIVER_CONFIG, PARSE_POOL_CONFIG
 
 from utils import setup_logging, clean_text, format_date, get_current_timestamp
+from metrics import stage_metrics, crawl_telemetry
+from html_tables import parse_detail_document
+from parse_pool import DetailParsePool, parsing_inline
+from grid_resolver import resolve_merged_rows, row_has_spans
+from header_matcher import horizontal_matcher, key_value_matcher, HEADER_KEYWORDS
+from text_extractor import extract_punishment_basis, extract_punishment_content
+from trace_log import detail_trace_log, OUTCOME_SUCCESS, OUTCOME_MULTI_RECORD, OUTCOME_NO_TABLE_DATA, OUTCOME_ERROR
 
 
 class NFRACrawler:
@@ -39,6 +47,11 @@ class NFRACrawler:
         self.wait = None
         self.headless = headless  # 添加headless属性
         self.driver_path = None  # 缓存driver路径
+        self.driver_start_count = 0  # WebDriver启动次数，用于统计重启
+        self.last_table_layout = None  # 最近一次解析的表格布局，用于追踪日志
+        self.last_detail_error = None  # 最近一次详情页处理的异常信息
+        self._parse_pool = None  # 详情页解析进程池，首次使用时创建
+        self.known_item_filter = None  # 判断列表项是否已在总表中的函数，设置后跳过已知记录
         
     def _get_driver_path(self):
         """获取ChromeDriver路径 - 优先使用本地driver"""
@@ -205,6 +218,11 @@ class NFRACrawler:
             # 减少WebDriverWait等待时间
             self.wait = WebDriverWait(self.driver, 20)  # 从45秒减少到20秒
             
+            self.driver_start_count += 1
+            crawl_telemetry.inc('driver_starts')
+            if self.driver_start_count > 1:
+                crawl_telemetry.inc('driver_restarts')
+            
             self.logger.info("Chrome WebDriver 初始化成功")
             return True
             
@@ -212,8 +230,26 @@ class NFRACrawler:
             self.logger.error(f"初始化WebDriver失败: {e}")
             return False
     
+    def get_parse_pool(self) -> Optional[DetailParsePool]:
+        """获取详情页解析进程池（首次使用时创建），未启用或剖析期间（在本进程内解析）返回None"""
+        if not PARSE_POOL_CONFIG['enabled'] or parsing_inline():
+            return None
+        if self._parse_pool is None:
+            self._parse_pool = DetailParsePool(PARSE_POOL_CONFIG['max_workers'], PARSE_POOL_CONFIG['max_pending'])
+        return self._parse_pool
+    
+    def close_parse_pool(self):
+        """关闭详情页解析进程池"""
+        if self._parse_pool is not None:
+            try:
+                self._parse_pool.close()
+            except Exception as e:
+                self.logger.error(f"关闭解析进程池失败: {e}")
+            self._parse_pool = None
+    
     def close_driver(self):
-        """关闭WebDriver"""
+        """关闭WebDriver（同时关闭解析进程池）"""
+        self.close_parse_pool()
         if self.driver:
             try:
                 self.driver.quit()
@@ -225,12 +261,15 @@ class NFRACrawler:
         """带重试机制的页面加载"""
         for attempt in range(max_retries):
             try:
+                if attempt > 0:
+                    crawl_telemetry.inc('retries')
                 self.logger.info(f"正在加载页面: {url} (尝试 {attempt + 1}/{max_retries})")
                 
-                self.driver.get(url)
-                
-                # 等待页面完全加载完成 - 和debug_test.py保持一致
-                self.wait.until(lambda driver: driver.execute_script("return document.readyState") == "complete")
+                with stage_metrics.span('page_load'):
+                    self.driver.get(url)
+                    
+                    # 等待页面完全加载完成 - 和debug_test.py保持一致
+                    self.wait.until(lambda driver: driver.execute_script("return document.readyState") == "complete")
                 
                 # 减少额外等待时间，使用随机数避免被检测
                 time.sleep(random.uniform(0.5, 1.5))  # 从2-4秒减少到0.5-1.5秒
@@ -239,6 +278,7 @@ class NFRACrawler:
                 return True
                 
             except TimeoutException:
+                crawl_telemetry.inc('timeouts')
                 self.logger.warning(f"页面加载超时 (尝试 {attempt + 1}/{max_retries})")
                 if attempt < max_retries - 1:
                     # 减少重试等待时间
@@ -253,6 +293,7 @@ class NFRACrawler:
         self.logger.error(f"无法加载 {url} 页面")
         return False
     
+    @stage_metrics.timed('date_scan')
     def get_page_publish_dates(self) -> List[str]:
         """获取当前页面所有记录的发布时间"""
         try:
@@ -323,8 +364,10 @@ class NFRACrawler:
                 self.logger.info(f"正在解析 {category} 第 {current_page} 页")
                 
                 # 等待页面加载完成，优化等待时间
-                self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                time.sleep(0.5)  # 减少额外等待时间从2秒到0.5秒
+                with stage_metrics.span('wait'):
+                    self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+                    time.sleep(0.5)  # 减少额外等待时间从2秒到0.5秒
+                crawl_telemetry.inc('pages_scanned')
                 
                 # 智能检查：如果指定了目标月份，先检查当前页面是否包含目标月份的数据
                 if use_smart_check:
@@ -396,6 +439,7 @@ class NFRACrawler:
                 
                 # 解析当前页面的处罚信息（使用统一的智能处理逻辑）
                 try:
+                    list_parse_start = time.perf_counter()
                     # 查找包含"行政处罚信息公开表"的链接
                     punishment_links = self.driver.find_elements(
                         By.XPATH, 
@@ -467,6 +511,7 @@ class NFRACrawler:
                         # 如果遇到了早于目标月份的记录，停止翻页
                         if should_stop_pagination:
                             self.logger.info(f"第 {current_page} 页已遇到超出时间期限的内容，无需继续翻页")
+                            stage_metrics.record('list_parse', time.perf_counter() - list_parse_start)
                             all_punishment_list.extend(page_punishment_list)
                             break
                     else:
@@ -495,6 +540,7 @@ class NFRACrawler:
                         
                         self.logger.info(f"第 {current_page} 页找到 {len(page_punishment_list)} 条处罚信息")
                     
+                    stage_metrics.record('list_parse', time.perf_counter() - list_parse_start)
                     all_punishment_list.extend(page_punishment_list)
                     
                     # 检查是否有下一页（只有在没有设置停止标志时才继续翻页）
@@ -561,9 +607,12 @@ class NFRACrawler:
                 self.logger.info(f"正在解析 {category} 第 {current_page} 页")
                 
                 # 等待页面加载完成，优化等待时间
-                self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                time.sleep(0.5)  # 减少额外等待时间从2秒到0.5秒
+                with stage_metrics.span('wait'):
+                    self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+                    time.sleep(0.5)  # 减少额外等待时间从2秒到0.5秒
+                crawl_telemetry.inc('pages_scanned')
                 
+                list_parse_start = time.perf_counter()
                 # 查找包含"行政处罚信息公开表"的链接
                 try:
                     # 使用更宽泛的XPath选择器
@@ -658,6 +707,7 @@ class NFRACrawler:
                         self.logger.info(f"第 {current_page} 页找到 {filtered_count} 条目标月份记录 (共{total_links}条)")
                     else:
                         self.logger.info(f"第 {current_page} 页找到 {len(page_punishment_list)} 条处罚信息")
+                    stage_metrics.record('list_parse', time.perf_counter() - list_parse_start)
                     all_punishment_list.extend(page_punishment_list)
                     
                     # 检查是否有下一页
@@ -740,12 +790,14 @@ class NFRACrawler:
                 return {}
                 
         except TimeoutException:
+            crawl_telemetry.inc('timeouts')
             self.logger.error(f"详情页面表格加载超时: {detail_url}")
         except Exception as e:
             self.logger.error(f"解析详情页面失败: {e}")
         
         return {}
     
+    @stage_metrics.timed('table_parse')
     def parse_punishment_table(self, table_element) -> Dict:
         """解析处罚信息表格 - 增强版本支持多种表格格式"""
         try:
@@ -770,82 +822,74 @@ class NFRACrawler:
                 data['行政处罚依据'] = punishment_basis
             
             rows = table.find_all('tr')
-            
-            if len(rows) < 2:
-                return data if data else {}
-            
-            # 检查表格类型：横向多列 vs 键值对
-            first_row = rows[0]
-            first_row_cells = first_row.find_all(['td', 'th'])
-            
-            # 如果第一行有多个列（>=3），且包含常见的表头关键词，则为横向表格
-            if len(first_row_cells) >= 3:
-                header_texts = [clean_text(cell.get_text()) for cell in first_row_cells]
-                
-                # 检查是否包含典型的表头关键词
-                header_keywords = ['序号', '当事人', '违法', '处罚', '机关']
-                if any(any(keyword in header for keyword in header_keywords) for header in header_texts):
-                    self.logger.info("检测到横向多列表格，使用横向解析逻辑")
-                    table_data = self.parse_horizontal_table(rows)
-                    data.update(table_data)
-                    return data
-            
-            # 否则使用键值对解析逻辑
-            self.logger.info("检测到键值对表格，使用键值对解析逻辑")
-            table_data = self.parse_key_value_table(rows)
-            data.update(table_data)
-            
-            # 如果键值对解析没有找到处罚内容，尝试从完整文本中提取
-            if '行政处罚内容' not in data or not data['行政处罚内容']:
-                punishment_content = self.extract_punishment_content_from_text(page_text)
-                if punishment_content:
-                    data['行政处罚内容'] = punishment_content
-            
-            return data
+            return self.parse_table_rows(rows, page_text, data)
             
         except Exception as e:
             self.logger.error(f"解析处罚表格失败: {e}")
             return {}
     
+    def parse_table_rows(self, rows: list, page_text: str, data: Dict) -> Dict:
+        """按识别出的布局解析表格各行，结果合并到 data 中"""
+        if len(rows) < 2:
+            self.last_table_layout = 'too_few_rows'
+            return data if data else {}
+        
+        # 检查表格类型：横向多列 vs 键值对
+        layout, headers, fields = self.detect_table_layout(rows)
+        
+        if layout != 'key_value':
+            self.logger.info("检测到横向多列表格，使用横向解析逻辑")
+            table_data = self.parse_horizontal_table(rows, headers, fields, layout == 'horizontal_merged')
+            data.update(table_data)
+            return data
+        
+        # 否则使用键值对解析逻辑
+        self.logger.info("检测到键值对表格，使用键值对解析逻辑")
+        self.last_table_layout = 'key_value'
+        table_data = self.parse_key_value_table(rows)
+        data.update(table_data)
+        
+        # 如果键值对解析没有找到处罚内容，尝试从完整文本中提取
+        if '行政处罚内容' not in data or not data['行政处罚内容']:
+            punishment_content = self.extract_punishment_content_from_text(page_text)
+            if punishment_content:
+                data['行政处罚内容'] = punishment_content
+        
+        return data
+    
+    def detect_table_layout(self, rows: list) -> Tuple[str, List[str], Optional[List[str]]]:
+        """识别表格布局，返回 (布局, 表头, 列→字段计划)；键值对表格的计划为None
+
+        先按表头关键词区分横向表格和键值对表格，只有横向多行表格才扫描数据行的合并单元格；
+        解析计划由 horizontal_matcher 按表头缓存。
+        """
+        first_row_cells = rows[0].find_all(['td', 'th'])
+        
+        # 第一行少于3列只可能是键值对表格，无需检测
+        if len(first_row_cells) < 3:
+            return 'key_value', [], None
+        
+        headers = [clean_text(cell.get_text()) for cell in first_row_cells]
+        
+        # 第一行不含典型的表头关键词则为键值对表格
+        if not any(any(keyword in header for keyword in HEADER_KEYWORDS) for header in headers):
+            return 'key_value', headers, None
+        
+        if len(rows) == 2:
+            layout = 'horizontal_single'
+        elif self.has_merged_cells(rows[1:]):
+            layout = 'horizontal_merged'
+        else:
+            layout = 'horizontal_multi'
+        return layout, headers, horizontal_matcher.plan(headers)
+    
     def extract_punishment_basis_from_text(self, text: str) -> str:
         """从完整文本中提取行政处罚依据"""
         try:
-            import re
-            
-            # 常见的处罚依据关键词模式
-            basis_patterns = [
-                # 完整的法条引用
-                r'依据[《]?([^》。；\n]+第[^。；\n]+条[^。；\n]*)[》]?',
-                r'根据[《]?([^》。；\n]+第[^。；\n]+条[^。；\n]*)[》]?',
-                r'按照[《]?([^》。；\n]+第[^。；\n]+条[^。；\n]*)[》]?',
-                # 法律法规名称
-                r'《([^》]+法[^》]*)》',
-                r'《([^》]+规定[^》]*)》',
-                r'《([^》]+办法[^》]*)》',
-                r'《([^》]+条例[^》]*)》',
-                # 简单的依据引用
-                r'依据[《]?([^》。；\n]+)[》]?[，。]',
-                r'根据[《]?([^》。；\n]+)[》]?[，。]',
-                r'违反[了]?[《]?([^》。；\n]+)[》]?',
-            ]
-            
-            found_basis = []
-            
-            for pattern in basis_patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                for match in matches:
-                    if match and len(match.strip()) > 3:
-                        clean_match = clean_text(match).strip()
-                        # 避免重复和过短的匹配
-                        if clean_match not in found_basis and len(clean_match) > 5:
-                            found_basis.append(clean_match)
-            
-            if found_basis:
-                basis_text = "；".join(found_basis)
+            basis_text = extract_punishment_basis(text)
+            if basis_text:
                 self.logger.debug(f"提取到行政处罚依据: {basis_text}")
-                return basis_text
-            
-            return ""
+            return basis_text
             
         except Exception as e:
             self.logger.warning(f"提取行政处罚依据失败: {e}")
@@ -854,117 +898,38 @@ class NFRACrawler:
     def extract_punishment_content_from_text(self, text: str) -> str:
         """从完整文本中提取完整的行政处罚内容"""
         try:
-            import re
-            
-            # 查找所有处罚相关的句子
-            punishment_sentences = []
-            
-            # 改进的匹配"对...处罚"模式
-            fine_patterns = [
-                # 匹配：对XXX警告并罚款X万元
-                r'对([^对。；\n]+?)(警告并罚款[0-9]+万元)',
-                # 匹配：对XXX罚款X万元
-                r'对([^对。；\n]+?)(罚款[0-9]+万元[^。；\n]*)',
-                # 匹配：对XXX警告
-                r'对([^对。；\n]+?)(警告[^。；\n]*)',
-            ]
-            
-            for pattern in fine_patterns:
-                matches = re.findall(pattern, text, re.MULTILINE | re.DOTALL)
-                for match in matches:
-                    if isinstance(match, tuple) and len(match) == 2:
-                        # 对当事人的处罚
-                        person = clean_text(match[0]).strip()
-                        punishment = clean_text(match[1]).strip()
-                        if person and punishment:
-                            sentence = f"对{person}{punishment}"
-                            punishment_sentences.append(sentence)
-            
-            # 单独提取合计信息和详细说明
-            summary_patterns = [
-                r'(合计罚款[0-9]+万元[^。；\n]*)',
-                r'(其中[^。；\n]*[0-9]+万元[^。；\n]*)',
-            ]
-            
-            for pattern in summary_patterns:
-                matches = re.findall(pattern, text, re.MULTILINE | re.DOTALL)
-                for match in matches:
-                    sentence = clean_text(match).strip()
-                    if sentence and len(sentence) > 3:
-                        punishment_sentences.append(sentence)
-            
-            # 使用行分割的方式重新提取，确保不遗漏
-            lines = text.split('\n')
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                # 查找包含处罚关键词的行
-                if any(keyword in line for keyword in ['对', '罚款', '万元', '警告']):
-                    # 进一步处理每一行
-                    # 分割可能包含多个处罚的行
-                    sub_sentences = re.split(r'(?=对[^对]*(?:警告|罚款))', line)
-                    for sub_sentence in sub_sentences:
-                        sub_sentence = sub_sentence.strip()
-                        if len(sub_sentence) > 3 and ('罚款' in sub_sentence or '警告' in sub_sentence):
-                            clean_sentence = clean_text(sub_sentence)
-                            # 避免重复添加
-                            if clean_sentence not in punishment_sentences:
-                                punishment_sentences.append(clean_sentence)
-            
-            # 智能去重：移除完全包含在其他句子中的内容
-            unique_sentences = []
-            for sentence in punishment_sentences:
-                if sentence and len(sentence) > 3:
-                    sentence = sentence.strip('。；，')
-                    
-                    # 检查是否被其他句子包含
-                    is_duplicate = False
-                    for existing in unique_sentences:
-                        if sentence in existing or existing in sentence:
-                            # 保留更完整的版本
-                            if len(sentence) > len(existing):
-                                unique_sentences.remove(existing)
-                                break
-                            else:
-                                is_duplicate = True
-                                break
-                    
-                    if not is_duplicate:
-                        unique_sentences.append(sentence)
-            
-            if unique_sentences:
-                content = "；".join(unique_sentences)
-                self.logger.debug(f"提取到行政处罚内容，共{len(unique_sentences)}条: {content[:200]}...")
-                return content
-            
-            return ""
+            content = extract_punishment_content(text)
+            if content:
+                self.logger.debug(f"提取到行政处罚内容: {content[:200]}...")
+            return content
             
         except Exception as e:
             self.logger.warning(f"提取行政处罚内容失败: {e}")
             return ""
     
-    def parse_horizontal_table(self, rows: list) -> Dict:
-        """解析横向多列表格，支持多行数据"""
+    def parse_horizontal_table(self, rows: list, headers: list = None, fields: list = None,
+                               merged: bool = None) -> Dict:
+        """解析横向多列表格，支持多行数据（已识别布局时传入表头、字段计划和是否含合并单元格）"""
         try:
             if len(rows) < 2:
                 return {}
             
             # 解析表头
-            header_row = rows[0]
-            header_cells = header_row.find_all(['td', 'th'])
-            headers = [clean_text(cell.get_text()) for cell in header_cells]
+            if headers is None:
+                header_cells = rows[0].find_all(['td', 'th'])
+                headers = [clean_text(cell.get_text()) for cell in header_cells]
             
             self.logger.debug(f"表头: {headers}")
             
             # 如果只有2行，使用原有逻辑（单条记录）
             if len(rows) == 2:
-                return self.parse_single_row_table(headers, rows[1])
+                self.last_table_layout = 'horizontal_single'
+                return self.parse_single_row_table(headers, rows[1], fields)
             
             # 多行数据处理
             elif len(rows) > 2:
-                return self.parse_multi_row_table(headers, rows[1:])
+                self.last_table_layout = 'horizontal_multi'
+                return self.parse_multi_row_table(headers, rows[1:], fields, merged)
             
             return {}
             
@@ -972,7 +937,7 @@ class NFRACrawler:
             self.logger.error(f"解析横向表格失败: {e}")
             return {}
     
-    def parse_single_row_table(self, headers: list, data_row) -> Dict:
+    def parse_single_row_table(self, headers: list, data_row, fields: list = None) -> Dict:
         """解析单行数据表格"""
         try:
             data_cells = data_row.find_all(['td', 'th'])
@@ -983,31 +948,9 @@ class NFRACrawler:
             
             data = {}
             
-            # 根据表头映射数据
-            for i, header in enumerate(headers):
-                if i < len(data_cells):
-                    cell_text = clean_text(data_cells[i].get_text())
-                    
-                    # 字段映射
-                    if any(keyword in header for keyword in ['序号']):
-                        data['序号'] = cell_text
-                    elif any(keyword in header for keyword in ['当事人', '被处罚当事人']):
-                        data['当事人名称'] = cell_text
-                    elif any(keyword in header for keyword in ['违法违规', '主要违法违规', '违法行为', '违法违规事实', '主要违法违规事实']):
-                        data['主要违法违规行为'] = cell_text
-                    elif any(keyword in header for keyword in ['处罚内容', '行政处罚', '处罚决定', '行政处罚内容', '行政处罚决定']):
-                        data['行政处罚内容'] = cell_text
-                    elif any(keyword in header for keyword in ['决定机关', '机关名称', '作出决定机关', '作出处罚决定的机关', '作出处罚决定的机关名称']):
-                        data['作出决定机关'] = cell_text
-                    elif any(keyword in header for keyword in ['决定日期', '作出处罚决定的日期', '处罚决定日期']):
-                        data['作出决定日期'] = cell_text
-                    elif any(keyword in header for keyword in ['处罚依据', '行政处罚依据']):
-                        data['行政处罚依据'] = cell_text
-                    elif any(keyword in header for keyword in ['决定书文号', '行政处罚决定书文号']):
-                        data['行政处罚决定书文号'] = cell_text
-                    else:
-                        # 保存其他字段
-                        data[header] = cell_text
+            # 根据表头映射数据（未匹配规则的列保留原表头作为字段名）
+            for field, cell in zip(fields or horizontal_matcher.plan(headers), data_cells):
+                data[field] = clean_text(cell.get_text())
             
             self.logger.debug(f"单行表格解析结果: {data}")
             return data
@@ -1016,17 +959,24 @@ class NFRACrawler:
             self.logger.error(f"解析单行表格失败: {e}")
             return {}
     
-    def parse_multi_row_table(self, headers: list, data_rows: list) -> Dict:
+    def parse_multi_row_table(self, headers: list, data_rows: list, fields: list = None,
+                              merged: bool = None) -> Dict:
         """解析多行数据表格，返回多条记录"""
         try:
-            # 首先检查是否有合并单元格
-            if self.has_merged_cells(data_rows):
+            # 首先检查是否有合并单元格（布局识别时已检测过则直接使用）
+            if merged is None:
+                merged = self.has_merged_cells(data_rows)
+            if merged:
                 self.logger.info("检测到合并单元格，使用合并单元格解析逻辑")
+                self.last_table_layout = 'horizontal_merged'
                 return self.parse_merged_cells_table(headers, data_rows)
             
             # 原有的多行表格解析逻辑
             all_records = []
             
+            # 每列对应的字段只解析一次，逐行按列下标套用
+            column_fields = fields or horizontal_matcher.plan(headers)
+            
             for row_index, data_row in enumerate(data_rows, 1):
                 data_cells = data_row.find_all(['td', 'th'])
                 
@@ -1036,32 +986,12 @@ class NFRACrawler:
                 
                 record = {}
                 
-                # 根据表头映射数据
-                for i, header in enumerate(headers):
-                    if i < len(data_cells):
-                        cell_text = clean_text(data_cells[i].get_text())
-                        
-                        # 字段映射
-                        if any(keyword in header for keyword in ['序号']):
-                            record['序号'] = cell_text
-                            record['原始序号'] = cell_text  # 保留原始序号
-                        elif any(keyword in header for keyword in ['当事人', '被处罚当事人']):
-                            record['当事人名称'] = cell_text
-                        elif any(keyword in header for keyword in ['违法违规', '主要违法违规', '违法行为', '违法违规事实', '主要违法违规事实']):
-                            record['主要违法违规行为'] = cell_text
-                        elif any(keyword in header for keyword in ['处罚内容', '行政处罚', '处罚决定', '行政处罚内容', '行政处罚决定']):
-                            record['行政处罚内容'] = cell_text
-                        elif any(keyword in header for keyword in ['决定机关', '机关名称', '作出决定机关', '作出处罚决定的机关', '作出处罚决定的机关名称']):
-                            record['作出决定机关'] = cell_text
-                        elif any(keyword in header for keyword in ['决定日期', '作出处罚决定的日期', '处罚决定日期']):
-                            record['作出决定日期'] = cell_text
-                        elif any(keyword in header for keyword in ['处罚依据', '行政处罚依据']):
-                            record['行政处罚依据'] = cell_text
-                        elif any(keyword in header for keyword in ['决定书文号', '行政处罚决定书文号']):
-                            record['行政处罚决定书文号'] = cell_text
-                        else:
-                            # 保存其他字段
-                            record[header] = cell_text
+                # 根据列计划映射数据
+                for field, cell in zip(column_fields, data_cells):
+                    cell_text = clean_text(cell.get_text())
+                    record[field] = cell_text
+                    if field == '序号':
+                        record['原始序号'] = cell_text  # 保留原始序号
                 
                 # 添加记录标识信息
                 record['批文内序号'] = row_index
@@ -1093,14 +1023,7 @@ class NFRACrawler:
     def has_merged_cells(self, data_rows: list) -> bool:
         """检测表格是否有合并单元格"""
         try:
-            for row in data_rows:
-                cells = row.find_all(['td', 'th'])
-                for cell in cells:
-                    rowspan = cell.get('rowspan')
-                    colspan = cell.get('colspan') 
-                    if (rowspan and int(rowspan) > 1) or (colspan and int(colspan) > 1):
-                        return True
-            return False
+            return row_has_spans(data_rows)
         except Exception as e:
             self.logger.warning(f"检测合并单元格失败: {e}")
             return False
@@ -1110,99 +1033,20 @@ class NFRACrawler:
         try:
             all_records = []
             
-            # 创建一个虚拟网格来追踪合并单元格
-            grid = {}
-            max_cols = len(headers)
-            
-            for row_idx, row in enumerate(data_rows):
-                cells = row.find_all(['td', 'th'])
-                cell_idx = 0
-                col_idx = 0
-                
-                for cell in cells:
-                    # 跳过被合并单元格占用的位置
-                    while (row_idx, col_idx) in grid:
-                        col_idx += 1
-                    
-                    # 获取单元格内容
-                    cell_text = clean_text(cell.get_text())
-                    
-                    # 获取合并属性
-                    rowspan = int(cell.get('rowspan', 1))
-                    colspan = int(cell.get('colspan', 1))
-                    
-                    # 在网格中标记这个单元格及其合并范围
-                    for r in range(row_idx, row_idx + rowspan):
-                        for c in range(col_idx, col_idx + colspan):
-                            if c < max_cols:  # 确保不超出表头范围
-                                grid[(r, c)] = {
-                                    'text': cell_text,
-                                    'original_row': row_idx,
-                                    'original_col': col_idx,
-                                    'rowspan': rowspan,
-                                    'colspan': colspan
-                                }
-                    
-                    col_idx += colspan
-                    cell_idx += 1
-            
-            # 现在根据网格数据构建记录
-            processed_rows = {}
-            
-            for (row_idx, col_idx), cell_info in grid.items():
-                if row_idx not in processed_rows:
-                    processed_rows[row_idx] = {}
-                
-                if col_idx < len(headers):
-                    header = headers[col_idx]
-                    processed_rows[row_idx][header] = cell_info['text']
-            
-            # 处理每一行数据
-            for row_idx in sorted(processed_rows.keys()):
-                row_data = processed_rows[row_idx]
-                
-                # 对于合并单元格，需要从前面的行继承数据
-                if row_idx > 0:
-                    # 检查哪些字段在这一行是空的（可能被合并单元格跨行覆盖）
-                    for col_idx, header in enumerate(headers):
-                        if header not in row_data or not row_data[header]:
-                            # 查找这个位置是否被前面行的合并单元格覆盖
-                            for prev_row_idx in range(row_idx - 1, -1, -1):
-                                cell_key = (prev_row_idx, col_idx)
-                                if cell_key in grid:
-                                    cell_info = grid[cell_key]
-                                    # 检查这个合并单元格是否覆盖当前行
-                                    if (prev_row_idx + cell_info['rowspan'] > row_idx):
-                                        row_data[header] = cell_info['text']
-                                        break
-                
+            # 展开合并单元格后逐行处理
+            for row_idx, row_data in resolve_merged_rows(headers, data_rows):
                 # 构建记录
                 record = {}
                 
                 for header, cell_text in row_data.items():
                     if not cell_text:
                         continue
-                        
+                    
                     # 字段映射逻辑
-                    if any(keyword in header for keyword in ['序号']):
-                        record['序号'] = cell_text
+                    field = horizontal_matcher.field_for(header)
+                    record[field] = cell_text
+                    if field == '序号':
                         record['原始序号'] = cell_text
-                    elif any(keyword in header for keyword in ['当事人', '被处罚当事人']):
-                        record['当事人名称'] = cell_text
-                    elif any(keyword in header for keyword in ['违法违规', '主要违法违规', '违法行为', '违法违规事实', '主要违法违规事实']):
-                        record['主要违法违规行为'] = cell_text
-                    elif any(keyword in header for keyword in ['处罚内容', '行政处罚', '处罚决定', '行政处罚内容', '行政处罚决定']):
-                        record['行政处罚内容'] = cell_text
-                    elif any(keyword in header for keyword in ['决定机关', '机关名称', '作出决定机关', '作出处罚决定的机关', '作出处罚决定的机关名称']):
-                        record['作出决定机关'] = cell_text
-                    elif any(keyword in header for keyword in ['决定日期', '作出处罚决定的日期', '处罚决定日期']):
-                        record['作出决定日期'] = cell_text
-                    elif any(keyword in header for keyword in ['处罚依据', '行政处罚依据']):
-                        record['行政处罚依据'] = cell_text
-                    elif any(keyword in header for keyword in ['决定书文号', '行政处罚决定书文号']):
-                        record['行政处罚决定书文号'] = cell_text
-                    else:
-                        record[header] = cell_text
                 
                 # 添加记录标识信息
                 record['批文内序号'] = row_idx + 1
@@ -1252,48 +1096,8 @@ class NFRACrawler:
                     if not left_text or not right_text:
                         continue
                     
-                    # 增强的字段映射规则 - 使用更精确的匹配，优先匹配更具体的字段名
-                    # 精确匹配优先
-                    if left_text in ['序号']:
-                        data['序号'] = right_text
-                    elif left_text in ['当事人名称', '被处罚当事人', '当事人']:
-                        data['当事人名称'] = right_text
-                    elif left_text in ['主要违法违规事实', '主要违法违规行为', '违法违规事实', '违法违规行为', '违法行为']:
-                        data['主要违法违规行为'] = right_text
-                    elif left_text in ['行政处罚依据', '处罚依据']:
-                        data['行政处罚依据'] = right_text
-                    elif left_text in ['行政处罚决定', '处罚决定']:
-                        data['行政处罚内容'] = right_text
-                    elif left_text in ['行政处罚内容', '处罚内容']:
-                        data['行政处罚内容'] = right_text
-                    elif left_text in ['作出处罚决定的机关名称', '作出决定机关', '决定机关', '机关名称', '作出处罚决定的机关']:
-                        data['作出决定机关'] = right_text
-                    elif left_text in ['作出处罚决定的日期', '作出决定日期', '决定日期', '处罚决定日期']:
-                        data['作出决定日期'] = right_text
-                    elif left_text in ['行政处罚决定书文号', '决定书文号']:
-                        data['行政处罚决定书文号'] = right_text
-                    # 包含匹配（作为后备）
-                    elif '序号' in left_text:
-                        data['序号'] = right_text
-                    elif any(keyword in left_text for keyword in ['当事人', '被处罚当事人']):
-                        data['当事人名称'] = right_text
-                    elif any(keyword in left_text for keyword in ['违法违规事实', '违法违规行为', '主要违法违规', '违法行为']):
-                        data['主要违法违规行为'] = right_text
-                    elif '行政处罚依据' in left_text or '处罚依据' in left_text:
-                        data['行政处罚依据'] = right_text
-                    elif '行政处罚决定' in left_text and '机关' not in left_text and '日期' not in left_text:
-                        data['行政处罚内容'] = right_text
-                    elif '处罚内容' in left_text:
-                        data['行政处罚内容'] = right_text
-                    elif any(keyword in left_text for keyword in ['作出处罚决定的机关', '决定机关', '机关名称']) and '日期' not in left_text:
-                        data['作出决定机关'] = right_text
-                    elif any(keyword in left_text for keyword in ['作出处罚决定的日期', '决定日期', '处罚决定日期']):
-                        data['作出决定日期'] = right_text
-                    elif any(keyword in left_text for keyword in ['决定书文号', '行政处罚决定书文号']):
-                        data['行政处罚决定书文号'] = right_text
-                    else:
-                        # 保存其他字段
-                        data[left_text] = right_text
+                    # 字段映射：精确匹配优先，包含匹配作为后备，未匹配时保存其他字段
+                    data[key_value_matcher.field_for(left_text)] = right_text
             
             self.logger.debug(f"键值对表格解析结果: {data}")
             return data
@@ -1302,12 +1106,68 @@ class NFRACrawler:
             self.logger.error(f"解析键值对表格失败: {e}")
             return {}
     
-    def process_link_with_new_window(self, href: str, title: str) -> Dict:
+    @stage_metrics.timed('detail_total')
+    def process_link_with_new_window(self, href: str, title: str, page: int = None) -> Dict:
+        """在新窗口中处理链接，并为该链接写入一条结构化追踪事件"""
+        started_at = time.time()
+        self.last_table_layout = None
+        self.last_detail_error = None
+        
+        with stage_metrics.capture() as timings:
+            detail_start = time.perf_counter()
+            result = self._process_link_with_new_window(href, title)
+            timings['detail_total'] = time.perf_counter() - detail_start
+        
+        self.finish_detail(href, page, result, timings, self.last_table_layout, self.last_detail_error, started_at)
+        return result
+    
+    def finish_detail(self, href: str, page: Optional[int], result: Dict, timings: Dict[str, float],
+                      layout: Optional[str], error: Optional[str], started_at: float) -> None:
+        """统计详情页解析结果并写入追踪事件"""
+        if error:
+            outcome, record_count = OUTCOME_ERROR, 0
+        elif result.get('is_multi_record'):
+            outcome, record_count = OUTCOME_MULTI_RECORD, result.get('total_count', 0)
+            crawl_telemetry.inc('multi_record_expansions')
+        elif result:
+            outcome, record_count = OUTCOME_SUCCESS, 1
+        else:
+            outcome, record_count = OUTCOME_NO_TABLE_DATA, 0
+        
+        if record_count:
+            crawl_telemetry.inc('records_parsed', record_count)
+        
+        detail_trace_log.emit(
+            url=href,
+            category=stage_metrics.current_category(),
+            page=page,
+            timings=timings,
+            layout=layout,
+            record_count=record_count,
+            outcome=outcome,
+            error=error,
+            started_at=started_at,
+        )
+    
+    def _process_link_with_new_window(self, href: str, title: str) -> Dict:
         """在新窗口中处理链接 - 参考用户代码的窗口处理方式"""
+        fetched = self.fetch_detail_page(href, title)
+        if fetched is None:
+            return {}
+        return self.parse_detail_page(*fetched)
+    
+    @crawl_telemetry.track_inflight('inflight_fetches')
+    def fetch_detail_page(self, href: str, title: str) -> Optional[Tuple]:
+        """在新窗口中打开详情页，返回 (页面源码, 链接, 标题, 发布时间, 抓取时间)，失败返回None
+        
+        发布时间固定为None，由 parse_detail_page 从页面源码中提取。
+        """
         try:
             self.logger.info(f"正在处理: {title}")
             time.sleep(1)  # 避免请求过快
             
+            fetch_start = time.perf_counter()
+            
             # 在新窗口中打开链接
             self.driver.execute_script("window.open(arguments[0], '_blank');", href)
             new_window = self.driver.window_handles[-1]
@@ -1319,80 +1179,14 @@ class NFRACrawler:
             try:
                 # 等待页面加载
                 self.wait.until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
-                time.sleep(2)
-                
-                # 提取发布时间
-                publish_time = self.extract_publish_time()
-                
-                # 查找表格
-                soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                # 支持多种表格类型
-                tables = soup.find_all('table', class_=['MsoTableGrid', 'MsoNormalTable'])
-                
-                if not tables:
-                    # 如果没找到指定类的表格，查找所有表格
-                    tables = soup.find_all('table')
-                
-                detail_data = {}
-                for table in tables:
-                    # 解析表格内容
-                    table_data = self.parse_table_from_soup(table)
-                    if table_data:
-                        detail_data.update(table_data)
-                        break  # 只处理第一个有效表格
-                
-                if detail_data:
-                    # 处理多记录情况
-                    result_records = []
-                    
-                    # 添加基础信息
-                    base_info = {
-                        '抓取时间': get_current_timestamp(),
-                        '详情链接': href,
-                        '标题': title,
-                        '发布时间': publish_time  # 确保发布时间被包含
-                    }
-                    
-                    # 检查是否有additional_records（多记录批文）
-                    if 'additional_records' in detail_data:
-                        additional_records = detail_data.pop('additional_records')
-                        
-                        # 主记录
-                        main_record = {**detail_data, **base_info}
-                        result_records.append(main_record)
-                        
-                        # 附加记录
-                        for add_record in additional_records:
-                            # 继承主记录的共同信息（如决定机关、标题等）
-                            combined_record = {**base_info}
-                            
-                            # 添加附加记录的特定信息
-                            combined_record.update(add_record)
-                            
-                            # 继承主记录中的共同字段（如果附加记录中没有）
-                            for key in ['作出决定机关', '行政处罚决定书文号', '标题', '发布时间']:
-                                if key in detail_data and (key not in combined_record or not combined_record[key]):
-                                    combined_record[key] = detail_data[key]
-                            
-                            result_records.append(combined_record)
-                        
-                        self.logger.info(f"成功解析多记录处罚信息: {title}，共{len(result_records)}条记录")
-                        
-                        # 返回多记录标识
-                        return {
-                            'is_multi_record': True,
-                            'records': result_records,
-                            'total_count': len(result_records)
-                        }
-                    else:
-                        # 单记录情况
-                        detail_data.update(base_info)
-                        self.logger.info(f"成功解析处罚信息: {title}")
-                        return detail_data
-                else:
-                    self.logger.warning(f"未找到有效表格数据: {title}")
+                stage_metrics.record('detail_fetch', time.perf_counter() - fetch_start)
+                crawl_telemetry.inc('detail_pages_fetched')
                 
-                return detail_data
+                with stage_metrics.span('wait'):
+                    time.sleep(2)
+                
+                # 发布时间在解析阶段从页面源码中提取，不再逐个查询浏览器元素
+                return self.driver.page_source, href, title, None, get_current_timestamp()
                 
             finally:
                 # 关闭新窗口并切换回原窗口
@@ -1400,6 +1194,9 @@ class NFRACrawler:
                 self.driver.switch_to.window(original_window)
                 
         except Exception as e:
+            if isinstance(e, TimeoutException):
+                crawl_telemetry.inc('timeouts')
+            self.last_detail_error = f"{type(e).__name__}: {e}"
             self.logger.error(f"处理链接失败 {href}: {e}")
             try:
                 # 确保切换回原窗口
@@ -1408,8 +1205,88 @@ class NFRACrawler:
                 self.driver.switch_to.window(self.driver.window_handles[0])
             except:
                 pass
+            return None
+    
+    def parse_detail_page(self, page_source: str, href: str, title: str, publish_time: Optional[str],
+                          fetched_at: str = None) -> Dict:
+        """解析详情页源码，不依赖浏览器，可在解析进程中执行
+
+        publish_time 为None时从页面源码中提取发布时间。
+        """
+        try:
+            # 查找表格（支持多种表格类型，只解析表格片段），同时提取发布时间
+            with stage_metrics.span('html_parse'):
+                tables, page_publish_time = parse_detail_document(page_source)
+            if publish_time is None:
+                publish_time = page_publish_time
+            
+            detail_data = {}
+            for table in tables:
+                # 解析表格内容
+                table_data = self.parse_table_from_soup(table)
+                if table_data:
+                    detail_data.update(table_data)
+                    break  # 只处理第一个有效表格
+            
+            if detail_data:
+                # 处理多记录情况
+                result_records = []
+                
+                # 添加基础信息
+                base_info = {
+                    '抓取时间': fetched_at or get_current_timestamp(),
+                    '详情链接': href,
+                    '标题': title,
+                    '发布时间': publish_time  # 确保发布时间被包含
+                }
+                
+                # 检查是否有additional_records（多记录批文）
+                if 'additional_records' in detail_data:
+                    additional_records = detail_data.pop('additional_records')
+                    
+                    # 主记录
+                    main_record = {**detail_data, **base_info}
+                    result_records.append(main_record)
+                    
+                    # 附加记录
+                    for add_record in additional_records:
+                        # 继承主记录的共同信息（如决定机关、标题等）
+                        combined_record = {**base_info}
+                        
+                        # 添加附加记录的特定信息
+                        combined_record.update(add_record)
+                        
+                        # 继承主记录中的共同字段（如果附加记录中没有）
+                        for key in ['作出决定机关', '行政处罚决定书文号', '标题', '发布时间']:
+                            if key in detail_data and (key not in combined_record or not combined_record[key]):
+                                combined_record[key] = detail_data[key]
+                        
+                        result_records.append(combined_record)
+                    
+                    self.logger.info(f"成功解析多记录处罚信息: {title}，共{len(result_records)}条记录")
+                    
+                    # 返回多记录标识
+                    return {
+                        'is_multi_record': True,
+                        'records': result_records,
+                        'total_count': len(result_records)
+                    }
+                else:
+                    # 单记录情况
+                    detail_data.update(base_info)
+                    self.logger.info(f"成功解析处罚信息: {title}")
+                    return detail_data
+            else:
+                self.logger.warning(f"未找到有效表格数据: {title}")
+            
+            return detail_data
+            
+        except Exception as e:
+            self.last_detail_error = f"{type(e).__name__}: {e}"
+            self.logger.error(f"解析详情页面失败 {href}: {e}")
             return {}
     
+    @stage_metrics.timed('table_parse')
     def parse_table_from_soup(self, table) -> Dict:
         """从BeautifulSoup表格对象解析数据 - 增强版本支持多种表格格式"""
         try:
@@ -1426,45 +1303,117 @@ class NFRACrawler:
                 data['行政处罚依据'] = punishment_basis
             
             rows = table.find_all('tr')
-            
-            if len(rows) < 2:
-                return data if data else {}
-            
-            # 检查表格类型：横向多列 vs 键值对
-            first_row = rows[0]
-            first_row_cells = first_row.find_all(['td', 'th'])
-            
-            # 如果第一行有多个列（>=3），且包含常见的表头关键词，则为横向表格
-            if len(first_row_cells) >= 3:
-                header_texts = [clean_text(cell.get_text()) for cell in first_row_cells]
-                
-                # 检查是否包含典型的表头关键词
-                header_keywords = ['序号', '当事人', '违法', '处罚', '机关']
-                if any(any(keyword in header for keyword in header_keywords) for header in header_texts):
-                    self.logger.info("检测到横向多列表格，使用横向解析逻辑")
-                    table_data = self.parse_horizontal_table(rows)
-                    data.update(table_data)
-                    return data
-            
-            # 否则使用键值对解析逻辑
-            self.logger.info("检测到键值对表格，使用键值对解析逻辑")
-            table_data = self.parse_key_value_table(rows)
-            data.update(table_data)
-            
-            # 如果键值对解析没有找到处罚内容，尝试从完整文本中提取
-            if '行政处罚内容' not in data or not data['行政处罚内容']:
-                punishment_content = self.extract_punishment_content_from_text(page_text)
-                if punishment_content:
-                    data['行政处罚内容'] = punishment_content
-            
-            return data
+            return self.parse_table_rows(rows, page_text, data)
             
         except Exception as e:
             self.logger.error(f"解析表格失败: {e}")
             return {}
     
+    def fetch_details(self, category: str, punishment_list: List[Dict]) -> List[Dict]:
+        """获取列表中每条记录的详情信息，并与列表信息合并"""
+        return list(self.iter_details(category, punishment_list))
+    
+    def iter_details(self, category: str, punishment_list: List[Dict]) -> Iterator[Dict]:
+        """逐条产出列表中每条记录的详情信息（已与列表信息合并）
+
+        启用解析进程池时，浏览器抓取与表格解析重叠进行：抓取到的页面源码提交给解析进程，
+        解析结果按列表顺序收集，输出顺序与逐条处理时一致。
+        """
+        pool = self.get_parse_pool()
+        pending = deque()
+        
+        for i, item in enumerate(punishment_list, 1):
+            self.logger.info(f"正在处理 {category} 第 {i}/{len(punishment_list)} 条记录")
+            
+            detail_url = item.get('detail_url')
+            if not detail_url:
+                self.logger.warning(f"第 {i} 条记录缺少详情链接")
+                continue
+            
+            if self.known_item_filter and self.known_item_filter(item):
+                self.logger.info(f"第 {i} 条记录已在总表中，跳过: {item.get('title', '')}")
+                crawl_telemetry.inc('known_records_skipped')
+                continue
+            
+            if pool is None:
+                # 使用新窗口处理方式
+                detail_data = self.process_link_with_new_window(detail_url, item.get('title', ''), item.get('page'))
+                yield from self._combine_detail_records(item, detail_data)
+            else:
+                pending.append(self._submit_detail(pool, item, detail_url))
+                # 收集队首已完成的解析结果
+                while pending and (pending[0][1] is None or pending[0][1].done()):
+                    yield from self._collect_detail(pending.popleft())
+            
+            # 请求间隔
+            with stage_metrics.span('request_delay'):
+                time.sleep(CRAWL_CONFIG['delay_between_requests'])
+        
+        while pending:
+            yield from self._collect_detail(pending.popleft())
+    
+    def _submit_detail(self, pool: DetailParsePool, item: Dict, detail_url: str) -> Tuple:
+        """抓取详情页并提交解析，返回待收集的 (列表项, 解析任务, 抓取阶段耗时, 异常信息, 开始时间)"""
+        started_at = time.time()
+        self.last_detail_error = None
+        
+        with stage_metrics.capture() as timings:
+            fetch_start = time.perf_counter()
+            fetched = self.fetch_detail_page(detail_url, item.get('title', ''))
+            timings['detail_total'] = time.perf_counter() - fetch_start
+        
+        future = pool.submit(*fetched) if fetched is not None else None
+        return item, future, timings, self.last_detail_error, started_at
+    
+    def _collect_detail(self, pending_detail: Tuple) -> List[Dict]:
+        """等待一个详情页解析完成，合并结果并记录耗时和追踪事件"""
+        item, future, timings, error, started_at = pending_detail
+        result, layout = {}, None
+        
+        if future is not None:
+            try:
+                result, layout, error, parse_timings, counters = future.result()
+                # 解析进程中的计数（如布局缓存命中）汇总到本进程
+                crawl_telemetry.merge(counters)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                self.logger.error(f"解析进程处理失败 {item.get('detail_url')}: {e}")
+                parse_timings = {}
+            
+            # 解析进程中的阶段耗时汇总到本进程
+            for stage, duration in parse_timings.items():
+                if stage != 'detail_parse':
+                    stage_metrics.record(stage, duration)
+                timings[stage] = timings.get(stage, 0.0) + duration
+            timings['detail_total'] += parse_timings.get('detail_parse', 0.0)
+        
+        stage_metrics.record('detail_total', timings['detail_total'])
+        self.finish_detail(item.get('detail_url'), item.get('page'), result, timings, layout, error, started_at)
+        return self._combine_detail_records(item, result)
+    
+    def _combine_detail_records(self, item: Dict, detail_data: Dict) -> List[Dict]:
+        """将详情信息与列表信息合并，多记录批文展开为多条"""
+        detailed_data = []
+        if detail_data:
+            # 检查是否为多记录批文
+            if isinstance(detail_data, dict) and detail_data.get('is_multi_record'):
+                # 多记录情况：展开所有记录
+                records = detail_data.get('records', [])
+                for record in records:
+                    # 合并列表信息和详情信息
+                    combined_data = {**item, **record}
+                    detailed_data.append(combined_data)
+                
+                self.logger.info(f"多记录批文处理完成，展开为{len(records)}条独立记录")
+            else:
+                # 单记录情况
+                combined_data = {**item, **detail_data}
+                detailed_data.append(combined_data)
+        return detailed_data
+    
     def crawl_category_smart(self, category: str, target_year: int = None, target_month: int = None, max_pages: int = 10, max_records: int = None, use_smart_check: bool = False) -> List[Dict]:
         """智能爬取指定类别的处罚信息 - 支持按月份过滤"""
+        stage_metrics.set_category(category)
         self.logger.info(f"开始智能爬取 {category} 处罚信息")
         
         if target_year and target_month:
@@ -1483,42 +1432,14 @@ class NFRACrawler:
             punishment_list = punishment_list[:max_records]
         
         # 获取详情信息
-        detailed_data = []
-        for i, item in enumerate(punishment_list, 1):
-            self.logger.info(f"正在处理 {category} 第 {i}/{len(punishment_list)} 条记录")
-            
-            detail_url = item.get('detail_url')
-            if not detail_url:
-                self.logger.warning(f"第 {i} 条记录缺少详情链接")
-                continue
-            
-            # 使用新窗口处理方式
-            detail_data = self.process_link_with_new_window(detail_url, item.get('title', ''))
-            
-            if detail_data:
-                # 检查是否为多记录批文
-                if isinstance(detail_data, dict) and detail_data.get('is_multi_record'):
-                    # 多记录情况：展开所有记录
-                    records = detail_data.get('records', [])
-                    for record in records:
-                        # 合并列表信息和详情信息
-                        combined_data = {**item, **record}
-                        detailed_data.append(combined_data)
-                    
-                    self.logger.info(f"多记录批文处理完成，展开为{len(records)}条独立记录")
-                else:
-                    # 单记录情况
-                    combined_data = {**item, **detail_data}
-                    detailed_data.append(combined_data)
-            
-            # 请求间隔
-            time.sleep(CRAWL_CONFIG['delay_between_requests'])
+        detailed_data = self.fetch_details(category, punishment_list)
         
         self.logger.info(f"{category} 处罚信息爬取完成，共获得 {len(detailed_data)} 条详细记录")
         return detailed_data
 
     def crawl_category(self, category: str, max_pages: int = 5, max_records: int = None) -> List[Dict]:
         """爬取指定类别的所有处罚信息"""
+        stage_metrics.set_category(category)
         self.logger.info(f"开始爬取 {category} 处罚信息")
         
         # 获取处罚列表
@@ -1534,36 +1455,7 @@ class NFRACrawler:
             punishment_list = punishment_list[:max_records]
         
         # 获取详情信息
-        detailed_data = []
-        for i, item in enumerate(punishment_list, 1):
-            self.logger.info(f"正在处理 {category} 第 {i}/{len(punishment_list)} 条记录")
-            
-            detail_url = item.get('detail_url')
-            if not detail_url:
-                self.logger.warning(f"第 {i} 条记录缺少详情链接")
-                continue
-            
-            # 使用新窗口处理方式
-            detail_data = self.process_link_with_new_window(detail_url, item.get('title', ''))
-            
-            if detail_data:
-                # 检查是否为多记录批文
-                if isinstance(detail_data, dict) and detail_data.get('is_multi_record'):
-                    # 多记录情况：展开所有记录
-                    records = detail_data.get('records', [])
-                    for record in records:
-                        # 合并列表信息和详情信息
-                        combined_data = {**item, **record}
-                        detailed_data.append(combined_data)
-                    
-                    self.logger.info(f"多记录批文处理完成，展开为{len(records)}条独立记录")
-                else:
-                    # 单记录情况
-                    combined_data = {**item, **detail_data}
-                    detailed_data.append(combined_data)
-            
-            # 请求间隔
-            time.sleep(CRAWL_CONFIG['delay_between_requests'])
+        detailed_data = self.fetch_details(category, punishment_list)
         
         self.logger.info(f"{category} 处罚信息爬取完成，共获得 {len(detailed_data)} 条详细记录")
         return detailed_data
@@ -1645,62 +1537,6 @@ class NFRACrawler:
         
         return all_data
 
-    def extract_publish_time(self) -> str:
-        """提取页面发布时间"""
-        try:
-            # 查找发布时间元素 - 支持多种格式
-            time_selectors = [
-                'span.ng-binding',  # 你提供的格式
-                'span[ng-bind*="time"]',
-                '.publish-time',
-                '.pub-time',
-                '.time',
-                '*[class*="time"]'
-            ]
-            
-            for selector in time_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for element in elements:
-                        text = element.text.strip()
-                        if '发布时间' in text or '时间' in text:
-                            # 提取时间部分，支持多种格式
-                            import re
-                            # 匹配 YYYY-MM-DD 格式
-                            time_match = re.search(r'(\d{4}[-/]\d{1,2}[-/]\d{1,2})', text)
-                            if time_match:
-                                self.logger.debug(f"找到发布时间: {time_match.group(1)}")
-                                return time_match.group(1)
-                except:
-                    continue
-            
-            # 如果没找到专门的发布时间元素，尝试从页面内容中提取
-            try:
-                page_source = self.driver.page_source
-                import re
-                # 查找发布时间相关的模式
-                patterns = [
-                    r'发布时间[：:]\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',
-                    r'时间[：:]\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',
-                    r'日期[：:]\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',
-                ]
-                
-                for pattern in patterns:
-                    match = re.search(pattern, page_source)
-                    if match:
-                        self.logger.debug(f"从页面源码提取发布时间: {match.group(1)}")
-                        return match.group(1)
-                        
-            except Exception as e:
-                self.logger.debug(f"从页面源码提取时间失败: {e}")
-            
-            self.logger.debug("未找到发布时间信息")
-            return ""
-            
-        except Exception as e:
-            self.logger.warning(f"提取发布时间失败: {e}")
-            return ""
-
     def crawl_all_smart_by_year(self, target_year: int, max_pages_per_category: int = 50, max_records_per_category: int = None) -> Dict[str, List[Dict]]:
         """智能爬取指定年份的所有处罚信息 - 支持按年份过滤"""
         if not self.setup_driver():
@@ -1747,6 +1583,7 @@ class NFRACrawler:
 
     def crawl_category_smart_by_year(self, category: str, target_year: int, max_pages: int = 50, max_records: int = None) -> List[Dict]:
         """智能爬取指定类别指定年份的处罚信息"""
+        stage_metrics.set_category(category)
         self.logger.info(f"开始智能爬取 {category} {target_year}年处罚信息")
         
         # 使用智能方法获取处罚列表，按年份过滤
@@ -1762,36 +1599,7 @@ class NFRACrawler:
             punishment_list = punishment_list[:max_records]
         
         # 获取详情信息
-        detailed_data = []
-        for i, item in enumerate(punishment_list, 1):
-            self.logger.info(f"正在处理 {category} 第 {i}/{len(punishment_list)} 条记录")
-            
-            detail_url = item.get('detail_url')
-            if not detail_url:
-                self.logger.warning(f"第 {i} 条记录缺少详情链接")
-                continue
-            
-            # 使用新窗口处理方式
-            detail_data = self.process_link_with_new_window(detail_url, item.get('title', ''))
-            
-            if detail_data:
-                # 检查是否为多记录批文
-                if isinstance(detail_data, dict) and detail_data.get('is_multi_record'):
-                    # 多记录情况：展开所有记录
-                    records = detail_data.get('records', [])
-                    for record in records:
-                        # 合并列表信息和详情信息
-                        combined_data = {**item, **record}
-                        detailed_data.append(combined_data)
-                    
-                    self.logger.info(f"多记录批文处理完成，展开为{len(records)}条独立记录")
-                else:
-                    # 单记录情况
-                    combined_data = {**item, **detail_data}
-                    detailed_data.append(combined_data)
-            
-            # 请求间隔
-            time.sleep(CRAWL_CONFIG['delay_between_requests'])
+        detailed_data = self.fetch_details(category, punishment_list)
         
         self.logger.info(f"{category} {target_year}年处罚信息爬取完成，共获得 {len(detailed_data)} 条详细记录")
         return detailed_data
@@ -1820,8 +1628,10 @@ class NFRACrawler:
                 self.logger.info(f"正在解析 {category} 第 {current_page} 页")
                 
                 # 等待页面加载完成，优化等待时间
-                self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                time.sleep(0.5)  # 减少额外等待时间从2秒到0.5秒
+                with stage_metrics.span('wait'):
+                    self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+                    time.sleep(0.5)  # 减少额外等待时间从2秒到0.5秒
+                crawl_telemetry.inc('pages_scanned')
                 
                 # 智能检查：获取当前页面的发布时间
                 publish_dates = self.get_page_publish_dates()
@@ -1898,6 +1708,7 @@ class NFRACrawler:
                 
                 # 解析当前页面的处罚信息
                 try:
+                    list_parse_start = time.perf_counter()
                     # 查找包含"行政处罚信息公开表"的链接
                     punishment_links = self.driver.find_elements(
                         By.XPATH, 
@@ -1935,6 +1746,7 @@ class NFRACrawler:
                             continue
                     
                     self.logger.info(f"第 {current_page} 页找到 {len(page_punishment_list)} 条处罚信息")
+                    stage_metrics.record('list_parse', time.perf_counter() - list_parse_start)
                     all_punishment_list.extend(page_punishment_list)
                     
                     # 检查是否有下一页
@@ -2030,6 +1842,7 @@ class NFRACrawler:
 
     def crawl_category_smart_by_date(self, category: str, target_year: int, target_month: int, target_day: int, max_pages: int = 3, max_records: int = None) -> List[Dict]:
         """智能爬取指定类别指定日期的处罚信息"""
+        stage_metrics.set_category(category)
         target_date_str = f"{target_year}-{target_month:02d}-{target_day:02d}"
         self.logger.info(f"开始智能爬取 {category} {target_date_str}处罚信息")
         
@@ -2046,36 +1859,7 @@ class NFRACrawler:
             punishment_list = punishment_list[:max_records]
         
         # 获取详情信息
-        detailed_data = []
-        for i, item in enumerate(punishment_list, 1):
-            self.logger.info(f"正在处理 {category} 第 {i}/{len(punishment_list)} 条记录")
-            
-            detail_url = item.get('detail_url')
-            if not detail_url:
-                self.logger.warning(f"第 {i} 条记录缺少详情链接")
-                continue
-            
-            # 使用新窗口处理方式
-            detail_data = self.process_link_with_new_window(detail_url, item.get('title', ''))
-            
-            if detail_data:
-                # 检查是否为多记录批文
-                if isinstance(detail_data, dict) and detail_data.get('is_multi_record'):
-                    # 多记录情况：展开所有记录
-                    records = detail_data.get('records', [])
-                    for record in records:
-                        # 合并列表信息和详情信息
-                        combined_data = {**item, **record}
-                        detailed_data.append(combined_data)
-                    
-                    self.logger.info(f"多记录批文处理完成，展开为{len(records)}条独立记录")
-                else:
-                    # 单记录情况
-                    combined_data = {**item, **detail_data}
-                    detailed_data.append(combined_data)
-            
-            # 请求间隔
-            time.sleep(CRAWL_CONFIG['delay_between_requests'])
+        detailed_data = self.fetch_details(category, punishment_list)
         
         self.logger.info(f"{category} {target_date_str}处罚信息爬取完成，共获得 {len(detailed_data)} 条详细记录")
         return detailed_data
@@ -2103,8 +1887,10 @@ class NFRACrawler:
                 self.logger.info(f"正在解析 {category} 第 {current_page} 页")
                 
                 # 等待页面加载完成，优化等待时间
-                self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                time.sleep(0.5)  # 减少额外等待时间从2秒到0.5秒
+                with stage_metrics.span('wait'):
+                    self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+                    time.sleep(0.5)  # 减少额外等待时间从2秒到0.5秒
+                crawl_telemetry.inc('pages_scanned')
                 
                 # 智能检查：获取当前页面的发布时间
                 publish_dates = self.get_page_publish_dates()
@@ -2120,6 +1906,7 @@ class NFRACrawler:
                     try:
                         page_punishment_list = []
                         
+                        list_parse_start = time.perf_counter()
                         # 查找包含"行政处罚信息公开表"的链接
                         punishment_links = self.driver.find_elements(
                             By.XPATH, 
@@ -2199,6 +1986,7 @@ class NFRACrawler:
                         target_date_count = len(page_punishment_list)
                         total_count = len(punishment_links)
                         self.logger.info(f"第 {current_page} 页找到 {target_date_count} 条目标日期记录 (共{total_count}条)")
+                        stage_metrics.record('list_parse', time.perf_counter() - list_parse_start)
                         all_punishment_list.extend(page_punishment_list)
                         
                     except Exception as e:
@@ -2256,6 +2044,7 @@ class NFRACrawler:
             self.logger.error(f"解析 {category} 处罚列表失败: {e}")
             return all_punishment_list
 
+    @stage_metrics.timed('date_scan')
     def get_link_publish_date(self, link_element) -> str:
         """获取链接对应的发布日期（优化版）"""
         try:
@@ -2356,6 +2145,46 @@ class NFRACrawler:
             self.logger.warning(f"获取链接发布日期失败: {e}")
             return ""
 
+    def stream_selected_categories(self, categories: List[str], list_fetcher: Callable[[str], List[Dict]],
+                                   max_records_per_category: int = None) -> Iterator[Tuple[str, Dict]]:
+        """流式爬取指定类别，逐条产出 (类别, 记录)，不在内存中累积结果
+
+        list_fetcher 接收类别名，返回该类别的处罚列表（决定按年、按月、按日还是普通爬取）。
+        """
+        if not self.setup_driver():
+            self.logger.error("无法初始化WebDriver，爬取失败")
+            return
+        
+        try:
+            for category in categories:
+                if category not in BASE_URLS:
+                    self.logger.warning(f"跳过未知类别: {category}")
+                    continue
+                
+                stage_metrics.set_category(category)
+                self.logger.info(f"开始流式爬取 {category}")
+                punishment_list = list_fetcher(category)
+                
+                if not punishment_list:
+                    self.logger.warning(f"{category} 没有找到处罚信息")
+                    continue
+                
+                # 如果设置了max_records，限制处理的记录数量
+                if max_records_per_category and len(punishment_list) > max_records_per_category:
+                    self.logger.info(f"{category} 找到 {len(punishment_list)} 条记录，限制处理前 {max_records_per_category} 条（测试模式）")
+                    punishment_list = punishment_list[:max_records_per_category]
+                
+                for record in self.iter_details(category, punishment_list):
+                    yield category, record
+                
+                # 类别间延迟
+                time.sleep(CRAWL_CONFIG['delay_between_requests'] * 2)
+            
+            self.logger.info("流式爬取完成")
+            
+        finally:
+            self.close_driver()
+    
     def crawl_selected_categories(self, categories: List[str], max_pages_per_category: int = 5, max_records_per_category: int = None) -> Dict[str, List[Dict]]:
         """爬取指定类别的处罚信息"""
         if not self.setup_driver():
@@ -4,13 +4,52 @@
 """
 
 import os
+import numpy as np
 import pandas as pd
 import re
-from typing import List, Dict, Any, Optional
+from collections import Counter
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
 from datetime import datetime
 import logging
 
-from utils import setup_logging, ensure_directory, clean_text
+from utils import (setup_logging, ensure_directory, clean_text, normalize_whitespace, parse_publish_times,
+                   optimize_dtypes, text_values, string_table)
+from metrics import stage_metrics
+from excel_writer import StreamingExcelWriter, read_excel_table
+from master_store import (master_store, read_excel_hyperlinks, MASTER_STORE_CONFIG, PUBLISH_TS_COLUMN,
+                          DEDUP_HASH_COLUMN)
+from known_records import known_records, record_keys
+from near_duplicates import near_duplicates, party_digest, NEAR_DUPLICATE_CONFIG
+from summary_stats import MasterSummaryStats
+
+# 数据处理阶段不区分爬取类别，统一归入该类别统计耗时
+METRICS_CATEGORY = '汇总'
+
+
+# 明确的金额字段
+AMOUNT_FIELDS = ('处罚金额', '罚款金额', '金额')
+
+# 合并各字段哈希时使用的乘数（64位奇数）
+DEDUP_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+# 合并输出（Excel报告、流式导出）的字段顺序 - 标题放在序号后面，删除"作出决定日期"
+MERGED_COLUMNS = [
+    '序号',
+    '标题', 
+    '当事人名称',
+    '主要违法违规行为',
+    '行政处罚依据',
+    '行政处罚内容',
+    '行政处罚决定书文号',
+    '作出决定机关',
+    '发布时间',  # 添加发布时间字段
+    '类别',
+    '抓取时间',
+    '详情链接'  # 只保留一个链接字段
+]
+
+# 合并输出的一条记录（另带调试用的原始序号），比字典占用的内存少得多
+MergedRecord = NamedTuple('MergedRecord', [(col, Any) for col in MERGED_COLUMNS + ['原始序号']])
 
 
 class DataProcessor:
@@ -51,6 +90,9 @@ class DataProcessor:
             '行政处罚依据', '行政处罚内容', '作出决定机关', '标题',
             '类别', '页码', '抓取时间', '详情链接'
         ]
+        
+        # 合并输出（Excel报告、流式导出）的字段顺序
+        self.merged_columns = list(MERGED_COLUMNS)
     
     def normalize_field_names(self, data: Dict) -> Dict:
         """标准化字段名称"""
@@ -73,17 +115,12 @@ class DataProcessor:
             cleaned_data = {}
             for key, value in data.items():
                 if isinstance(value, str):
-                    # 移除多余空白
-                    cleaned_value = re.sub(r'\s+', ' ', value).strip()
-                    
-                    # 清理特殊字符
-                    cleaned_value = cleaned_value.replace('\u3000', ' ')  # 全角空格
-                    cleaned_value = cleaned_value.replace('\xa0', ' ')    # 不间断空格
+                    # 移除多余空白（全角空格、不间断空格同样属于空白字符）
+                    cleaned_value = normalize_whitespace(value)
                     
                     # 只对特定的金额字段进行金额格式化，而不是所有包含"万元"的字段
                     # 排除"行政处罚内容"等需要保留完整信息的字段
-                    amount_fields = ['处罚金额', '罚款金额', '金额']  # 明确的金额字段
-                    if key in amount_fields and ('万元' in cleaned_value or '元' in cleaned_value):
+                    if key in AMOUNT_FIELDS and ('万元' in cleaned_value or '元' in cleaned_value):
                         cleaned_value = self.standardize_amount(cleaned_value)
                     
                     cleaned_data[key] = cleaned_value
@@ -156,9 +193,10 @@ class DataProcessor:
                             for field in ['标题', '详情链接', '抓取时间']:
                                 if field not in additional_cleaned and field in cleaned_item:
                                     additional_cleaned[field] = cleaned_item[field]
-                            processed_data.append(additional_cleaned)
+                            processed_data.append(string_table.intern_record(additional_cleaned))
                 
-                processed_data.append(cleaned_item)
+                # 清理会生成新的字符串对象，共用字段重新驻留
+                processed_data.append(string_table.intern_record(cleaned_item))
                 
             except Exception as e:
                 self.logger.error(f"处理数据项失败: {e}")
@@ -270,63 +308,26 @@ class DataProcessor:
             self.logger.error(f"生成Excel报告失败: {e}")
             return False
     
+    @stage_metrics.timed('excel_write', METRICS_CATEGORY)
     def write_excel_with_hyperlinks(self, df: pd.DataFrame, filename: str, 
                                    include_summary: bool, all_data: Dict, all_records_or_stats) -> bool:
-        """写入Excel文件，支持超链接。all_records_or_stats可以是记录列表或统计数据列表"""
+        """写入Excel文件，支持超链接。all_records_or_stats可以是记录列表或统计数据列表
+        
+        使用只写模式逐行写入，详情链接在写入时直接生成超链接，行数超过单表上限时续写到新工作表。
+        """
         try:
-            from openpyxl import Workbook
-            from openpyxl.utils.dataframe import dataframe_to_rows
-            from openpyxl.styles import Font
-            import openpyxl
-            
-            # 创建工作簿
-            wb = Workbook()
-            
-            # 删除默认工作表
-            if 'Sheet' in wb.sheetnames:
-                wb.remove(wb['Sheet'])
-            
-            # 创建主数据工作表
-            ws_main = wb.create_sheet('行政处罚信息')
-            
-            # 添加数据到工作表
-            for r in dataframe_to_rows(df, index=False, header=True):
-                ws_main.append(r)
-            
-            # 处理超链接（详情链接列）
-            link_col_idx = None
-            for idx, col_name in enumerate(df.columns, 1):
-                if col_name == '详情链接':
-                    link_col_idx = idx
-                    break
+            writer = StreamingExcelWriter(filename)
             
-            if link_col_idx:
-                self.logger.info(f"处理超链接，列索引: {link_col_idx}")
-                hyperlink_count = 0
-                
-                # 从第2行开始（第1行是表头）
-                for row_idx in range(2, len(df) + 2):
-                    cell = ws_main.cell(row=row_idx, column=link_col_idx)
-                    url = cell.value
-                    if url and isinstance(url, str) and url.startswith('http'):
-                        try:
-                            # 创建超链接
-                            cell.hyperlink = url
-                            cell.value = "查看详情"  # 显示友好的文本
-                            # 设置超链接样式
-                            cell.font = Font(color="0000FF", underline="single")
-                            hyperlink_count += 1
-                        except Exception as e:
-                            self.logger.debug(f"创建超链接失败: {e}")
-                
-                self.logger.info(f"成功创建 {hyperlink_count} 个超链接")
+            # 主数据工作表，详情链接列写为超链接
+            writer.write_table('行政处罚信息', list(df.columns), df.itertuples(index=False, name=None))
+            
+            if '详情链接' in df.columns:
+                self.logger.info(f"成功创建 {writer.hyperlink_count} 个超链接")
             else:
                 self.logger.warning("未找到详情链接列")
             
             # 创建统计工作表（如果需要）
             if include_summary:
-                ws_stats = wb.create_sheet('数据统计')
-                
                 # 检查all_records_or_stats的类型
                 if isinstance(all_records_or_stats, list) and all_records_or_stats:
                     # 如果是统计数据列表（用于总表）
@@ -341,11 +342,11 @@ class DataProcessor:
                     summary_data = self.generate_summary_stats(all_data, [])
                     summary_df = pd.DataFrame(summary_data)
                 
-                for r in dataframe_to_rows(summary_df, index=False, header=True):
-                    ws_stats.append(r)
+                writer.write_table('数据统计', list(summary_df.columns),
+                                   summary_df.itertuples(index=False, name=None), link_column=None)
             
             # 保存文件
-            wb.save(filename)
+            writer.save()
             self.logger.info(f"Excel文件保存成功: {filename}")
             return True
             
@@ -378,8 +379,12 @@ class DataProcessor:
     
     def update_master_excel(self, new_df: pd.DataFrame) -> bool:
         """更新总表Excel文件，确保格式与测试数据表一致"""
+        if MASTER_STORE_CONFIG['enabled'] and master_store.available:
+            return self.update_master_store(new_df)
+        
         try:
-            master_filename = 'excel_output/金融监管总局行政处罚信息_总表.xlsx'
+            master_filename = MASTER_STORE_CONFIG['excel_filename']
+            new_df = self.filter_near_duplicates(new_df)
             
             # 确保新数据的列顺序正确（与测试表一致）
             target_column_order = [
@@ -396,7 +401,7 @@ class DataProcessor:
             if os.path.exists(master_filename):
                 self.logger.info("加载现有总表数据...")
                 try:
-                    existing_df = pd.read_excel(master_filename, sheet_name='行政处罚信息')
+                    existing_df = read_excel_table(master_filename)
                     self.logger.info(f"现有总表记录数: {len(existing_df)}")
                     
                     # 确保现有数据也按照目标列顺序排列
@@ -410,7 +415,8 @@ class DataProcessor:
                 self.logger.info("创建新的总表...")
                 existing_df = pd.DataFrame()
             
-            # 记录更新前的记录数
+            # 记录更新前的总表标识和记录数
+            previous_fingerprint = self.master_fingerprint()
             before_count = len(existing_df) if len(existing_df) > 0 else 0
             
             # 合并数据并去重
@@ -447,6 +453,8 @@ class DataProcessor:
                 self.logger.info(f"总表更新成功: {master_filename}")
                 self.logger.info(f"总表当前记录数: {len(merged_df)}")
                 self.logger.info(f"本次新增记录: {new_records_count}")
+                self.update_known_records(new_df, previous_fingerprint)
+                self.update_near_duplicates(new_df)
                 return True
             else:
                 self.logger.error("总表更新失败")
@@ -456,6 +464,240 @@ class DataProcessor:
             self.logger.error(f"更新总表失败: {e}")
             return False
     
+    def update_master_store(self, new_df: pd.DataFrame) -> bool:
+        """更新总表数据源（Parquet只读写新数据所在的年月分区，SQLite只写入新记录）"""
+        try:
+            master_filename = MASTER_STORE_CONFIG['excel_filename']
+            
+            # 首次启用数据源时导入已有的总表Excel
+            if master_store.is_empty() and os.path.exists(master_filename):
+                self.logger.info("总表数据源为空，导入现有总表Excel...")
+                master_store.import_excel(master_filename, self)
+            
+            new_df = self.filter_near_duplicates(new_df)
+            previous_fingerprint = self.master_fingerprint()
+            new_records_count = master_store.upsert(new_df, self)
+            self.logger.info(f"总表数据源更新成功，本次新增记录: {new_records_count}")
+            self.update_known_records(new_df, previous_fingerprint)
+            self.update_near_duplicates(new_df)
+            
+            if MASTER_STORE_CONFIG['export_excel_on_update']:
+                return master_store.export_excel(master_filename, self, new_records_count)
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"更新总表数据源失败: {e}")
+            return False
+    
+    def known_record_keys(self, detail_url, title) -> List[str]:
+        """列表项或总表记录在已知记录索引中的键（详情链接、标题|标题中的决定书文号）"""
+        detail_url = '' if pd.isna(detail_url) else str(detail_url)
+        title = '' if pd.isna(title) else normalize_whitespace(str(title))
+        return record_keys(detail_url, title, self.extract_decision_number_from_title(title))
+    
+    def _dataframe_known_keys(self, df: pd.DataFrame):
+        urls = df['详情链接'] if '详情链接' in df.columns else [''] * len(df)
+        titles = df['标题'] if '标题' in df.columns else [''] * len(df)
+        for detail_url, title in zip(urls, titles):
+            yield from self.known_record_keys(detail_url, title)
+    
+    def is_known_item(self, item: Dict) -> bool:
+        """列表项是否已在总表中（抓取详情页之前判断）"""
+        return known_records.contains(self.known_record_keys(item.get('detail_url'), item.get('title')))
+    
+    def update_known_records(self, new_df: pd.DataFrame, previous_fingerprint: Optional[str] = None) -> None:
+        """将入库的记录加入已知记录索引（去重字段全部为空、不会入库的记录除外）
+        previous_fingerprint 为本次更新前的总表标识，与索引保存的不一致时由总表重新建立索引"""
+        try:
+            key_cols = [col for col in ['当事人名称', '行政处罚决定书文号', '作出决定机关'] if col in new_df.columns]
+            if key_cols:
+                new_df = new_df[self.dedup_hashes(new_df, key_cols) != 0]
+            
+            if known_records.built and previous_fingerprint and known_records.source == previous_fingerprint:
+                added = known_records.add(self._dataframe_known_keys(new_df))
+                known_records.source = self.master_fingerprint()
+                known_records.save()
+                self.logger.info(f"已知记录索引新增 {added} 个键")
+            else:
+                self.prepare_known_records()
+        except Exception as e:
+            self.logger.warning(f"更新已知记录索引失败: {e}")
+    
+    def prepare_known_records(self) -> bool:
+        """索引尚未建立或与总表不一致时由总表数据源（或总表Excel）重新建立，返回索引是否可用"""
+        if not known_records.enabled:
+            return False
+        
+        try:
+            fingerprint = self.master_fingerprint()
+            if known_records.built:
+                if known_records.source == fingerprint:
+                    return True
+                self.logger.info("总表已变化（数据源、位置或记录数与索引不一致），重新建立已知记录索引")
+            
+            master_df = self.read_master_records()
+            if master_df is None:
+                self.logger.info("总表尚无数据，暂不建立已知记录索引")
+                return False
+            
+            known_records.rebuild(self._dataframe_known_keys(master_df))
+            known_records.source = fingerprint
+            known_records.save()
+            self.logger.info(f"已由总表 {len(master_df)} 条记录建立已知记录索引（{len(known_records)} 个键）")
+            return True
+        except Exception as e:
+            self.logger.warning(f"建立已知记录索引失败: {e}")
+            return False
+    
+    def master_fingerprint(self) -> Optional[str]:
+        """当前总表的标识：总表数据源为类型、位置和记录数，总表Excel为路径、大小和修改时间；总表尚无数据时返回None"""
+        if MASTER_STORE_CONFIG['enabled'] and master_store.available and not master_store.is_empty():
+            return master_store.fingerprint()
+        
+        master_filename = MASTER_STORE_CONFIG['excel_filename']
+        if not os.path.exists(master_filename):
+            return None
+        stat = os.stat(master_filename)
+        return f'excel|{os.path.abspath(master_filename)}|{stat.st_size}|{stat.st_mtime_ns}'
+    
+    def read_master_records(self) -> Optional[pd.DataFrame]:
+        """读取总表全部记录（总表数据源，未启用时读取总表Excel），总表尚无数据时返回None"""
+        if MASTER_STORE_CONFIG['enabled'] and master_store.available and not master_store.is_empty():
+            return master_store.read_all()
+        
+        master_filename = MASTER_STORE_CONFIG['excel_filename']
+        if not os.path.exists(master_filename):
+            return None
+        master_df = read_excel_table(master_filename)
+        if '详情链接' in master_df.columns:
+            master_df['详情链接'] = read_excel_hyperlinks(master_filename, master_df['详情链接'])
+        return master_df
+    
+    def _primary_dedup_hashes(self, df: pd.DataFrame) -> np.ndarray:
+        key_cols = [col for col in ['当事人名称', '行政处罚决定书文号', '作出决定机关'] if col in df.columns]
+        if not key_cols:
+            return np.zeros(len(df), dtype=np.uint64)
+        return self.dedup_hashes(df, key_cols)
+    
+    def _near_duplicate_rows(self, df: pd.DataFrame):
+        """逐条计算记录的MinHash签名，产生 (位置, 签名, 当事人摘要, 去重哈希, 标签)，缺少文本、当事人或去重键的记录跳过"""
+        for position, (record, dedup_hash) in enumerate(zip(df.to_dict('records'), self._primary_dedup_hashes(df))):
+            signature = near_duplicates.record_signature(record)
+            party = party_digest(record.get('当事人名称'))
+            if signature is None or not party or not dedup_hash:
+                continue
+            label = f"{record.get('标题') or ''}（{record.get('当事人名称') or ''}）"
+            yield position, signature, party, int(dedup_hash), label
+    
+    def _near_duplicate_entries(self, df: pd.DataFrame) -> Tuple[List, List, List, List]:
+        """计算记录的MinHash签名，返回 (签名, 当事人摘要, 去重哈希, 标签)，缺少文本、当事人或去重键的记录跳过"""
+        signatures, parties, dedup_hashes, labels = [], [], [], []
+        for _, signature, party, dedup_hash, label in self._near_duplicate_rows(df):
+            signatures.append(signature)
+            parties.append(party)
+            dedup_hashes.append(dedup_hash)
+            labels.append(label)
+        return signatures, parties, dedup_hashes, labels
+    
+    def prepare_near_duplicates(self) -> bool:
+        """签名尚未建立时由总表建立，返回是否可用"""
+        if not near_duplicates.enabled:
+            return False
+        if near_duplicates.built and len(near_duplicates) > 0:
+            return True
+        
+        master_df = self.read_master_records()
+        if master_df is None:
+            return False
+        near_duplicates.rebuild()
+        added = near_duplicates.add(*self._near_duplicate_entries(master_df))
+        near_duplicates.save()
+        self.logger.info(f"已由总表 {len(master_df)} 条记录建立近似重复签名（{added} 条）")
+        return True
+    
+    def filter_near_duplicates(self, new_df: pd.DataFrame) -> pd.DataFrame:
+        """检查新记录是否与总表或本批先前的记录近似重复
+        
+        action 为 flag 时只记录日志，为 merge 时丢弃新记录、保留已有记录。
+        """
+        if not near_duplicates.enabled or len(new_df) == 0:
+            return new_df
+        
+        try:
+            self.prepare_near_duplicates()
+            merge = NEAR_DUPLICATE_CONFIG['action'] == 'merge'
+            rows = list(self._near_duplicate_rows(new_df))
+            if not rows:
+                return new_df
+            
+            # 本批记录一次全部加入批内索引（分段只建立一次），逐条查找时只与本批中之前保留的记录比较
+            _, signatures, parties, dedup_hashes, labels = zip(*rows)
+            batch_index = near_duplicates.empty_copy()
+            batch_index.add(list(signatures), list(parties), list(dedup_hashes), list(labels), unique_keys=False)
+            active = np.zeros(len(rows), dtype=bool)
+            
+            keep = np.ones(len(new_df), dtype=bool)
+            flagged = 0
+            for batch_row, (position, signature, party, dedup_hash, label) in enumerate(rows):
+                match = (near_duplicates.find(signature, party, dedup_hash)
+                         or batch_index.find(signature, party, dedup_hash, active))
+                if match:
+                    flagged += 1
+                    self.logger.warning(f"疑似重复记录（相似度 {match['similarity']:.2f}）: {label} ≈ {match['label']}")
+                    if merge:
+                        keep[position] = False
+                        continue
+                active[batch_row] = True
+            
+            if flagged:
+                action_text = "已丢弃新记录" if merge else "仅标记，未删除"
+                self.logger.info(f"近似重复检测: 发现 {flagged} 条疑似重复记录（{action_text}）")
+            if merge and not keep.all():
+                self.remember_dropped_records(new_df[~keep])
+            return new_df[keep].reset_index(drop=True) if merge else new_df
+            
+        except Exception as e:
+            self.logger.warning(f"近似重复检测失败: {e}")
+            return new_df
+    
+    def remember_dropped_records(self, dropped_df: pd.DataFrame) -> None:
+        """丢弃的近似重复记录加入已知记录索引，之后的日/月更新不再重复抓取和比较
+        （这些记录不在总表中，由总表重新建立索引后会再抓取一次、再次丢弃并加入）"""
+        if not known_records.enabled or not known_records.built:
+            return
+        try:
+            added = known_records.add(self._dataframe_known_keys(dropped_df))
+            known_records.save()
+            self.logger.info(f"已知记录索引新增 {added} 个键（丢弃的近似重复记录）")
+        except Exception as e:
+            self.logger.warning(f"丢弃的近似重复记录加入已知记录索引失败: {e}")
+    
+    def update_near_duplicates(self, new_df: pd.DataFrame) -> None:
+        """将入库的记录加入近似重复签名"""
+        if not near_duplicates.enabled:
+            return
+        try:
+            if near_duplicates.built and len(near_duplicates) > 0:
+                added = near_duplicates.add(*self._near_duplicate_entries(new_df))
+                near_duplicates.save()
+                self.logger.info(f"近似重复签名新增 {added} 条")
+            else:
+                self.prepare_near_duplicates()
+        except Exception as e:
+            self.logger.warning(f"更新近似重复签名失败: {e}")
+    
+    def export_master_excel(self, filename: str = None) -> bool:
+        """由总表数据源导出总表Excel"""
+        if not master_store.available:
+            self.logger.error(f"总表数据源（{master_store.backend}）所需的依赖未安装，无法读取总表")
+            return False
+        try:
+            return master_store.export_excel(filename or MASTER_STORE_CONFIG['excel_filename'], self)
+        except Exception as e:
+            self.logger.error(f"导出总表Excel失败: {e}")
+            return False
+    
+    @stage_metrics.timed('dedup', METRICS_CATEGORY)
     def deduplicate_records(self, df: pd.DataFrame) -> pd.DataFrame:
         """按业务字段组合去重，避免误删不同当事人的记录"""
         try:
@@ -474,17 +716,16 @@ class DataProcessor:
             if len(available_primary_cols) >= 2:  # 至少有2个关键字段
                 self.logger.info(f"使用主要业务字段去重: {available_primary_cols}")
                 
-                # 创建去重键
-                df['_dedup_key'] = df[available_primary_cols].fillna('').astype(str).agg('|'.join, axis=1)
-                
-                # 去除空的去重键（所有字段都为空的记录）
-                mask_non_empty = df['_dedup_key'].str.replace('|', '').str.strip() != ''
-                
-                # 按去重键去重，保留第一个
-                df_dedup = df[mask_non_empty].drop_duplicates(subset=['_dedup_key'], keep='first')
+                # 总表数据源保存了主要字段的去重哈希，历史记录无需重新计算
+                if available_primary_cols == primary_dedup_cols and DEDUP_HASH_COLUMN in df.columns:
+                    if df[DEDUP_HASH_COLUMN].dtype != np.uint64:
+                        df[DEDUP_HASH_COLUMN] = self.dedup_hashes(df, available_primary_cols)
+                    hashes = df[DEDUP_HASH_COLUMN].to_numpy()
+                else:
+                    hashes = self.dedup_hashes(df, available_primary_cols)
                 
-                # 删除临时列
-                df_dedup = df_dedup.drop('_dedup_key', axis=1)
+                # 去除空键记录，按去重键保留第一个
+                df_dedup = df[self._first_occurrence_mask(hashes)]
                 
             else:
                 # 降级方案：使用当事人名称 + 主要违法违规行为 + 行政处罚内容
@@ -494,17 +735,8 @@ class DataProcessor:
                 if available_fallback_cols:
                     self.logger.info(f"使用降级去重字段: {available_fallback_cols}")
                     
-                    # 创建去重键
-                    df['_dedup_key'] = df[available_fallback_cols].fillna('').astype(str).agg('|'.join, axis=1)
-                    
-                    # 去除空的去重键
-                    mask_non_empty = df['_dedup_key'].str.replace('|', '').str.strip() != ''
-                    
-                    # 按去重键去重
-                    df_dedup = df[mask_non_empty].drop_duplicates(subset=['_dedup_key'], keep='first')
-                    
-                    # 删除临时列
-                    df_dedup = df_dedup.drop('_dedup_key', axis=1)
+                    hashes = self.dedup_hashes(df, available_fallback_cols)
+                    df_dedup = df[self._first_occurrence_mask(hashes)]
                     
                 else:
                     # 最后降级方案：不去重，只是移除完全空的记录
@@ -525,59 +757,65 @@ class DataProcessor:
             self.logger.error(f"去重处理失败: {e}")
             return df
     
+    def dedup_hashes(self, df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+        """按列向量化计算去重键的64位哈希，字段全部为空（或只有"|"）的记录为0"""
+        hashes = np.zeros(len(df), dtype=np.uint64)
+        non_empty = np.zeros(len(df), dtype=bool)
+        for col in columns:
+            values = text_values(df[col])
+            column_hashes = pd.util.hash_array(values.to_numpy(dtype=object), categorize=False)
+            hashes = hashes * DEDUP_HASH_MULTIPLIER + column_hashes
+            non_empty |= (values.str.replace('|', '', regex=False).str.strip() != '').to_numpy()
+        hashes[~non_empty] = 0
+        return hashes
+    
+    def _first_occurrence_mask(self, hashes: np.ndarray) -> np.ndarray:
+        """空键（哈希为0）的记录不保留，其余每个去重键保留第一条"""
+        return (hashes != 0) & ~pd.Index(hashes).duplicated(keep='first')
+    
+    def to_merged_record(self, record: Dict) -> Dict:
+        """将单条记录整理为合并输出的字段和顺序"""
+        cleaned_record = {}
+        
+        # 去重处理：优先使用'详情链接'，如果没有则使用'detail_url'
+        detail_url = record.get('详情链接') or record.get('detail_url', '')
+        
+        # 按标准顺序处理字段
+        for col in self.merged_columns:
+            if col == '详情链接':
+                cleaned_record[col] = detail_url
+            elif col == '标题':
+                # 优先使用'标题'，如果没有则使用'title'
+                cleaned_record[col] = record.get('标题') or record.get('title', '')
+            else:
+                cleaned_record[col] = record.get(col, '')
+        
+        # 特殊处理：从标题提取行政处罚决定书文号（如果该字段为空）
+        if not cleaned_record.get('行政处罚决定书文号') and cleaned_record.get('标题'):
+            extracted_number = self.extract_decision_number_from_title(cleaned_record['标题'])
+            if extracted_number:
+                cleaned_record['行政处罚决定书文号'] = extracted_number
+        
+        return cleaned_record
+    
+    @stage_metrics.timed('merge_dataframe', METRICS_CATEGORY)
     def create_merged_dataframe(self, all_records: List[Dict]) -> pd.DataFrame:
         """创建合并的DataFrame，优化列顺序和字段"""
         try:
             if not all_records:
                 return pd.DataFrame()
             
-            # 定义标准字段顺序 - 标题放在序号后面，删除"作出决定日期"
-            standard_columns = [
-                '序号',
-                '标题', 
-                '当事人名称',
-                '主要违法违规行为',
-                '行政处罚依据',
-                '行政处罚内容',
-                '行政处罚决定书文号',
-                '作出决定机关',
-                '发布时间',  # 添加发布时间字段
-                '类别',
-                '抓取时间',
-                '详情链接'  # 只保留一个链接字段
-            ]
+            standard_columns = self.merged_columns
             
-            # 清理和标准化数据
-            cleaned_records = []
-            for record in all_records:
-                cleaned_record = {}
-                
-                # 去重处理：优先使用'详情链接'，如果没有则使用'detail_url'
-                detail_url = record.get('详情链接') or record.get('detail_url', '')
-                
-                # 按标准顺序处理字段
-                for col in standard_columns:
-                    if col == '详情链接':
-                        cleaned_record[col] = detail_url
-                    elif col == '标题':
-                        # 优先使用'标题'，如果没有则使用'title'
-                        cleaned_record[col] = record.get('标题') or record.get('title', '')
-                    else:
-                        cleaned_record[col] = record.get(col, '')
-                
-                # 特殊处理：从标题提取行政处罚决定书文号（如果该字段为空）
-                if not cleaned_record.get('行政处罚决定书文号') and cleaned_record.get('标题'):
-                    extracted_number = self.extract_decision_number_from_title(cleaned_record['标题'])
-                    if extracted_number:
-                        cleaned_record['行政处罚决定书文号'] = extracted_number
-                
-                # 暂时保留原始序号用于调试
-                cleaned_record['原始序号'] = record.get('序号', '')
-                
-                cleaned_records.append(cleaned_record)
+            # 清理和标准化数据，整理为紧凑的元组记录（暂时保留原始序号用于调试）
+            cleaned_records = [
+                MergedRecord(**self.to_merged_record(record), 原始序号=record.get('序号', ''))
+                for record in all_records
+            ]
             
             # 创建DataFrame
-            df = pd.DataFrame(cleaned_records, columns=standard_columns + ['原始序号'])
+            df = pd.DataFrame(cleaned_records, columns=MergedRecord._fields)
+            del cleaned_records
             
             # 数据后处理
             df = df.fillna('')  # 填充空值
@@ -595,6 +833,9 @@ class DataProcessor:
             # 确保列顺序正确
             df = df[standard_columns]
             
+            # 低基数列转为分类类型，文本列转为Arrow字符串
+            df = optimize_dtypes(df)
+            
             self.logger.info(f"合并DataFrame创建成功，共 {len(df)} 行 {len(df.columns)} 列，按发布时间降序排列")
             return df
             
@@ -602,6 +843,7 @@ class DataProcessor:
             self.logger.error(f"创建合并DataFrame失败: {e}")
             return pd.DataFrame()
     
+    @stage_metrics.timed('sort', METRICS_CATEGORY)
     def sort_by_publish_time(self, df: pd.DataFrame) -> pd.DataFrame:
         """按发布时间降序排列"""
         try:
@@ -618,38 +860,17 @@ class DataProcessor:
             if available_time_col:
                 self.logger.info(f"使用 {available_time_col} 字段进行排序")
                 
-                # 转换时间格式并排序
-                def parse_time(time_str):
-                    if not time_str or pd.isna(time_str):
-                        return pd.Timestamp.min  # 空值排到最后
-                    
-                    time_str = str(time_str).strip()
-                    
-                    # 尝试多种时间格式
-                    formats = [
-                        '%Y-%m-%d %H:%M:%S',  # 2024-01-15 10:30:00
-                        '%Y-%m-%d',           # 2024-01-15
-                        '%Y/%m/%d',           # 2024/01/15
-                        '%Y年%m月%d日',        # 2024年01月15日
-                    ]
-                    
-                    for fmt in formats:
-                        try:
-                            return pd.to_datetime(time_str, format=fmt)
-                        except:
-                            continue
-                    
-                    # 如果都不匹配，尝试自动解析
-                    try:
-                        return pd.to_datetime(time_str)
-                    except:
-                        return pd.Timestamp.min
+                # 创建排序键：总表数据源已缓存解析好的发布时间列时直接使用，否则整列向量化解析
+                if available_time_col == '发布时间' and PUBLISH_TS_COLUMN in df.columns:
+                    sort_time = pd.to_datetime(df[PUBLISH_TS_COLUMN], errors='coerce')
+                else:
+                    sort_time = parse_publish_times(df[available_time_col])
                 
-                # 创建排序键
-                df['_sort_time'] = df[available_time_col].apply(parse_time)
+                # 无法解析的时间排到最后
+                df['_sort_time'] = sort_time.fillna(pd.Timestamp.min)
                 
                 # 按时间降序排列 (最新的在前面)
-                df = df.sort_values('_sort_time', ascending=False)
+                df = df.sort_values('_sort_time', ascending=False, kind='stable')
                 
                 # 删除临时排序列
                 df = df.drop('_sort_time', axis=1)
@@ -703,9 +924,10 @@ class DataProcessor:
         try:
             summary_data = []
             
-            # 各分类统计
+            # 各分类统计（一次遍历统计全部类别）
+            category_counts = Counter(record.get('类别') for record in all_records)
             for category, raw_data in all_data.items():
-                processed_count = len([r for r in all_records if r.get('类别') == category])
+                processed_count = category_counts[category]
                 summary_data.append({
                     '分类': category,
                     '记录数': processed_count,
@@ -855,55 +1077,7 @@ class DataProcessor:
     def generate_master_summary_stats(self, merged_df: pd.DataFrame, new_records_count: int) -> List[Dict]:
         """生成总表的统计数据，包含本月更新条数"""
         try:
-            from datetime import datetime
-            import calendar
-            
-            current_time = datetime.now()
-            current_month = current_time.strftime('%Y年%m月')
-            
-            summary_data = []
-            
-            # 分类统计
-            if '类别' in merged_df.columns:
-                category_stats = merged_df['类别'].value_counts()
-                for category, count in category_stats.items():
-                    summary_data.append({
-                        '分类': category,
-                        '记录数': int(count),
-                        '最后更新': current_time.strftime('%Y-%m-%d %H:%M:%S')
-                    })
-            
-            # 总计行
-            summary_data.append({
-                '分类': '总计',
-                '记录数': len(merged_df),
-                '最后更新': current_time.strftime('%Y-%m-%d %H:%M:%S')
-            })
-            
-            # 本月更新条数
-            summary_data.append({
-                '分类': f'{current_month}新增',
-                '记录数': new_records_count,
-                '最后更新': current_time.strftime('%Y-%m-%d %H:%M:%S')
-            })
-            
-            # 数据质量统计
-            if len(merged_df) > 0:
-                # 统计完整性
-                required_fields = ['当事人名称', '行政处罚内容', '作出决定机关']
-                complete_records = 0
-                
-                for _, row in merged_df.iterrows():
-                    if all(row.get(field, '') for field in required_fields):
-                        complete_records += 1
-                
-                summary_data.append({
-                    '分类': '数据完整记录',
-                    '记录数': complete_records,
-                    '最后更新': f'完整性: {complete_records/len(merged_df)*100:.1f}%'
-                })
-            
-            return summary_data
+            return MasterSummaryStats().add(merged_df).rows(new_records_count)
             
         except Exception as e:
             self.logger.error(f"生成总表统计失败: {e}")
@@ -0,0 +1,118 @@
+"""
+流式Excel写入模块 - openpyxl 只写模式
+行数据逐行写入临时文件，不在内存中构建完整的单元格对象，导出耗时和内存与行数成线性关系且内存占用平稳。
+详情链接在写入时直接生成超链接单元格，所有超链接共用同一个字体样式。
+单个工作表超过行数上限时自动续写到新工作表（行政处罚信息_2、行政处罚信息_3 ...），每个工作表都带表头；
+读取时用 read_excel_table 把续写的各工作表按顺序合并。
+"""
+
+import os
+import re
+import math
+from typing import Iterable, List, Sequence
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+# 检测exe模式并导入相应配置
+if os.environ.get('NFRA_EXE_MODE') == '1':
+    # EXE模式：使用exe专用配置
+    from config_exe import EXCEL_EXPORT_CONFIG
+else:
+    # 正常模式：使用标准配置
+    from config import EXCEL_EXPORT_CONFIG
+
+
+# 超链接单元格显示的文本
+LINK_TEXT = "查看详情"
+
+
+def split_sheet_names(sheet_names: Sequence[str], sheet_name: str = '行政处罚信息') -> List[str]:
+    """工作簿中 sheet_name 及超过行数上限后续写的工作表（sheet_name_2、sheet_name_3 ...），按续写顺序排列"""
+    pattern = re.compile(rf'{re.escape(sheet_name)}(?:_(\d+))?')
+    matched = []
+    for name in sheet_names:
+        match = pattern.fullmatch(name)
+        if match:
+            matched.append((int(match.group(1) or 1), name))
+    return [name for _, name in sorted(matched)]
+
+
+def read_excel_table(filename: str, sheet_name: str = '行政处罚信息') -> pd.DataFrame:
+    """读取一张表，续写到多个工作表时按顺序合并为一个 DataFrame"""
+    with pd.ExcelFile(filename) as excel_file:
+        names = split_sheet_names(excel_file.sheet_names, sheet_name)
+        if not names:
+            raise ValueError(f"工作表 {sheet_name} 不存在: {filename}")
+        frames = [excel_file.parse(name) for name in names]
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+
+class StreamingExcelWriter:
+    """只写模式工作簿：按表逐行追加，详情链接列写为超链接"""
+
+    def __init__(self, filename: str, max_rows_per_sheet: int = None):
+        self.filename = filename
+        self.max_rows_per_sheet = max_rows_per_sheet or EXCEL_EXPORT_CONFIG['max_rows_per_sheet']
+        self.hyperlink_count = 0
+        self._workbook = Workbook(write_only=True)
+        self._link_font = Font(color="0000FF", underline="single")
+        self._sheet = None
+        self._saved = False
+
+    def begin_table(self, sheet_name: str, columns: List[str], link_column: str = '详情链接') -> None:
+        """开始一张新表（新工作表），之后的 append_row 写入该表"""
+        self._sheet_name = sheet_name
+        self._columns = list(columns)
+        self._link_index = self._columns.index(link_column) if link_column in self._columns else None
+        self._chunk = 0
+        self._new_sheet()
+
+    def _new_sheet(self) -> None:
+        self._chunk += 1
+        title = self._sheet_name if self._chunk == 1 else f'{self._sheet_name}_{self._chunk}'
+        self._sheet = self._workbook.create_sheet(title)
+        self._sheet.append(self._columns)
+        self._sheet_rows = 0
+
+    def append_row(self, values: Sequence) -> None:
+        """追加一行，values 与表头一一对应"""
+        if self._sheet_rows >= self.max_rows_per_sheet:
+            self._new_sheet()
+
+        row = []
+        for index, value in enumerate(values):
+            if isinstance(value, float) and math.isnan(value):
+                value = None
+            elif index == self._link_index and isinstance(value, str) and value.startswith('http'):
+                cell = WriteOnlyCell(self._sheet, value=LINK_TEXT)
+                cell.hyperlink = value
+                cell.font = self._link_font
+                value = cell
+                self.hyperlink_count += 1
+            row.append(value)
+        self._sheet.append(row)
+        self._sheet_rows += 1
+
+    def write_table(self, sheet_name: str, columns: List[str], rows: Iterable[Sequence],
+                    link_column: str = '详情链接') -> int:
+        """写入一整张表，返回写入的行数"""
+        self.begin_table(sheet_name, columns, link_column)
+        count = 0
+        for values in rows:
+            self.append_row(values)
+            count += 1
+        return count
+
+    def save(self) -> None:
+        """保存工作簿（只写模式的工作簿只能保存一次）"""
+        if not self._saved:
+            self._saved = True
+            directory = os.path.dirname(self.filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._workbook.save(self.filename)
@@ -0,0 +1,111 @@
+"""
+合并单元格网格解析模块
+按行顺序一次性展开 rowspan/colspan：每行使用定长列表作为网格行，跨行单元格向后续行传播，
+行内网格定型后立即产出该行数据并释放，内存只与尚未结束的跨行范围有关。
+空单元格从上方覆盖本行的合并单元格继承内容，每列维护一个单调栈，
+查找"最近的覆盖单元格"为均摊 O(1)，整体耗时与单元格数量成线性关系。
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils import clean_text
+
+
+def row_has_spans(rows: list) -> bool:
+    """一次遍历单元格属性，判断是否存在 rowspan/colspan 大于1 的单元格"""
+    for row in rows:
+        for cell in row.find_all(['td', 'th']):
+            rowspan = cell.get('rowspan')
+            colspan = cell.get('colspan')
+            if (rowspan and int(rowspan) > 1) or (colspan and int(colspan) > 1):
+                return True
+    return False
+
+
+class _GridRow:
+    """网格中的一行：每列存放 (文本, rowspan)，并记录各列首次写入的先后顺序"""
+
+    __slots__ = ('cells', 'order')
+
+    def __init__(self, width: int):
+        self.cells: List[Optional[Tuple[str, int]]] = [None] * width
+        self.order: List[int] = []
+
+    def put(self, col: int, value: Tuple[str, int]) -> None:
+        if self.cells[col] is None:
+            self.order.append(col)
+        self.cells[col] = value
+
+
+def resolve_merged_rows(headers: List[str], data_rows: list) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """展开合并单元格，逐行产出 (行下标, {表头: 文本})
+
+    行下标从0开始；最后一行的 rowspan 超出表格时，超出部分同样作为数据行产出。
+    """
+    width = len(headers)
+    pending: Dict[int, _GridRow] = {}
+    # 每列的覆盖栈：(所在行, 覆盖到的行(不含), 文本)，覆盖范围自底向顶严格递减
+    column_stacks: List[List[Tuple[int, int, str]]] = [[] for _ in range(width)]
+
+    def grid_row(row_idx: int) -> _GridRow:
+        row = pending.get(row_idx)
+        if row is None:
+            row = pending[row_idx] = _GridRow(width)
+        return row
+
+    row_idx = 0
+    total_rows = len(data_rows)
+    while row_idx < total_rows or pending:
+        if row_idx < total_rows:
+            current = grid_row(row_idx)
+            col_idx = 0
+
+            for cell in data_rows[row_idx].find_all(['td', 'th']):
+                # 跳过被合并单元格占用的位置
+                while col_idx < width and current.cells[col_idx] is not None:
+                    col_idx += 1
+
+                cell_text = clean_text(cell.get_text())
+                rowspan = int(cell.get('rowspan', 1))
+                colspan = int(cell.get('colspan', 1))
+
+                # 在网格中标记这个单元格及其合并范围（超出表头范围的列忽略）
+                value = (cell_text, rowspan)
+                for r in range(row_idx, row_idx + rowspan):
+                    target = current if r == row_idx else grid_row(r)
+                    for c in range(col_idx, min(col_idx + colspan, width)):
+                        target.put(c, value)
+
+                col_idx += colspan
+
+        # 本行之前的所有行都已放置完毕，本行网格已定型
+        current = pending.pop(row_idx, None)
+        if current is not None and current.order:
+            row_data = {}
+            for col in current.order:
+                row_data[headers[col]] = current.cells[col][0]
+
+            # 对于合并单元格，需要从前面的行继承数据
+            if row_idx > 0:
+                for col, header in enumerate(headers):
+                    if header in row_data and row_data[header]:
+                        continue
+                    stack = column_stacks[col]
+                    # 覆盖范围不超过本行的单元格对之后的行也无效，直接出栈
+                    while stack and stack[-1][1] <= row_idx:
+                        stack.pop()
+                    if stack:
+                        row_data[header] = stack[-1][2]
+
+            yield row_idx, row_data
+
+            # 本行各列入栈：被新单元格支配（行更靠前且覆盖范围不更远）的旧单元格出栈
+            for col in current.order:
+                text, rowspan = current.cells[col]
+                reach = row_idx + rowspan
+                stack = column_stacks[col]
+                while stack and stack[-1][1] <= reach:
+                    stack.pop()
+                stack.append((row_idx, reach, text))
+
+        row_idx += 1
@@ -0,0 +1,157 @@
+"""
+表头字段映射模块 - 所有表格解析器共用的 表头/左列名称 → 标准字段 映射规则
+同义词规则集中在本模块维护，并编译为 Aho-Corasick 自动机：
+每个表头只扫描一次即可得到其包含的全部关键词，再按规则优先级确定字段。
+同一表头的映射结果会被缓存，整张表先解析出"列→字段"计划，逐行套用时只需按列下标取值。
+"""
+
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+
+# 判定横向表格的表头关键词（第一行任一单元格包含其一即为表头行）
+HEADER_KEYWORDS = ['序号', '当事人', '违法', '处罚', '机关']
+
+# 横向表格的表头包含匹配规则：(字段, 同义词)，按顺序优先
+HORIZONTAL_HEADER_RULES = [
+    ('序号', ['序号']),
+    ('当事人名称', ['当事人', '被处罚当事人']),
+    ('主要违法违规行为', ['违法违规', '主要违法违规', '违法行为', '违法违规事实', '主要违法违规事实']),
+    ('行政处罚内容', ['处罚内容', '行政处罚', '处罚决定', '行政处罚内容', '行政处罚决定']),
+    ('作出决定机关', ['决定机关', '机关名称', '作出决定机关', '作出处罚决定的机关', '作出处罚决定的机关名称']),
+    ('作出决定日期', ['决定日期', '作出处罚决定的日期', '处罚决定日期']),
+    ('行政处罚依据', ['处罚依据', '行政处罚依据']),
+    ('行政处罚决定书文号', ['决定书文号', '行政处罚决定书文号']),
+]
+
+# 键值对表格左列的精确匹配规则：(字段, 名称)，按顺序优先
+KEY_VALUE_EXACT_RULES = [
+    ('序号', ['序号']),
+    ('当事人名称', ['当事人名称', '被处罚当事人', '当事人']),
+    ('主要违法违规行为', ['主要违法违规事实', '主要违法违规行为', '违法违规事实', '违法违规行为', '违法行为']),
+    ('行政处罚依据', ['行政处罚依据', '处罚依据']),
+    ('行政处罚内容', ['行政处罚决定', '处罚决定']),
+    ('行政处罚内容', ['行政处罚内容', '处罚内容']),
+    ('作出决定机关', ['作出处罚决定的机关名称', '作出决定机关', '决定机关', '机关名称', '作出处罚决定的机关']),
+    ('作出决定日期', ['作出处罚决定的日期', '作出决定日期', '决定日期', '处罚决定日期']),
+    ('行政处罚决定书文号', ['行政处罚决定书文号', '决定书文号']),
+]
+
+# 键值对表格左列的包含匹配规则（精确匹配失败后的后备）：(字段, 同义词, 排除词)，按顺序优先
+KEY_VALUE_CONTAINS_RULES = [
+    ('序号', ['序号'], []),
+    ('当事人名称', ['当事人', '被处罚当事人'], []),
+    ('主要违法违规行为', ['违法违规事实', '违法违规行为', '主要违法违规', '违法行为'], []),
+    ('行政处罚依据', ['行政处罚依据', '处罚依据'], []),
+    ('行政处罚内容', ['行政处罚决定'], ['机关', '日期']),
+    ('行政处罚内容', ['处罚内容'], []),
+    ('作出决定机关', ['作出处罚决定的机关', '决定机关', '机关名称'], ['日期']),
+    ('作出决定日期', ['作出处罚决定的日期', '决定日期', '处罚决定日期'], []),
+    ('行政处罚决定书文号', ['决定书文号', '行政处罚决定书文号'], []),
+]
+
+
+class KeywordAutomaton:
+    """Aho-Corasick 多模式匹配自动机：一次扫描找出文本中出现的所有关键词"""
+
+    def __init__(self, keywords):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[FrozenSet[str]] = [frozenset()]
+
+        for keyword in keywords:
+            self._insert(keyword)
+        self._build_failure_links()
+
+    def _insert(self, keyword: str) -> None:
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(frozenset())
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state] = self._output[state] | {keyword}
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] | self._output[self._fail[next_state]]
+
+    def find_all(self, text: str) -> FrozenSet[str]:
+        """返回文本中出现过的全部关键词"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return frozenset(found)
+
+
+class HeaderMatcher:
+    """表头字段映射器：精确匹配规则 + 带排除词的包含匹配规则，均按定义顺序确定优先级"""
+
+    def __init__(self, contains_rules: Sequence[Tuple[str, Sequence[str], Sequence[str]]],
+                 exact_rules: Sequence[Tuple[str, Sequence[str]]] = ()):
+        self._exact: Dict[str, str] = {}
+        for field, names in exact_rules:
+            for name in names:
+                # 同一名称出现在多条规则中时，以先定义的规则为准
+                self._exact.setdefault(name, field)
+
+        self._contains_rules = [
+            (field, frozenset(keywords), frozenset(excludes))
+            for field, keywords, excludes in contains_rules
+        ]
+        all_keywords = set()
+        for _, keywords, excludes in self._contains_rules:
+            all_keywords |= keywords | excludes
+        self._automaton = KeywordAutomaton(sorted(all_keywords))
+
+        self.resolve = lru_cache(maxsize=4096)(self._resolve)
+
+    def _resolve(self, header: str) -> Optional[str]:
+        """表头对应的标准字段，无匹配规则时返回None"""
+        field = self._exact.get(header)
+        if field is not None:
+            return field
+
+        found = self._automaton.find_all(header)
+        if not found:
+            return None
+        for field, keywords, excludes in self._contains_rules:
+            if keywords & found and not excludes & found:
+                return field
+        return None
+
+    def field_for(self, header: str) -> str:
+        """表头对应的字段名，无匹配规则时保留原表头"""
+        return self.resolve(header) or header
+
+    def plan(self, headers: Sequence[str]) -> List[str]:
+        """将整行表头解析为"列下标→字段名"计划"""
+        return [self.field_for(header) for header in headers]
+
+
+# 横向多列表格（单行、多行、合并单元格）共用
+horizontal_matcher = HeaderMatcher(
+    [(field, keywords, []) for field, keywords in HORIZONTAL_HEADER_RULES]
+)
+
+# 键值对表格左列
+key_value_matcher = HeaderMatcher(KEY_VALUE_CONTAINS_RULES, KEY_VALUE_EXACT_RULES)
@@ -0,0 +1,151 @@
+"""
+详情页表格定位模块
+详情页源码约350–380KB，而真正需要的只有其中的处罚信息表格。
+先用 lxml 的 XPath 定位目标表格，再只把表格片段交给 html.parser 构建 BeautifulSoup 对象，
+表格内部的解析行为与整页 html.parser 解析完全一致，但整页解析的开销降低数倍。
+发布时间从同一次解析得到的文档中提取，不再通过浏览器逐个查询元素。
+"""
+
+import os
+import re
+import logging
+from typing import List, Tuple
+
+from bs4 import BeautifulSoup
+
+# 检测exe模式并导入相应配置
+if os.environ.get('NFRA_EXE_MODE') == '1':
+    # EXE模式：使用exe专用配置
+    from config_exe import HTML_PARSE_CONFIG
+else:
+    # 正常模式：使用标准配置
+    from config import HTML_PARSE_CONFIG
+
+try:
+    import lxml.html
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+# 处罚信息表格使用的Word导出样式类
+TABLE_CLASSES = ['MsoTableGrid', 'MsoNormalTable']
+
+# 与 BeautifulSoup 的 class_ 匹配语义一致：class 属性中包含任一样式类
+_TABLE_XPATH = '//table[{}]'.format(' or '.join(
+    f'contains(concat(" ", normalize-space(@class), " "), " {name} ")' for name in TABLE_CLASSES
+))
+
+# 发布时间所在元素，按顺序查找（对应 span.ng-binding、span[ng-bind*="time"]、.publish-time、.pub-time、.time、*[class*="time"]）
+_PUBLISH_TIME_XPATHS = [
+    '//span[contains(concat(" ", normalize-space(@class), " "), " ng-binding ")]',
+    '//span[contains(@ng-bind, "time")]',
+    '//*[contains(concat(" ", normalize-space(@class), " "), " publish-time ")]',
+    '//*[contains(concat(" ", normalize-space(@class), " "), " pub-time ")]',
+    '//*[contains(concat(" ", normalize-space(@class), " "), " time ")]',
+    '//*[contains(@class, "time")]',
+]
+_PUBLISH_TIME_SELECTORS = [
+    'span.ng-binding', 'span[ng-bind*="time"]', '.publish-time', '.pub-time', '.time', '*[class*="time"]'
+]
+
+# 匹配 YYYY-MM-DD 格式
+DATE_PATTERN = re.compile(r'(\d{4}[-/]\d{1,2}[-/]\d{1,2})')
+
+# 没有专门的发布时间元素时，在页面源码中查找的模式（按顺序优先）
+PUBLISH_TIME_PATTERNS = [
+    re.compile(r'发布时间[：:]\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})'),
+    re.compile(r'时间[：:]\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})'),
+    re.compile(r'日期[：:]\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})'),
+]
+
+logger = logging.getLogger(__name__)
+
+
+def _publish_time_from_texts(texts) -> str:
+    """在候选元素文本中查找发布时间"""
+    for text in texts:
+        text = text.strip()
+        if '时间' in text:
+            time_match = DATE_PATTERN.search(text)
+            if time_match:
+                return time_match.group(1)
+    return ""
+
+
+def _publish_time_from_source(page_source: str) -> str:
+    """在页面源码中按模式查找发布时间"""
+    for pattern in PUBLISH_TIME_PATTERNS:
+        match = pattern.search(page_source)
+        if match:
+            return match.group(1)
+    return ""
+
+
+def _find_tables_with_soup(page_source: str) -> List:
+    """旧逻辑：整页 html.parser 解析后查找表格"""
+    return _parse_with_soup(page_source)[0]
+
+
+def _parse_with_soup(page_source: str) -> Tuple[List, str]:
+    """整页 html.parser 解析，返回 (表格列表, 发布时间)"""
+    soup = BeautifulSoup(page_source, 'html.parser')
+    tables = soup.find_all('table', class_=TABLE_CLASSES)
+    if not tables:
+        # 如果没找到指定类的表格，查找所有表格
+        tables = soup.find_all('table')
+
+    publish_time = ""
+    for selector in _PUBLISH_TIME_SELECTORS:
+        publish_time = _publish_time_from_texts(element.get_text() for element in soup.select(selector))
+        if publish_time:
+            break
+    return tables, publish_time or _publish_time_from_source(page_source)
+
+
+def _find_tables_with_lxml(page_source: str) -> List:
+    """用 lxml 定位表格，再逐个用 html.parser 解析表格片段"""
+    return _parse_with_lxml(page_source)[0]
+
+
+def _parse_with_lxml(page_source: str) -> Tuple[List, str]:
+    """lxml 解析一次：定位表格（逐个用 html.parser 解析表格片段）并提取发布时间"""
+    document = lxml.html.fromstring(page_source)
+    elements = document.xpath(_TABLE_XPATH)
+    if not elements:
+        elements = document.xpath('//table')
+
+    tables = []
+    for element in elements:
+        fragment = lxml.html.tostring(element, encoding='unicode', with_tail=False)
+        table = BeautifulSoup(fragment, 'html.parser').find('table')
+        if table is not None:
+            tables.append(table)
+
+    publish_time = ""
+    for xpath in _PUBLISH_TIME_XPATHS:
+        publish_time = _publish_time_from_texts(element.text_content() for element in document.xpath(xpath))
+        if publish_time:
+            break
+    return tables, publish_time or _publish_time_from_source(page_source)
+
+
+def parse_detail_document(page_source: str) -> Tuple[List, str]:
+    """解析详情页源码，返回 (按文档顺序排列的 BeautifulSoup 表格对象, 发布时间)，未找到发布时间时为空字符串"""
+    if HTML_PARSE_CONFIG['engine'] == 'lxml' and LXML_AVAILABLE:
+        try:
+            return _parse_with_lxml(page_source)
+        except (etree.ParserError, ValueError) as e:
+            logger.debug(f"lxml定位表格失败，改用html.parser整页解析: {e}")
+    return _parse_with_soup(page_source)
+
+
+def find_punishment_tables(page_source: str) -> List:
+    """从详情页源码中查找处罚信息表格，按文档顺序返回 BeautifulSoup 表格对象"""
+    return parse_detail_document(page_source)[0]
+
+
+def find_publish_time(page_source: str) -> str:
+    """从详情页源码中提取发布时间，未找到时返回空字符串"""
+    return parse_detail_document(page_source)[1]
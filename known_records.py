@@ -0,0 +1,196 @@
+"""
+已知记录索引模块 - 抓取详情页之前过滤总表中已有的记录
+列表项的详情链接、标题+标题中的决定书文号即可确定一条已入库的记录，日/月更新时据此跳过详情页抓取。
+索引保存这些键的64位摘要：布隆过滤器先行判断，命中后再由排序的精确摘要集合确认，
+因此不会错误跳过新记录；未命中的键（绝大多数新记录）只需查询布隆过滤器。
+索引与总表同步更新，并保存建立时总表的标识（数据源类型、位置、记录数等）；
+文件删除或总表在别处更新、替换后（标识不一致）由总表重新建立。
+"""
+
+import os
+import math
+import hashlib
+import logging
+from typing import Iterable, List
+
+import numpy as np
+
+# 检测exe模式并导入相应配置
+if os.environ.get('NFRA_EXE_MODE') == '1':
+    # EXE模式：使用exe专用配置
+    from config_exe import KNOWN_RECORDS_CONFIG
+else:
+    # 正常模式：使用标准配置
+    from config import KNOWN_RECORDS_CONFIG
+
+
+# 布隆过滤器最少位数
+MIN_BLOOM_BITS = 8192
+
+
+def record_keys(detail_url: str, title: str, decision_number: str) -> List[str]:
+    """一条列表项/总表记录的识别键：详情链接；标题中能提取出决定书文号时再加 标题|文号"""
+    keys = []
+    if detail_url:
+        keys.append(f'url:{detail_url.strip()}')
+    if title and decision_number:
+        keys.append(f'title:{title}|{decision_number}')
+    return keys
+
+
+def key_digest(key: str) -> int:
+    """键的64位摘要"""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class KnownRecordIndex:
+    """布隆过滤器 + 精确摘要集合，持久化为单个 .npz 文件"""
+
+    def __init__(self, filename: str, false_positive_rate: float = 0.01, enabled: bool = True):
+        self.logger = logging.getLogger(__name__)
+        self.filename = filename
+        self.false_positive_rate = false_positive_rate
+        self.enabled = enabled
+        self._digests = np.zeros(0, dtype=np.uint64)
+        self._capacity = 0
+        self._bits = np.zeros(0, dtype=np.uint8)
+        self._num_bits = 0
+        self._num_hashes = 1
+        self._source = ''
+        self._loaded = False
+
+    @property
+    def built(self) -> bool:
+        """索引文件是否已建立"""
+        return os.path.exists(self.filename)
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.built:
+            self._resize(0)
+            return
+        try:
+            with np.load(self.filename) as content:
+                self._digests = content['digests']
+                self._bits = content['bits']
+                self._capacity = int(content['capacity'])
+                self._num_hashes = int(content['num_hashes'])
+                # 较早版本的索引文件没有总表标识，视为与总表不一致
+                self._source = str(content['source']) if 'source' in content.files else ''
+            self._num_bits = len(self._bits) * 8
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.warning(f"读取已知记录索引失败，重新建立: {e}")
+            self._digests = np.zeros(0, dtype=np.uint64)
+            self._source = ''
+            self._resize(0)
+
+    @property
+    def source(self) -> str:
+        """建立（最近一次同步）索引时总表的标识"""
+        self._ensure_loaded()
+        return self._source
+
+    @source.setter
+    def source(self, value: str) -> None:
+        self._ensure_loaded()
+        self._source = value or ''
+
+    def _resize(self, capacity: int) -> None:
+        """按容量和误判率确定位数与哈希函数个数，并由精确集合重建布隆过滤器"""
+        self._capacity = capacity
+        count = max(capacity, 1)
+        num_bits = -count * math.log(self.false_positive_rate) / (math.log(2) ** 2)
+        self._num_bits = max(MIN_BLOOM_BITS, int(math.ceil(num_bits / 8)) * 8)
+        self._num_hashes = max(1, round(self._num_bits / count * math.log(2)))
+        self._bits = np.zeros(self._num_bits // 8, dtype=np.uint8)
+        self._set_bits(self._digests)
+
+    def _bit_positions(self, digests: np.ndarray) -> Iterable[np.ndarray]:
+        """双重哈希：第 i 个位置为 (h1 + i*h2) mod 位数"""
+        low = digests & np.uint64(0xFFFFFFFF)
+        step = (digests >> np.uint64(32)) | np.uint64(1)
+        for i in range(self._num_hashes):
+            yield (low + np.uint64(i) * step) % np.uint64(self._num_bits)
+
+    def _set_bits(self, digests: np.ndarray) -> None:
+        for positions in self._bit_positions(digests):
+            np.bitwise_or.at(self._bits, positions >> np.uint64(3),
+                             (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)))
+
+    def _might_contain(self, digest: int) -> bool:
+        for positions in self._bit_positions(np.array([digest], dtype=np.uint64)):
+            position = int(positions[0])
+            if not self._bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def _contains_exactly(self, digest: int) -> bool:
+        index = np.searchsorted(self._digests, np.uint64(digest))
+        return index < len(self._digests) and int(self._digests[index]) == digest
+
+    def contains(self, keys: Iterable[str]) -> bool:
+        """任一键已在索引中即视为已知记录"""
+        if not self.enabled:
+            return False
+        self._ensure_loaded()
+        for key in keys:
+            digest = key_digest(key)
+            if self._might_contain(digest) and self._contains_exactly(digest):
+                return True
+        return False
+
+    def add(self, keys: Iterable[str]) -> int:
+        """加入一批键，返回新增的摘要数（需调用 save 持久化）"""
+        if not self.enabled:
+            return 0
+        self._ensure_loaded()
+        digests = np.unique(np.fromiter((key_digest(key) for key in keys), dtype=np.uint64))
+        new_digests = digests[~np.isin(digests, self._digests)]
+        if len(new_digests) == 0:
+            return 0
+
+        self._digests = np.union1d(self._digests, new_digests)
+        if len(self._digests) > self._capacity:
+            # 超出容量时按两倍容量重建，保持误判率
+            self._resize(len(self._digests) * 2)
+        else:
+            self._set_bits(new_digests)
+        return len(new_digests)
+
+    def rebuild(self, keys: Iterable[str]) -> int:
+        """清空后由全部键重新建立"""
+        self._loaded = True
+        self._digests = np.zeros(0, dtype=np.uint64)
+        self._resize(0)
+        return self.add(keys)
+
+    def save(self) -> None:
+        """写入临时文件后原子替换"""
+        if not self.enabled:
+            return
+        self._ensure_loaded()
+        try:
+            directory = os.path.dirname(self.filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_filename = f'{self.filename}.{os.getpid()}.tmp'
+            with open(temp_filename, 'wb') as f:
+                np.savez(f, digests=self._digests, bits=self._bits,
+                         capacity=self._capacity, num_hashes=self._num_hashes, source=np.array(self._source))
+            os.replace(temp_filename, self.filename)
+        except OSError as e:
+            self.logger.warning(f"保存已知记录索引失败: {e}")
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._digests)
+
+
+# 全局已知记录索引实例
+known_records = KnownRecordIndex(
+    KNOWN_RECORDS_CONFIG['filename'],
+    KNOWN_RECORDS_CONFIG['false_positive_rate'],
+    KNOWN_RECORDS_CONFIG['enabled'],
+)
@@ -34,12 +34,14 @@ if os.environ.get('NFRA_EXE_MODE') == '1':
         'monthly': {
             'description': '月度更新模式 - 上个月数据',
             'max_pages_per_category': 10,
-            'max_records_per_category': None
+            'max_records_per_category': None,
+            'skip_known_records': True
         },
         'daily': {
             'description': '每日更新模式 - 昨天数据',
             'max_pages_per_category': 3,
-            'max_records_per_category': None
+            'max_records_per_category': None,
+            'skip_known_records': True
         }
     }
     SCHEDULE_CONFIG = {'enabled': False}  # EXE模式不需要定时任务
@@ -49,7 +51,10 @@ else:
 
 from crawler import NFRACrawler
 from data_processor import DataProcessor, process_and_save_data
-from utils import setup_logging, load_existing_data, merge_data
+from utils import setup_logging, load_existing_data, merge_data, string_table
+from metrics import stage_metrics, get_metrics_filename, start_metrics_server, METRICS_CONFIG
+from profiling import profile_call, PROFILERS
+from stream_export import open_stream_exporter, STREAM_EXPORT_CONFIG
 
 
 def get_available_categories():
@@ -102,7 +107,38 @@ def parse_categories(category_arg):
     return requested_categories if requested_categories else available_categories
 
 
-def run_crawl_by_mode(mode: str, categories: list = None) -> bool:
+def run_crawl_by_mode(mode: str, categories: list = None, stream: bool = False) -> bool:
+    """根据模式执行爬取任务，结束时输出各阶段耗时统计"""
+    stage_metrics.reset()
+    try:
+        return _run_crawl_by_mode(mode, categories, stream)
+    finally:
+        report_stage_metrics(mode)
+        # 本次运行的记录已写出，释放字符串驻留表
+        string_table.clear()
+
+
+def report_stage_metrics(mode: str) -> None:
+    """打印各阶段耗时分位数并写入JSON文件"""
+    logger = logging.getLogger(__name__)
+    
+    if not stage_metrics.summary():
+        return
+    
+    logger.info("=" * 40)
+    logger.info("各阶段耗时统计（秒）")
+    logger.info("=" * 40)
+    for line in stage_metrics.format_report().split('\n'):
+        logger.info(line)
+    
+    metrics_filename = get_metrics_filename(mode)
+    if stage_metrics.dump_json(metrics_filename, {'mode': mode}):
+        logger.info(f"耗时统计已保存至: {metrics_filename}")
+    else:
+        logger.warning(f"耗时统计保存失败: {metrics_filename}")
+
+
+def _run_crawl_by_mode(mode: str, categories: list = None, stream: bool = False) -> bool:
     """根据模式执行爬取任务"""
     logger = setup_logging()
     
@@ -121,6 +157,15 @@ def run_crawl_by_mode(mode: str, categories: list = None) -> bool:
     try:
         crawler = NFRACrawler(headless=SELENIUM_CONFIG['headless'])
         
+        # 日/月更新：抓取详情页之前跳过总表中已有的记录
+        if mode_config.get('skip_known_records'):
+            processor = DataProcessor()
+            if processor.prepare_known_records():
+                crawler.known_item_filter = processor.is_known_item
+        
+        if stream:
+            return run_stream_crawl(crawler, mode, categories)
+        
         # 执行爬取
         if mode == 'init':
             # 初始化模式：智能获取2025年的所有数据
@@ -217,6 +262,55 @@ def run_crawl_by_mode(mode: str, categories: list = None) -> bool:
         return False
 
 
+def get_list_fetcher(crawler: NFRACrawler, mode: str):
+    """返回该模式下获取单个类别处罚列表的函数"""
+    max_pages = RUN_MODES[mode]['max_pages_per_category']
+    
+    if mode == 'init':
+        return lambda category: crawler.get_punishment_list_smart_by_year(category, 2025, max_pages)
+    elif mode == 'monthly':
+        last_year, last_month = get_last_month()
+        return lambda category: crawler.get_punishment_list_smart(category, last_year, last_month, max_pages, True)
+    elif mode == 'daily':
+        yesterday = datetime.now() - timedelta(days=1)
+        return lambda category: crawler.get_punishment_list_smart_by_date(
+            category, yesterday.year, yesterday.month, yesterday.day, max_pages)
+    else:
+        return lambda category: crawler.get_punishment_list(category, max_pages)
+
+
+def run_stream_crawl(crawler: NFRACrawler, mode: str, categories: list) -> bool:
+    """流式爬取：详情记录清理后立即写入NDJSON/Excel，不在内存中累积全部数据
+
+    流式输出不更新总表（不去重，也不更新已知记录索引和近似重复签名），记录由后续普通运行写入总表。
+    """
+    logger = logging.getLogger(__name__)
+    mode_config = RUN_MODES[mode]
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    categories_str = '_'.join(categories) if len(categories) < len(get_available_categories()) else '全部类别'
+    basename = os.path.join(STREAM_EXPORT_CONFIG['output_dir'], f'{mode}模式_{categories_str}_{timestamp}')
+    
+    records = crawler.stream_selected_categories(
+        categories=categories,
+        list_fetcher=get_list_fetcher(crawler, mode),
+        max_records_per_category=mode_config['max_records_per_category']
+    )
+    
+    with open_stream_exporter(basename) as exporter:
+        total_records = exporter.consume(records)
+    
+    if not total_records:
+        logger.warning("未获取到数据")
+        return False
+    
+    logger.info(f"{mode_config['description']}完成！")
+    logger.info(f"流式写出 {total_records} 条记录，保存至: {basename}.*")
+    for category, count in exporter.category_counts.items():
+        logger.info(f"  {category}: {count} 条")
+    return True
+
+
 def filter_data_by_year(data: dict, target_year: int) -> dict:
     """过滤指定年份的数据"""
     logger = logging.getLogger(__name__)
@@ -476,14 +570,27 @@ def main():
     """主函数 - 命令行界面"""
     parser = argparse.ArgumentParser(description='金融监管总局行政处罚信息爬虫')
     parser.add_argument('command', 
-                       choices=['test', 'init', 'monthly', 'daily', 'run', 'analysis', 'schedule'], 
+                       choices=['test', 'init', 'monthly', 'daily', 'run', 'analysis', 'export', 'schedule'], 
                        help='执行命令')
     parser.add_argument('--pages', type=int, default=5, help='每个分类爬取的最大页数')
     parser.add_argument('--text', action='store_true', help='同时导出文本文件')
     parser.add_argument('--categories', help='爬取的类别，多个类别用逗号分隔')
+    parser.add_argument('--metrics-port', type=int, default=METRICS_CONFIG.get('http_port'),
+                       help='启动指标HTTP端点（/metrics）的端口')
+    parser.add_argument('--metrics-host', default=METRICS_CONFIG.get('http_host', '127.0.0.1'),
+                       help='指标HTTP端点的监听地址（默认只监听本机，远程采集时可指定 0.0.0.0）')
+    parser.add_argument('--profile', choices=PROFILERS,
+                       help='剖析本次运行：cprofile(CPU) / sampling(采样火焰图) / tracemalloc(内存分配)，结果写入profiles目录')
+    parser.add_argument('--stream', action='store_true',
+                       help='流式导出：记录抓取后立即写入NDJSON和Excel（按抓取顺序，不排序）')
     
     args = parser.parse_args()
     
+    # 启动指标端点（可选）
+    if args.metrics_port:
+        if start_metrics_server(args.metrics_port, args.metrics_host):
+            print(f"📈 指标端点: http://{args.metrics_host}:{args.metrics_port}/metrics")
+    
     # 解析类别参数
     categories = parse_categories(args.categories)
     if args.categories:
@@ -492,14 +599,14 @@ def main():
     try:
         if args.command == 'test':
             print("测试模式（爬取第一页数据）...")
-            success = run_crawl_by_mode('test', categories)
+            success = profile_call(args.profile, 'test', run_crawl_by_mode, 'test', categories, args.stream)
             
         elif args.command == 'init':
             print("初始化模式（下载2025年全部数据）...")
             print("⚠️  注意：此模式将爬取大量数据，可能需要较长时间！")
             confirm = input("确认继续？(y/N): ")
             if confirm.lower() == 'y':
-                success = run_crawl_by_mode('init', categories)
+                success = profile_call(args.profile, 'init', run_crawl_by_mode, 'init', categories, args.stream)
             else:
                 print("已取消初始化。")
                 return
@@ -510,11 +617,11 @@ def main():
             print(f"月度更新模式（获取{last_year}年{last_month}月数据）...")
             print(f"📅 目标月份：{last_year}年{last_month}月")
             print(f"⏱️  预计耗时：10-20分钟")
-            success = run_crawl_by_mode('monthly', categories)
+            success = profile_call(args.profile, 'monthly', run_crawl_by_mode, 'monthly', categories, args.stream)
             
         elif args.command == 'daily':
             print("每日更新模式（获取昨天发布的数据）...")
-            success = run_crawl_by_mode('daily', categories)
+            success = profile_call(args.profile, 'daily', run_crawl_by_mode, 'daily', categories, args.stream)
             
         elif args.command == 'run':
             print("完整爬取模式...")
@@ -522,11 +629,15 @@ def main():
                 print("同时导出文本文件...")
             
             categories = parse_categories(args.categories)
-            success = run_crawl_by_mode('full', categories)
+            success = profile_call(args.profile, 'full', run_crawl_by_mode, 'full', categories, args.stream)
             
         elif args.command == 'analysis':
             print("数据分析模式...")
-            success = run_data_analysis()
+            success = profile_call(args.profile, 'analysis', run_data_analysis)
+            
+        elif args.command == 'export':
+            print("由总表数据集导出总表Excel...")
+            success = DataProcessor().export_master_excel()
             
         elif args.command == 'schedule':
             print("启动定时任务...")
@@ -563,6 +674,7 @@ def print_help():
     python main.py daily [--categories=类别]   每日更新
     python main.py schedule                    启动定时爬取服务
     python main.py analysis                    分析现有数据
+    python main.py export                      由总表数据集导出总表Excel
 
 参数说明:
     --categories  指定爬取类别，多个类别用逗号分隔
@@ -570,6 +682,7 @@ def print_help():
                   简写方式：总局/zhongju/1, 监管局/jianguanju/2, 监管分局/fenju/3, all
     --pages       每个分类爬取的最大页数，默认5页
     --text        同时导出文本文件
+    --stream      流式导出，记录边抓取边写入NDJSON和Excel
 
 示例:
     python main.py monthly                              # 爬取所有类别的上月数据
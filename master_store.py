@@ -0,0 +1,464 @@
+"""
+总表存储模块 - 总表数据源，总表Excel由数据源按需导出
+parquet：按发布年月分区的 Parquet 数据集，每次更新只读写新数据所在的年月分区（通常是当月一个分区），
+  目录结构 master_store/year=2025/month=06/part.parquet，发布时间无法识别的记录存放在 year=unknown 分区。
+sqlite：单个 SQLite 数据库，去重键上建唯一索引，新记录以 INSERT ... ON CONFLICT DO NOTHING 写入，
+  更新耗时只与新记录数有关；WAL 模式下读取方（如Web界面）不受写入影响。
+记录数达到分块处理阈值时，导出总表Excel按分块流式读取、外存去重并归并有序段，内存占用与总表规模无关。
+"""
+
+import os
+import re
+import abc
+import glob
+import sqlite3
+import logging
+import tempfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils import parse_publish_times, text_values
+from excel_writer import StreamingExcelWriter, read_excel_table, split_sheet_names
+from chunked_master import ExternalHashIndex, SortedRunMerger, publish_sort_keys
+from summary_stats import MasterSummaryStats
+
+# 检测exe模式并导入相应配置
+if os.environ.get('NFRA_EXE_MODE') == '1':
+    # EXE模式：使用exe专用配置
+    from config_exe import MASTER_STORE_CONFIG, CHUNKED_PROCESSING_CONFIG
+else:
+    # 正常模式：使用标准配置
+    from config import MASTER_STORE_CONFIG, CHUNKED_PROCESSING_CONFIG
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+# 数据集保存的字段（序号在导出时重新生成，不保存）
+STORE_COLUMNS = [
+    '标题', '当事人名称', '主要违法违规行为',
+    '行政处罚依据', '行政处罚内容', '行政处罚决定书文号',
+    '作出决定机关', '发布时间', '类别', '抓取时间', '详情链接'
+]
+
+# 解析好的发布时间（datetime64），随 Parquet 分区保存，排序时直接使用，导出Excel时不输出
+PUBLISH_TS_COLUMN = '_publish_ts'
+
+# 主要去重字段的64位哈希（uint64），随 Parquet 分区保存，去重时历史记录不再重新计算
+DEDUP_HASH_COLUMN = '_dedup_hash'
+
+PARTITION_FILENAME = 'part.parquet'
+
+# 发布时间中的年月：2025-06-03、2025/6/3、2025年6月3日
+_YEAR_MONTH_PATTERN = re.compile(r'(\d{4})\s*[-/年.]\s*(\d{1,2})')
+
+
+def partition_of(publish_time) -> Tuple[str, str]:
+    """发布时间对应的 (年, 月) 分区，无法识别时为 ('unknown', 'unknown')"""
+    match = _YEAR_MONTH_PATTERN.search(str(publish_time or ''))
+    if not match:
+        return 'unknown', 'unknown'
+    month = int(match.group(2))
+    if not 1 <= month <= 12:
+        return 'unknown', 'unknown'
+    return match.group(1), f'{month:02d}'
+
+
+def read_excel_hyperlinks(excel_filename: str, link_column: pd.Series) -> List[str]:
+    """总表Excel中详情链接显示为"查看详情"，从单元格超链接恢复真实地址
+    （link_column 为 read_excel_table 读出的列，续写的各工作表依次对应）"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(excel_filename, read_only=False)
+    values = list(link_column)
+    links = []
+    for sheet_name in split_sheet_names(workbook.sheetnames):
+        sheet = workbook[sheet_name]
+        header = [cell.value for cell in sheet[1]]
+        column_index = header.index('详情链接') + 1
+        for row_idx in range(2, sheet.max_row + 1):
+            if len(links) >= len(values):
+                break
+            cell = sheet.cell(row=row_idx, column=column_index)
+            links.append(cell.hyperlink.target if cell.hyperlink else values[len(links)])
+    return links + values[len(links):]
+
+
+class BaseMasterStore(abc.ABC):
+    """总表存储的公共逻辑：字段统一、导入总表Excel、导出总表Excel"""
+
+    # 数据源类型（与配置中的 backend 一致）及所需的依赖是否已安装
+    backend = ''
+    available = True
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    @abc.abstractmethod
+    def is_empty(self) -> bool:
+        """总表是否还没有记录"""
+
+    @abc.abstractmethod
+    def upsert(self, new_df: pd.DataFrame, processor) -> int:
+        """写入新记录（已有的去重键跳过），返回实际新增条数"""
+
+    @abc.abstractmethod
+    def read_all(self) -> pd.DataFrame:
+        """读取全部记录"""
+
+    @abc.abstractmethod
+    def count(self) -> int:
+        """总表记录数"""
+
+    @abc.abstractmethod
+    def iter_chunks(self, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        """逐块读取总表（每块不超过 chunk_rows 条，带发布时间列）"""
+
+    @property
+    @abc.abstractmethod
+    def location(self) -> str:
+        """数据源所在的路径"""
+
+    def fingerprint(self) -> str:
+        """数据源标识（类型、位置、记录数），由总表建立的索引据此判断总表是否已在别处变化"""
+        return f'{self.backend}|{os.path.abspath(self.location)}|{self.count()}'
+
+    def use_chunked(self) -> bool:
+        """总表记录数达到阈值时使用分块处理"""
+        if not CHUNKED_PROCESSING_CONFIG['enabled']:
+            return False
+        return self.count() >= CHUNKED_PROCESSING_CONFIG['threshold_rows']
+
+    def _conform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """统一为总表字段，全部保存为字符串"""
+        conformed = pd.DataFrame(index=df.index)
+        for col in STORE_COLUMNS:
+            if col in df.columns:
+                conformed[col] = text_values(df[col])
+            else:
+                conformed[col] = ''
+        return conformed.reset_index(drop=True)
+
+    def _with_publish_ts(self, df: pd.DataFrame) -> pd.DataFrame:
+        """补充解析好的发布时间列（已有时不重复解析）"""
+        if PUBLISH_TS_COLUMN not in df.columns:
+            df[PUBLISH_TS_COLUMN] = parse_publish_times(df['发布时间'])
+        return df
+
+    def import_excel(self, excel_filename: str, processor) -> int:
+        """从已有的总表Excel导入历史数据（首次启用数据源时执行一次）"""
+        existing_df = read_excel_table(excel_filename)
+        # 导出的Excel中详情链接显示为"查看详情"，真实地址保存在超链接中
+        if '详情链接' in existing_df.columns:
+            existing_df['详情链接'] = read_excel_hyperlinks(excel_filename, existing_df['详情链接'])
+        imported = self.upsert(existing_df, processor)
+        self.logger.info(f"已从总表Excel导入 {imported} 条历史记录: {excel_filename}")
+        return imported
+
+    def _export_dedup_hashes(self, df: pd.DataFrame, processor) -> np.ndarray:
+        """导出时去重用的哈希，与 dedup_key 一致：主要字段的哈希（有保存的哈希列时直接使用），
+        主要字段全部为空时取降级字段的哈希（混入标记，与主要字段的哈希区分），均为空时为0"""
+        if DEDUP_HASH_COLUMN in df.columns and df[DEDUP_HASH_COLUMN].dtype == np.uint64:
+            hashes = df[DEDUP_HASH_COLUMN].to_numpy().copy()
+        else:
+            hashes = processor.dedup_hashes(df, PRIMARY_DEDUP_COLUMNS)
+        empty = hashes == 0
+        if empty.any():
+            fallback_hashes = processor.dedup_hashes(df[empty], FALLBACK_DEDUP_COLUMNS)
+            hashes[empty] = np.where(fallback_hashes != 0, fallback_hashes ^ FALLBACK_HASH_TAG, 0)
+        return hashes
+
+    def export_excel(self, excel_filename: str, processor, new_records_count: int = 0) -> bool:
+        """由数据源生成总表Excel：去除重复记录（规则与分块导出相同），按发布时间降序排列并重新编号"""
+        if self.use_chunked():
+            return self.export_excel_chunked(excel_filename, processor, new_records_count)
+
+        merged_df = self.read_all()
+        merged_df = merged_df[processor._first_occurrence_mask(self._export_dedup_hashes(merged_df, processor))]
+        merged_df = processor.sort_by_publish_time(merged_df)
+        merged_df.insert(0, '序号', range(1, len(merged_df) + 1))
+        merged_df = merged_df[processor.merged_columns]
+
+        summary_stats = processor.generate_master_summary_stats(merged_df, new_records_count)
+        success = processor.write_excel_with_hyperlinks(merged_df, excel_filename, True, {}, summary_stats)
+        if success:
+            self.logger.info(f"总表Excel已导出: {excel_filename}（{len(merged_df)} 条）")
+        return success
+
+    def export_excel_chunked(self, excel_filename: str, processor, new_records_count: int = 0,
+                             chunk_rows: int = None) -> bool:
+        """分块导出总表Excel：逐块去重（外存哈希索引，规则与 export_excel 相同，跨分区的重复同样去除）、
+        排序写为有序段，再多路归并逐行写入，内存中最多只有一块记录"""
+        chunk_rows = chunk_rows or CHUNKED_PROCESSING_CONFIG['chunk_rows']
+        spill_dir = CHUNKED_PROCESSING_CONFIG['spill_dir']
+        os.makedirs(spill_dir, exist_ok=True)
+
+        with tempfile.TemporaryDirectory(dir=spill_dir) as work_dir:
+            hash_index = ExternalHashIndex(os.path.join(work_dir, 'hashes'))
+            runs = SortedRunMerger(os.path.join(work_dir, 'runs'))
+            stats = MasterSummaryStats()
+
+            for chunk in self.iter_chunks(chunk_rows):
+                chunk = chunk[hash_index.first_occurrence_mask(self._export_dedup_hashes(chunk, processor))]
+
+                stats.add(chunk)
+                runs.add_run(chunk[STORE_COLUMNS], publish_sort_keys(chunk[PUBLISH_TS_COLUMN]))
+
+            total_count = len(runs)
+            summary_stats = stats.rows(new_records_count)
+
+            writer = StreamingExcelWriter(excel_filename)
+            writer.begin_table('行政处罚信息', processor.merged_columns)
+            # 合并输出的字段为 序号 + 数据集字段
+            columns = processor.merged_columns[1:]
+            for number, row in enumerate(runs.iter_rows(columns, chunk_rows), 1):
+                writer.append_row((number,) + row)
+            summary_df = pd.DataFrame(summary_stats)
+            writer.write_table('数据统计', list(summary_df.columns),
+                               summary_df.itertuples(index=False, name=None), link_column=None)
+            writer.save()
+
+        self.logger.info(f"总表Excel已分块导出: {excel_filename}（{total_count} 条，每块 {chunk_rows} 条）")
+        return True
+
+
+class MasterStore(BaseMasterStore):
+    """按发布年月分区的 Parquet 总表"""
+
+    backend = 'parquet'
+    available = PARQUET_AVAILABLE
+
+    def __init__(self, dataset_dir: str):
+        super().__init__()
+        self.dataset_dir = dataset_dir
+
+    @property
+    def location(self) -> str:
+        return self.dataset_dir
+
+    def partition_path(self, year: str, month: str) -> str:
+        return os.path.join(self.dataset_dir, f'year={year}', f'month={month}', PARTITION_FILENAME)
+
+    def partition_files(self) -> List[str]:
+        """数据集中的全部分区文件（按年月排序）"""
+        pattern = os.path.join(self.dataset_dir, 'year=*', 'month=*', PARTITION_FILENAME)
+        return sorted(glob.glob(pattern))
+
+    def is_empty(self) -> bool:
+        return not self.partition_files()
+
+    def _read_partition(self, path: str) -> pd.DataFrame:
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=STORE_COLUMNS)
+        return pd.read_parquet(path).drop(columns=[PUBLISH_TS_COLUMN], errors='ignore')
+
+    def _write_partition(self, path: str, df: pd.DataFrame) -> None:
+        """先写临时文件再替换，中途失败不会损坏已有分区"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.tmp'
+        df.to_parquet(temp_path, index=False)
+        os.replace(temp_path, path)
+
+    def upsert(self, new_df: pd.DataFrame, processor) -> int:
+        """将新数据合并到所在分区并去重，返回新增记录数
+
+        processor 为 DataProcessor，用于与原总表一致的业务字段去重。
+        """
+        if len(new_df) == 0:
+            return 0
+
+        new_df = self._conform(new_df)
+        hashes = processor.dedup_hashes(new_df, PRIMARY_DEDUP_COLUMNS)
+        new_df[DEDUP_HASH_COLUMN] = hashes
+
+        # 与全部分区已保存的去重键比较：发布时间写法变化或曾为空（year=unknown）的记录不会在另一分区重复入库
+        keep = (hashes != 0) & ~pd.Index(hashes).duplicated(keep='first')
+        keep &= ~np.isin(hashes, self.stored_dedup_hashes(processor))
+        if not keep.all():
+            self.logger.info(f"跳过 {int((~keep).sum())} 条总表中已有或缺少去重字段的记录")
+            new_df = new_df[keep]
+        if len(new_df) == 0:
+            return 0
+        partitions = new_df['发布时间'].map(partition_of)
+
+        new_records_count = 0
+        for (year, month), partition_df in new_df.groupby(partitions, sort=True):
+            path = self.partition_path(year, month)
+            existing_df = self._read_partition(path)
+            before_count = len(existing_df)
+
+            merged_df = pd.concat([existing_df, partition_df], ignore_index=True)
+            deduped_df = processor.deduplicate_records(merged_df)
+            merged_df = self._conform(deduped_df)
+            merged_df[DEDUP_HASH_COLUMN] = deduped_df[DEDUP_HASH_COLUMN].to_numpy()
+            self._write_partition(path, self._with_publish_ts(merged_df))
+
+            added = len(merged_df) - before_count
+            new_records_count += added
+            self.logger.info(f"总表分区 {year}-{month}: {before_count} → {len(merged_df)} 条（新增 {added} 条）")
+
+        return new_records_count
+
+    def stored_dedup_hashes(self, processor) -> np.ndarray:
+        """全部分区已保存的去重键哈希（只读取哈希列；较早写入、没有哈希列的分区读取主要字段计算）"""
+        hashes = []
+        for path in self.partition_files():
+            parquet_file = pq.ParquetFile(path)
+            schema = parquet_file.schema_arrow
+            if DEDUP_HASH_COLUMN in schema.names and schema.field(DEDUP_HASH_COLUMN).type == pyarrow.uint64():
+                hashes.append(parquet_file.read(columns=[DEDUP_HASH_COLUMN]).column(0).to_numpy())
+            else:
+                df = parquet_file.read(columns=PRIMARY_DEDUP_COLUMNS).to_pandas()
+                hashes.append(processor.dedup_hashes(df, PRIMARY_DEDUP_COLUMNS))
+        if not hashes:
+            return np.zeros(0, dtype=np.uint64)
+        return np.concatenate(hashes)
+
+    def read_all(self) -> pd.DataFrame:
+        """读取全部分区（较早写入、没有发布时间列的分区在读取时解析）"""
+        frames = [self._with_publish_ts(pd.read_parquet(path)) for path in self.partition_files()]
+        if not frames:
+            return pd.DataFrame(columns=STORE_COLUMNS + [PUBLISH_TS_COLUMN])
+        return pd.concat(frames, ignore_index=True)
+
+    def count(self) -> int:
+        """由各分区文件的元数据统计记录数，不读取数据"""
+        return sum(pq.ParquetFile(path).metadata.num_rows for path in self.partition_files())
+
+    def iter_chunks(self, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        """按分区顺序逐块读取，较大的分区按 chunk_rows 分批读取"""
+        for path in self.partition_files():
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+                yield self._with_publish_ts(batch.to_pandas())
+
+
+# 去重键字段，与 DataProcessor.deduplicate_records 一致：主要业务字段全部为空时使用降级字段
+PRIMARY_DEDUP_COLUMNS = ['当事人名称', '行政处罚决定书文号', '作出决定机关']
+FALLBACK_DEDUP_COLUMNS = ['当事人名称', '主要违法违规行为', '行政处罚内容']
+
+# 降级字段哈希混入的标记（对应 dedup_key 的 fallback: 前缀）
+FALLBACK_HASH_TAG = np.uint64(0x9E3779B97F4A7C15)
+
+
+def dedup_key(record: Dict) -> Optional[str]:
+    """记录的去重键，主要字段和降级字段均为空时返回None（不入库）"""
+    key = '|'.join(record[col] for col in PRIMARY_DEDUP_COLUMNS)
+    if key.replace('|', '').strip():
+        return key
+    fallback_key = '|'.join(record[col] for col in FALLBACK_DEDUP_COLUMNS)
+    if fallback_key.replace('|', '').strip():
+        return f'fallback:{fallback_key}'
+    return None
+
+
+class SQLiteMasterStore(BaseMasterStore):
+    """SQLite 总表：去重键唯一索引 + INSERT ... ON CONFLICT DO NOTHING"""
+
+    backend = 'sqlite'
+
+    def __init__(self, db_path: str):
+        super().__init__()
+        self.db_path = db_path
+        self._columns_sql = ', '.join(f'"{col}"' for col in STORE_COLUMNS)
+
+    @property
+    def location(self) -> str:
+        return self.db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        column_defs = ', '.join(f'"{col}" TEXT NOT NULL DEFAULT \'\'' for col in STORE_COLUMNS)
+        conn.execute(f'CREATE TABLE IF NOT EXISTS records (id INTEGER PRIMARY KEY, dedup_key TEXT NOT NULL, {column_defs})')
+        conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_records_dedup_key ON records (dedup_key)')
+        return conn
+
+    def is_empty(self) -> bool:
+        if not os.path.exists(self.db_path):
+            return True
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT 1 FROM records LIMIT 1').fetchone() is None
+        finally:
+            conn.close()
+
+    def upsert(self, new_df: pd.DataFrame, processor=None) -> int:
+        """写入新记录（已存在的去重键保留原记录），返回新增记录数"""
+        if len(new_df) == 0:
+            return 0
+
+        rows = []
+        skipped = 0
+        for record in self._conform(new_df).to_dict('records'):
+            key = dedup_key(record)
+            if key is None:
+                skipped += 1
+                continue
+            rows.append([key] + [record[col] for col in STORE_COLUMNS])
+
+        placeholders = ', '.join('?' * (len(STORE_COLUMNS) + 1))
+        conn = self._connect()
+        try:
+            with conn:
+                before_changes = conn.total_changes
+                conn.executemany(
+                    f'INSERT INTO records (dedup_key, {self._columns_sql}) VALUES ({placeholders}) '
+                    f'ON CONFLICT (dedup_key) DO NOTHING',
+                    rows
+                )
+                new_records_count = conn.total_changes - before_changes
+        finally:
+            conn.close()
+
+        if skipped:
+            self.logger.info(f"跳过 {skipped} 条缺少去重字段的记录")
+        self.logger.info(f"总表数据库写入 {len(rows)} 条，新增 {new_records_count} 条")
+        return new_records_count
+
+    def read_all(self) -> pd.DataFrame:
+        conn = self._connect()
+        try:
+            df = pd.read_sql_query(f'SELECT {self._columns_sql} FROM records ORDER BY id', conn)
+        finally:
+            conn.close()
+        return self._with_publish_ts(df)
+
+    def count(self) -> int:
+        if not os.path.exists(self.db_path):
+            return 0
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+        finally:
+            conn.close()
+
+    def iter_chunks(self, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        conn = self._connect()
+        try:
+            for df in pd.read_sql_query(f'SELECT {self._columns_sql} FROM records ORDER BY id', conn,
+                                        chunksize=chunk_rows):
+                yield self._with_publish_ts(df)
+        finally:
+            conn.close()
+
+
+def create_master_store(config: Dict = None) -> BaseMasterStore:
+    """按配置创建总表存储"""
+    config = config or MASTER_STORE_CONFIG
+    if config.get('backend') == 'sqlite':
+        return SQLiteMasterStore(config['sqlite_path'])
+    return MasterStore(config['dataset_dir'])
+
+
+# 全局总表存储实例
+master_store = create_master_store()
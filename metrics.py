@@ -0,0 +1,405 @@
+"""
+性能指标模块 - 统计爬取流程各阶段耗时和运行计数
+按 阶段 + 类别 聚合耗时样本，输出 p50/p95/p99 分位数报告和JSON文件，
+并可通过HTTP端点以 Prometheus/OpenMetrics 文本格式对外暴露
+"""
+
+import os
+import json
+import math
+import random
+import functools
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+# 检测exe模式并导入相应配置
+if os.environ.get('NFRA_EXE_MODE') == '1':
+    # EXE模式：使用exe专用配置
+    from config_exe import METRICS_CONFIG
+else:
+    # 正常模式：使用标准配置
+    from config import METRICS_CONFIG
+
+
+# 未指定类别时使用的占位类别
+DEFAULT_CATEGORY = '-'
+
+# 耗时直方图的桶边界（秒）
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 每个阶段保留的分位数样本上限，超出后使用蓄水池抽样，保证长时间运行内存不增长
+MAX_SAMPLES_PER_STAGE = 5000
+
+# 计数器和仪表的说明文字，用于指标端点的 HELP 行
+COUNTER_HELP = {
+    'pages_scanned': '已扫描的列表页数',
+    'detail_pages_fetched': '已抓取的详情页数',
+    'records_parsed': '已解析出的处罚记录数',
+    'multi_record_expansions': '展开为多条记录的批文数',
+    'retries': '页面加载重试次数',
+    'timeouts': '页面或表格加载超时次数',
+    'driver_starts': 'WebDriver启动次数',
+    'driver_restarts': 'WebDriver重启次数',
+    'known_records_skipped': '总表中已有而跳过的列表项数',
+}
+
+GAUGE_HELP = {
+    'inflight_fetches': '正在进行中的详情页抓取数',
+}
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """计算分位数（最近秩法），输入必须已排序"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_samples)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+class _StageStats:
+    """单个 阶段+类别 的耗时累计数据"""
+
+    __slots__ = ('count', 'total', 'max', 'bucket_counts', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.samples: List[float] = []
+
+    def add(self, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+        # 蓄水池抽样：样本数超过上限后按概率替换，分位数仍然无偏
+        if len(self.samples) < MAX_SAMPLES_PER_STAGE:
+            self.samples.append(duration)
+        else:
+            slot = random.randrange(self.count)
+            if slot < MAX_SAMPLES_PER_STAGE:
+                self.samples[slot] = duration
+
+
+class StageMetrics:
+    """阶段耗时统计器（线程安全）"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], _StageStats] = {}
+        self._local = threading.local()
+
+    def set_category(self, category: Optional[str]) -> None:
+        """设置当前线程的类别，后续未显式指定类别的阶段都归入该类别"""
+        self._local.category = category
+
+    def current_category(self) -> str:
+        """获取当前线程的类别"""
+        return getattr(self._local, 'category', None) or DEFAULT_CATEGORY
+
+    def record(self, stage: str, duration: float, category: Optional[str] = None) -> None:
+        """记录一次阶段耗时（秒）"""
+        captured = getattr(self._local, 'captured', None)
+        if captured is not None:
+            captured[stage] = captured.get(stage, 0.0) + duration
+
+        if not self.enabled:
+            return
+        key = (stage, category or self.current_category())
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _StageStats()
+            stats.add(duration)
+
+    @contextmanager
+    def span(self, stage: str, category: Optional[str] = None):
+        """计时上下文，退出时（包括异常退出）记录耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, category)
+
+    @contextmanager
+    def capture(self):
+        """收集当前线程在上下文内记录的各阶段耗时（同名阶段累加），用于单个页面的追踪事件"""
+        captured: Dict[str, float] = {}
+        previous = getattr(self._local, 'captured', None)
+        self._local.captured = captured
+        try:
+            yield captured
+        finally:
+            self._local.captured = previous
+
+    def timed(self, stage: str, category: Optional[str] = None):
+        """计时装饰器，适用于整个函数即一个阶段的情况"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(stage, category):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self) -> None:
+        """清空所有样本"""
+        with self._lock:
+            self._stats.clear()
+
+    def summary(self) -> List[Dict]:
+        """按阶段和类别汇总耗时统计"""
+        with self._lock:
+            items = [
+                (key, stats.count, stats.total, stats.max, sorted(stats.samples))
+                for key, stats in self._stats.items()
+            ]
+
+        rows = []
+        for (stage, category), count, total, max_duration, samples in sorted(items):
+            rows.append({
+                'stage': stage,
+                'category': category,
+                'count': count,
+                'total': round(total, 4),
+                'mean': round(total / count, 4),
+                'p50': round(percentile(samples, 50), 4),
+                'p95': round(percentile(samples, 95), 4),
+                'p99': round(percentile(samples, 99), 4),
+                'max': round(max_duration, 4),
+            })
+        return rows
+
+    def histograms(self) -> List[Tuple[str, str, List[int], float, int]]:
+        """导出直方图数据：(阶段, 类别, 累积桶计数, 总耗时, 次数)"""
+        with self._lock:
+            items = [
+                (key, list(stats.bucket_counts), stats.total, stats.count)
+                for key, stats in self._stats.items()
+            ]
+
+        result = []
+        for (stage, category), bucket_counts, total, count in sorted(items):
+            cumulative = []
+            running = 0
+            for bucket_count in bucket_counts:
+                running += bucket_count
+                cumulative.append(running)
+            result.append((stage, category, cumulative, total, count))
+        return result
+
+    def format_report(self) -> str:
+        """生成文本格式的耗时报告"""
+        rows = self.summary()
+        if not rows:
+            return "没有采集到阶段耗时数据"
+
+        lines = [
+            f"{'阶段':<16}{'类别':<12}{'次数':>6}{'总耗时':>10}{'p50':>9}{'p95':>9}{'p99':>9}",
+            '-' * 71,
+        ]
+        for row in rows:
+            lines.append(
+                f"{row['stage']:<16}{row['category']:<12}{row['count']:>6}"
+                f"{row['total']:>10.2f}{row['p50']:>9.3f}{row['p95']:>9.3f}{row['p99']:>9.3f}"
+            )
+        return '\n'.join(lines)
+
+    def dump_json(self, filename: str, extra: Dict = None) -> bool:
+        """将耗时统计写入JSON文件"""
+        try:
+            output_dir = os.path.dirname(filename)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+
+            payload = {
+                'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'stages': self.summary(),
+            }
+            if extra:
+                payload.update(extra)
+
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+            return True
+        except Exception:
+            return False
+
+
+class CrawlTelemetry:
+    """爬取运行计数器和仪表（线程安全），按类别区分"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, str], float] = {}
+        self._gauges: Dict[str, float] = {}
+
+    def inc(self, name: str, value: float = 1, category: Optional[str] = None) -> None:
+        """计数器累加，未指定类别时使用耗时统计器的当前类别"""
+        key = (name, category or stage_metrics.current_category())
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge_add(self, name: str, delta: float) -> None:
+        """仪表增减"""
+        with self._lock:
+            self._gauges[name] = self._gauges.get(name, 0) + delta
+
+    def counters(self) -> Dict[Tuple[str, str], float]:
+        """获取计数器快照"""
+        with self._lock:
+            return dict(self._counters)
+
+    def gauges(self) -> Dict[str, float]:
+        """获取仪表快照"""
+        with self._lock:
+            return dict(self._gauges)
+
+    def reset(self) -> None:
+        """清空计数器（仪表反映实时状态，不清空）"""
+        with self._lock:
+            self._counters.clear()
+
+    def drain(self) -> Dict[str, float]:
+        """取出各计数器的累计值（不区分类别）并清空，用于解析进程把计数随结果带回主进程"""
+        with self._lock:
+            totals: Dict[str, float] = {}
+            for (name, _), value in self._counters.items():
+                totals[name] = totals.get(name, 0) + value
+            self._counters.clear()
+        return totals
+
+    def merge(self, totals: Dict[str, float], category: Optional[str] = None) -> None:
+        """累加 drain 取出的计数（归入当前类别）"""
+        for name, value in totals.items():
+            self.inc(name, value, category)
+
+    def track_inflight(self, name: str):
+        """进行中计数装饰器，函数执行期间仪表加一"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                self.gauge_add(name, 1)
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.gauge_add(name, -1)
+            return wrapper
+        return decorator
+
+
+# 全局统计器，爬虫和数据处理模块共用
+stage_metrics = StageMetrics(enabled=METRICS_CONFIG['enabled'])
+crawl_telemetry = CrawlTelemetry()
+
+
+def get_metrics_filename(mode: str) -> str:
+    """生成耗时统计文件名"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return os.path.join(METRICS_CONFIG['output_dir'], f'{mode}_stage_metrics_{timestamp}.json')
+
+
+def _escape_label(value: str) -> str:
+    """转义指标标签值"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_bound(bound: float) -> str:
+    """格式化直方图桶边界"""
+    return repr(float(bound))
+
+
+def render_metrics(openmetrics: bool = False) -> str:
+    """将当前计数器、仪表和阶段耗时直方图渲染为 Prometheus/OpenMetrics 文本格式"""
+    prefix = METRICS_CONFIG.get('metric_prefix', 'nfra')
+    lines = []
+
+    counters = crawl_telemetry.counters()
+    counter_names = sorted(set(COUNTER_HELP) | {name for name, _ in counters})
+    for name in counter_names:
+        # OpenMetrics 的计数器族名不带 _total 后缀（样本名带）；Prometheus 文本格式 0.0.4 的族名与样本名一致
+        metric = f'{prefix}_{name}' if openmetrics else f'{prefix}_{name}_total'
+        lines.append(f'# HELP {metric} {COUNTER_HELP.get(name, name)}')
+        lines.append(f'# TYPE {metric} counter')
+        samples = sorted((category, value) for (counter, category), value in counters.items() if counter == name)
+        for category, value in samples:
+            lines.append(f'{prefix}_{name}_total{{category="{_escape_label(category)}"}} {value:g}')
+
+    gauges = crawl_telemetry.gauges()
+    for name in sorted(set(GAUGE_HELP) | set(gauges)):
+        metric = f'{prefix}_{name}'
+        lines.append(f'# HELP {metric} {GAUGE_HELP.get(name, name)}')
+        lines.append(f'# TYPE {metric} gauge')
+        lines.append(f'{metric} {gauges.get(name, 0):g}')
+
+    metric = f'{prefix}_stage_duration_seconds'
+    lines.append(f'# HELP {metric} 各阶段耗时')
+    lines.append(f'# TYPE {metric} histogram')
+    for stage, category, cumulative, total, count in stage_metrics.histograms():
+        labels = f'stage="{_escape_label(stage)}",category="{_escape_label(category)}"'
+        for bound, bucket_count in zip(LATENCY_BUCKETS, cumulative):
+            lines.append(f'{metric}_bucket{{{labels},le="{_format_bound(bound)}"}} {bucket_count}')
+        lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {count}')
+        lines.append(f'{metric}_sum{{{labels}}} {total:.6f}')
+        lines.append(f'{metric}_count{{{labels}}} {count}')
+
+    if openmetrics:
+        lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    """指标端点请求处理器，只响应 /metrics"""
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+
+        openmetrics = 'application/openmetrics-text' in self.headers.get('Accept', '')
+        body = render_metrics(openmetrics).encode('utf-8')
+        if openmetrics:
+            content_type = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+        else:
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 抓取频繁，不输出访问日志
+        pass
+
+
+def start_metrics_server(port: int, host: str = None) -> Optional[ThreadingHTTPServer]:
+    """在后台线程启动指标HTTP端点，返回服务器对象，失败返回None"""
+    import logging
+    logger = logging.getLogger(__name__)
+
+    if host is None:
+        host = METRICS_CONFIG.get('http_host', '127.0.0.1')
+
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+    except OSError as e:
+        logger.error(f"启动指标端点失败 {host}:{port}: {e}")
+        return None
+
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    logger.info(f"指标端点已启动: http://{host}:{port}/metrics")
+    return server
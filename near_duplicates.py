@@ -0,0 +1,268 @@
+"""
+近似重复检测模块 - MinHash + LSH 分段
+同一处罚决定重新发布时，空白、标点、全角/半角括号或当事人名称写法稍有不同，按业务字段精确去重无法识别。
+对规范化后的 当事人名称 + 主要违法违规行为 + 行政处罚内容 取字符 n-gram，计算 MinHash 签名；
+签名按 LSH 分段，每段的哈希值保存为排序数组，新记录只需在各段中二分查找候选，再估计相似度确认，
+查询耗时不随历史记录数线性增长。判定为近似重复还要求规范化后的当事人名称相同。
+签名持久化为单个 .npz 文件（标签按 UTF-8 拼接保存，附各条的偏移），文件删除或参数变化后由总表重新建立。
+"""
+
+import os
+import re
+import hashlib
+import logging
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 检测exe模式并导入相应配置
+if os.environ.get('NFRA_EXE_MODE') == '1':
+    # EXE模式：使用exe专用配置
+    from config_exe import NEAR_DUPLICATE_CONFIG
+else:
+    # 正常模式：使用标准配置
+    from config import NEAR_DUPLICATE_CONFIG
+
+
+# 参与相似度计算的字段
+SIMILARITY_FIELDS = ['当事人名称', '主要违法违规行为', '行政处罚内容']
+
+# MinHash 哈希函数取乘法移位哈希 (a*x + b) >> 32，参数由固定种子生成，签名可持久化
+MINHASH_SEED = 20250603
+HASH_MASK = np.uint64(0xFFFFFFFF)
+
+# 合并每段各行签名时使用的乘数（64位奇数）
+BAND_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+# 规范化时去除的字符：空白、标点和符号
+_NOISE_PATTERN = re.compile(r'[\s\W_]+', re.UNICODE)
+
+
+def normalize_for_similarity(text) -> str:
+    """全角转半角（NFKC）、转小写，去除空白和标点"""
+    if text is None or (isinstance(text, float) and pd.isna(text)):
+        return ''
+    text = unicodedata.normalize('NFKC', str(text)).lower()
+    return _NOISE_PATTERN.sub('', text)
+
+
+def pack_labels(labels: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """标签按 UTF-8 拼接为字节数组，另存各条的起止偏移（不需要 pickle，也不按最长标签补齐）"""
+    encoded = [label.encode('utf-8') for label in labels]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(data) for data in encoded])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def unpack_labels(data: np.ndarray, offsets: np.ndarray) -> List[str]:
+    raw = data.tobytes()
+    return [raw[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def party_digest(party_name) -> int:
+    """规范化当事人名称的64位摘要，名称为空时为0"""
+    normalized = normalize_for_similarity(party_name)
+    if not normalized:
+        return 0
+    return int.from_bytes(hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+
+
+class NearDuplicateIndex:
+    """MinHash 签名 + LSH 分段索引"""
+
+    def __init__(self, filename: str, num_perm: int = 128, bands: int = 16, threshold: float = 0.8,
+                 shingle_size: int = 3, enabled: bool = True):
+        if num_perm % bands:
+            raise ValueError(f"签名长度 {num_perm} 必须能被分段数 {bands} 整除")
+        self.logger = logging.getLogger(__name__)
+        self.filename = filename
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.enabled = enabled
+
+        rng = np.random.default_rng(MINHASH_SEED)
+        self._perm_a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._perm_b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self._params = np.array([num_perm, bands, shingle_size, MINHASH_SEED], dtype=np.int64)
+        self._clear()
+        self._loaded = False
+
+    def _clear(self) -> None:
+        self._signatures = np.zeros((0, self.num_perm), dtype=np.uint32)
+        self._parties = np.zeros(0, dtype=np.uint64)
+        self._dedup_hashes = np.zeros(0, dtype=np.uint64)
+        self._labels: List[str] = []
+        self._build_bands()
+
+    @property
+    def built(self) -> bool:
+        """签名文件是否已建立"""
+        return os.path.exists(self.filename)
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        self._clear()
+        if not self.built:
+            return
+        try:
+            with np.load(self.filename) as content:
+                if not np.array_equal(content['params'], self._params):
+                    self.logger.info("近似重复检测参数已变化，签名需要重新建立")
+                    return
+                self._signatures = content['signatures']
+                self._parties = content['parties']
+                self._dedup_hashes = content['dedup_hashes']
+                if 'label_data' in content.files:
+                    self._labels = unpack_labels(content['label_data'], content['label_offsets'])
+                else:
+                    # 较早版本保存的定长字符串数组
+                    self._labels = content['labels'].tolist()
+            self._build_bands()
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.warning(f"读取近似重复签名失败，重新建立: {e}")
+            self._clear()
+
+    def empty_copy(self) -> 'NearDuplicateIndex':
+        """参数相同、只在内存中使用的空索引，用于同一批新记录之间的比较"""
+        index = NearDuplicateIndex('', self.num_perm, self.bands, self.threshold, self.shingle_size, self.enabled)
+        index._loaded = True
+        return index
+
+    def reload(self) -> None:
+        """丢弃内存中未保存的修改，下次使用时重新读取"""
+        self._loaded = False
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """规范化文本的 MinHash 签名，文本为空时返回None"""
+        normalized = normalize_for_similarity(text)
+        if not normalized:
+            return None
+        size = min(self.shingle_size, len(normalized))
+        shingles = {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+        hashes = pd.util.hash_array(np.array(list(shingles), dtype=object), categorize=False) & HASH_MASK
+        permuted = (np.outer(hashes, self._perm_a) + self._perm_b) >> np.uint64(32)
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def record_signature(self, record: Dict) -> Optional[np.ndarray]:
+        return self.signature(' '.join(str(record.get(field) or '') for field in SIMILARITY_FIELDS))
+
+    def _band_hashes(self, signatures: np.ndarray) -> np.ndarray:
+        """每段签名合并为一个64位哈希，返回 (记录数, 段数)"""
+        bands = signatures.reshape(len(signatures), self.bands, self.rows_per_band).astype(np.uint64)
+        hashes = np.zeros(bands.shape[:2], dtype=np.uint64)
+        for row in range(self.rows_per_band):
+            hashes = hashes * BAND_HASH_MULTIPLIER + bands[:, :, row]
+        return hashes
+
+    def _build_bands(self) -> None:
+        """各段哈希排序保存，查询时二分查找"""
+        band_hashes = self._band_hashes(self._signatures).T
+        self._band_order = np.argsort(band_hashes, axis=1, kind='stable')
+        self._sorted_bands = np.take_along_axis(band_hashes, self._band_order, axis=1)
+
+    def _candidates(self, signature: np.ndarray) -> np.ndarray:
+        band_hashes = self._band_hashes(signature[np.newaxis, :])[0]
+        found = []
+        for band, value in enumerate(band_hashes):
+            sorted_band = self._sorted_bands[band]
+            start = np.searchsorted(sorted_band, value, side='left')
+            end = np.searchsorted(sorted_band, value, side='right')
+            if end > start:
+                found.append(self._band_order[band, start:end])
+        if not found:
+            return np.zeros(0, dtype=np.intp)
+        return np.unique(np.concatenate(found))
+
+    def find(self, signature: np.ndarray, party: int, dedup_hash: int = 0,
+             active: Optional[np.ndarray] = None) -> Optional[Dict]:
+        """查找与签名近似重复、当事人相同的已有记录（同一去重键的精确重复不算），返回相似度最高的一条
+        active 为各条已有记录是否参与比较的布尔数组（如只与本批中之前保留的记录比较），默认全部参与"""
+        if not self.enabled or signature is None or not party:
+            return None
+        self._ensure_loaded()
+
+        candidates = self._candidates(signature)
+        if active is not None:
+            candidates = candidates[active[candidates]]
+        if len(candidates) == 0:
+            return None
+        candidates = candidates[(self._parties[candidates] == np.uint64(party))
+                                & (self._dedup_hashes[candidates] != np.uint64(dedup_hash))]
+        if len(candidates) == 0:
+            return None
+
+        similarities = (self._signatures[candidates] == signature).mean(axis=1)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        index = int(candidates[best])
+        return {'index': index, 'label': self._labels[index], 'similarity': float(similarities[best])}
+
+    def add(self, signatures: List[np.ndarray], parties: List[int], dedup_hashes: List[int],
+            labels: List[str], unique_keys: bool = True) -> int:
+        """加入一批记录（已有相同去重键的记录跳过），返回加入的记录数（需调用 save 持久化）
+        unique_keys 为 False 时全部按顺序加入（本批记录之间比较时，第 i 条即索引中的第 i 条）"""
+        if not self.enabled:
+            return 0
+        self._ensure_loaded()
+
+        dedup_array = np.array(dedup_hashes, dtype=np.uint64)
+        keep = np.ones(len(dedup_array), dtype=bool)
+        if unique_keys:
+            keep &= ~np.isin(dedup_array, self._dedup_hashes)
+            # 同一批中相同去重键只加入第一条
+            keep &= ~pd.Index(dedup_array).duplicated(keep='first')
+        if not keep.any():
+            return 0
+
+        self._signatures = np.vstack([self._signatures, np.array(signatures, dtype=np.uint32)[keep]])
+        self._parties = np.concatenate([self._parties, np.array(parties, dtype=np.uint64)[keep]])
+        self._dedup_hashes = np.concatenate([self._dedup_hashes, dedup_array[keep]])
+        self._labels.extend(label for label, kept in zip(labels, keep) if kept)
+        self._build_bands()
+        return int(keep.sum())
+
+    def rebuild(self) -> None:
+        """清空后重新建立（随后用 add 加入全部记录）"""
+        self._loaded = True
+        self._clear()
+
+    def save(self) -> None:
+        """写入临时文件后原子替换"""
+        if not self.enabled:
+            return
+        self._ensure_loaded()
+        try:
+            directory = os.path.dirname(self.filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_filename = f'{self.filename}.{os.getpid()}.tmp'
+            with open(temp_filename, 'wb') as f:
+                label_data, label_offsets = pack_labels(self._labels)
+                np.savez(f, params=self._params, signatures=self._signatures, parties=self._parties,
+                         dedup_hashes=self._dedup_hashes, label_data=label_data, label_offsets=label_offsets)
+            os.replace(temp_filename, self.filename)
+        except OSError as e:
+            self.logger.warning(f"保存近似重复签名失败: {e}")
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._signatures)
+
+
+# 全局近似重复索引实例
+near_duplicates = NearDuplicateIndex(
+    NEAR_DUPLICATE_CONFIG['filename'],
+    NEAR_DUPLICATE_CONFIG['num_perm'],
+    NEAR_DUPLICATE_CONFIG['bands'],
+    NEAR_DUPLICATE_CONFIG['threshold'],
+    NEAR_DUPLICATE_CONFIG['shingle_size'],
+    NEAR_DUPLICATE_CONFIG['enabled'],
+)
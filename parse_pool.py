@@ -0,0 +1,110 @@
+"""
+详情页解析进程池 - 浏览器抓取与表格解析并行
+抓取线程把详情页源码提交到进程池，由解析进程完成表格定位和记录解析。
+提交数量受 max_pending 限制（有界队列），避免抓取远快于解析时页面源码在内存中堆积。
+"""
+
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from metrics import stage_metrics, crawl_telemetry
+
+# 检测exe模式并导入相应配置
+if os.environ.get('NFRA_EXE_MODE') == '1':
+    # EXE模式：使用exe专用配置
+    from config_exe import LOGGING_CONFIG as LOG_CONFIG
+else:
+    # 正常模式：使用标准配置
+    from config import LOG_CONFIG
+
+
+# 默认解析进程数：每页解析只需几十毫秒，远小于请求间隔，一两个进程即可跟上抓取
+DEFAULT_MAX_WORKERS = 2
+
+# 解析进程内的爬虫实例（不启动浏览器，只使用其解析方法）
+_worker_crawler = None
+
+# 大于0时在本进程内解析、不使用进程池（剖析器只能观察本进程）
+_inline_depth = 0
+
+
+@contextmanager
+def inline_parsing():
+    """在此范围内详情页在抓取线程中逐条解析，不提交给解析进程池"""
+    global _inline_depth
+    _inline_depth += 1
+    try:
+        yield
+    finally:
+        _inline_depth -= 1
+
+
+def parsing_inline() -> bool:
+    """当前是否要求在本进程内解析"""
+    return _inline_depth > 0
+
+
+def _init_worker() -> None:
+    """解析进程初始化：日志只输出到控制台（日志文件由主进程写入），创建进程内共用的爬虫实例"""
+    global _worker_crawler
+    logging.basicConfig(level=getattr(logging, LOG_CONFIG['level']), format=LOG_CONFIG['format'],
+                        handlers=[logging.StreamHandler()])
+    from crawler import NFRACrawler
+    _worker_crawler = NFRACrawler()
+
+
+def parse_in_worker(page_source: str, href: str, title: str, publish_time: str, fetched_at: str):
+    """在解析进程中解析详情页，返回 (解析结果, 表格布局, 异常信息, 各阶段耗时, 计数器增量)"""
+    _worker_crawler.last_table_layout = None
+    _worker_crawler.last_detail_error = None
+
+    with stage_metrics.capture() as timings:
+        parse_start = time.perf_counter()
+        result = _worker_crawler.parse_detail_page(page_source, href, title, publish_time, fetched_at)
+        timings['detail_parse'] = time.perf_counter() - parse_start
+
+    return (result, _worker_crawler.last_table_layout, _worker_crawler.last_detail_error, timings,
+            crawl_telemetry.drain())
+
+
+class DetailParsePool:
+    """详情页解析进程池"""
+
+    def __init__(self, max_workers: int = None, max_pending: int = 8):
+        self.logger = logging.getLogger(__name__)
+        max_workers = max_workers or min(DEFAULT_MAX_WORKERS, os.cpu_count() or 1)
+        # 统一使用spawn方式启动解析进程，避免在已有浏览器驱动和后台线程的进程中fork
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.logger.info(f"解析进程池已启动，进程数: {max_workers}，最大排队数: {max_pending}")
+
+    def submit(self, page_source: str, href: str, title: str, publish_time: str, fetched_at: str) -> Future:
+        """提交一个详情页，排队数达到上限时阻塞等待"""
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(parse_in_worker, page_source, href, title, publish_time, fetched_at)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def close(self) -> None:
+        """等待已提交的任务完成并关闭进程池"""
+        self._executor.shutdown(wait=True)
+        self.logger.info("解析进程池已关闭")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,176 @@
+"""
+性能剖析模块 - 为命令行运行模式提供内置剖析开关
+支持三种剖析方式：
+  cprofile    - 确定性CPU剖析，输出pstats文件（可用 snakeviz / pstats 查看）
+  sampling    - 定时采样主线程调用栈，输出折叠栈文件（可用 flamegraph.pl / speedscope 生成火焰图）
+  tracemalloc - 内存分配剖析，输出按代码行汇总的Top-N分配报告
+剖析器只能观察本进程，剖析期间详情页解析不使用解析进程池，在抓取线程中逐条进行。
+"""
+
+import os
+import sys
+import io
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Optional
+
+from parse_pool import inline_parsing
+
+# 检测exe模式并导入相应配置
+if os.environ.get('NFRA_EXE_MODE') == '1':
+    # EXE模式：使用exe专用配置
+    from config_exe import PROFILE_CONFIG
+else:
+    # 正常模式：使用标准配置
+    from config import PROFILE_CONFIG
+
+
+PROFILERS = ('cprofile', 'sampling', 'tracemalloc')
+
+# 各剖析方式的输出文件扩展名
+PROFILE_EXTENSIONS = {
+    'cprofile': '.prof',
+    'sampling': '.folded',
+    'tracemalloc': '.txt',
+}
+
+
+def get_profile_filename(profiler: str, mode: str) -> str:
+    """生成剖析输出文件名，包含模式和时间戳"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f'{mode}_{profiler}_{timestamp}{PROFILE_EXTENSIONS[profiler]}'
+    return os.path.join(PROFILE_CONFIG['output_dir'], filename)
+
+
+class StackSampler:
+    """调用栈采样器：后台线程定时读取目标线程的栈帧并按折叠栈计数"""
+
+    def __init__(self, interval: float, target_thread_id: int = None):
+        self.interval = interval
+        self.target_thread_id = target_thread_id or threading.get_ident()
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+    def _sample_once(self) -> None:
+        frame = sys._current_frames().get(self.target_thread_id)
+        if frame is None:
+            return
+
+        labels = []
+        while frame is not None:
+            labels.append(self._frame_label(frame))
+            frame = frame.f_back
+        # 折叠栈格式：从根到叶，以分号分隔
+        self.stacks[';'.join(reversed(labels))] += 1
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self._sample_once()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def write_folded(self, filename: str) -> None:
+        """写入折叠栈文件，每行为“栈 次数”"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+def _format_tracemalloc_report(snapshot, top_n: int) -> str:
+    """生成按代码行汇总的内存分配报告"""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    ))
+    stats = snapshot.statistics('lineno')
+    current, peak = tracemalloc.get_traced_memory()
+
+    lines = [
+        f"当前已分配: {current / 1024 / 1024:.2f} MB，峰值: {peak / 1024 / 1024:.2f} MB",
+        f"分配位置 Top {top_n}：",
+    ]
+    for index, stat in enumerate(stats[:top_n], 1):
+        frame = stat.traceback[0]
+        lines.append(
+            f"#{index:<3} {frame.filename}:{frame.lineno}  "
+            f"{stat.size / 1024:.1f} KiB  ({stat.count} 个对象)"
+        )
+    total = sum(stat.size for stat in stats)
+    lines.append(f"合计: {total / 1024 / 1024:.2f} MB")
+    return '\n'.join(lines)
+
+
+def profile_call(profiler: Optional[str], mode: str, func: Callable, *args, **kwargs):
+    """在指定剖析方式下执行函数并写出剖析结果，profiler 为空时直接执行"""
+    if not profiler:
+        return func(*args, **kwargs)
+    if profiler not in PROFILERS:
+        raise ValueError(f"不支持的剖析方式: {profiler}")
+
+    logger = logging.getLogger(__name__)
+    os.makedirs(PROFILE_CONFIG['output_dir'], exist_ok=True)
+    filename = get_profile_filename(profiler, mode)
+    logger.info(f"已启用 {profiler} 剖析，结果将写入: {filename}（剖析期间详情页在本进程内解析）")
+    with inline_parsing():
+        return _profile_call(profiler, filename, func, *args, **kwargs)
+
+
+def _profile_call(profiler: str, filename: str, func: Callable, *args, **kwargs):
+    """按剖析方式执行函数并写出结果文件"""
+    logger = logging.getLogger(__name__)
+
+    start = time.perf_counter()
+    if profiler == 'cprofile':
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            profile.dump_stats(filename)
+            summary = io.StringIO()
+            pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(PROFILE_CONFIG['top_n'])
+            logger.debug(summary.getvalue())
+            logger.info(f"cProfile 剖析完成，耗时 {time.perf_counter() - start:.1f} 秒: {filename}")
+
+    elif profiler == 'sampling':
+        sampler = StackSampler(PROFILE_CONFIG['sampling_interval'])
+        sampler.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            sampler.stop()
+            sampler.write_folded(filename)
+            logger.info(f"采样剖析完成，共 {sum(sampler.stacks.values())} 个样本: {filename}")
+
+    else:
+        already_tracing = tracemalloc.is_tracing()
+        if not already_tracing:
+            tracemalloc.start(PROFILE_CONFIG['tracemalloc_frames'])
+        try:
+            return func(*args, **kwargs)
+        finally:
+            report = _format_tracemalloc_report(tracemalloc.take_snapshot(), PROFILE_CONFIG['top_n'])
+            if not already_tracing:
+                tracemalloc.stop()
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(report + '\n')
+            logger.info(f"内存分配剖析完成: {filename}")
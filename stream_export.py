@@ -0,0 +1,113 @@
+"""
+流式导出模块 - 详情记录边抓取边写出
+列表项 → 详情记录 → DataProcessor.clean_punishment_data → 输出文件，记录到达后立即写出，不在内存中累积。
+NDJSON 每写一条即刷新到磁盘，长时间运行中途中断时已抓取的记录不会丢失；
+Excel 使用 openpyxl 只写模式，行数据边写边落盘，内存占用不随记录数增长。
+"""
+
+import os
+import json
+import logging
+from typing import Dict, Iterable, List, Tuple
+
+from data_processor import DataProcessor
+from excel_writer import StreamingExcelWriter
+
+# 检测exe模式并导入相应配置
+if os.environ.get('NFRA_EXE_MODE') == '1':
+    # EXE模式：使用exe专用配置
+    from config_exe import STREAM_EXPORT_CONFIG
+else:
+    # 正常模式：使用标准配置
+    from config import STREAM_EXPORT_CONFIG
+
+
+class NDJSONSink:
+    """NDJSON输出：每行一条记录，逐条刷新"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(filename, 'a', encoding='utf-8')
+
+    def write(self, record: Dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+class ExcelStreamSink:
+    """Excel输出：openpyxl只写模式逐行追加，详情链接写为超链接"""
+
+    def __init__(self, filename: str, columns: List[str], sheet_name: str = '行政处罚信息'):
+        self.filename = filename
+        self.columns = columns
+        self._writer = StreamingExcelWriter(filename)
+        self._writer.begin_table(sheet_name, columns)
+
+    def write(self, record: Dict) -> None:
+        self._writer.append_row([record.get(col, '') for col in self.columns])
+
+    def close(self) -> None:
+        self._writer.save()
+
+
+class StreamExporter:
+    """流式导出器：清理每条记录并写入全部输出"""
+
+    def __init__(self, sinks: List, processor: DataProcessor = None):
+        self.logger = logging.getLogger(__name__)
+        self.processor = processor or DataProcessor()
+        self.sinks = sinks
+        self.total_count = 0
+        self.category_counts: Dict[str, int] = {}
+
+    def write(self, category: str, record: Dict) -> Dict:
+        """清理一条记录并写出，序号按到达顺序连续编号"""
+        cleaned = self.processor.clean_punishment_data(record)
+        cleaned['类别'] = category
+        merged = self.processor.to_merged_record(cleaned)
+
+        self.total_count += 1
+        merged['序号'] = self.total_count
+        self.category_counts[category] = self.category_counts.get(category, 0) + 1
+
+        for sink in self.sinks:
+            sink.write(merged)
+        return merged
+
+    def consume(self, records: Iterable[Tuple[str, Dict]]) -> int:
+        """写出 (类别, 记录) 流中的全部记录，返回写出的记录数"""
+        for category, record in records:
+            self.write(category, record)
+        return self.total_count
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                self.logger.error(f"关闭输出文件失败: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_stream_exporter(basename: str, formats: List[str] = None) -> StreamExporter:
+    """按配置的格式创建输出文件（basename 不含扩展名）"""
+    processor = DataProcessor()
+    formats = formats or STREAM_EXPORT_CONFIG['formats']
+    sinks = []
+    if 'ndjson' in formats:
+        sinks.append(NDJSONSink(f'{basename}.ndjson'))
+    if 'xlsx' in formats:
+        sinks.append(ExcelStreamSink(f'{basename}.xlsx', processor.merged_columns))
+    return StreamExporter(sinks, processor)
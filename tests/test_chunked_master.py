@@ -0,0 +1,154 @@
+"""
+测试分块（外存）处理：外存去重哈希索引、有序段归并，以及分块导出与整体导出结果一致
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+import master_store
+from chunked_master import ExternalHashIndex, SortedRunMerger, publish_sort_keys
+from data_processor import DataProcessor
+from master_store import MasterStore, SQLiteMasterStore
+
+
+def make_df(rows):
+    return pd.DataFrame([{
+        '标题': f'处罚决定书{name}',
+        '当事人名称': name,
+        '行政处罚内容': '罚款10万元' if number % 3 else '',
+        '行政处罚决定书文号': f'罚决字〔2025〕{number}号',
+        '作出决定机关': '菏泽监管分局',
+        '发布时间': publish_time,
+        '类别': category,
+        '详情链接': f'http://www.nfra.gov.cn/detail/{number}',
+    } for name, publish_time, number, category in rows])
+
+
+ROWS = [
+    ('甲银行', '2025-05-20', 1, '监管分局本级'),
+    ('乙银行', '2025-06-03', 2, '监管局本级'),
+    ('丙银行', '2025-06-03', 3, '监管分局本级'),
+    ('丁银行', '2024-12-01', 4, '总局机关'),
+    ('戊银行', '', 5, '监管分局本级'),
+    ('己银行', '2025-06-10 09:30', 6, '监管局本级'),
+    ('庚银行', '2025年6月3日', 7, '监管分局本级'),
+    ('辛银行', '2025-05-20', 8, '监管分局本级'),
+]
+
+
+def test_external_hash_index():
+    """测试跨块去重规则与整体去重一致，有序段合并后仍能查到全部哈希"""
+    processor = DataProcessor()
+    rng = np.random.default_rng(1)
+    hashes = rng.integers(0, 50, size=400).astype(np.uint64)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = ExternalHashIndex(tmp_dir, max_runs=2)
+        mask = np.concatenate([index.first_occurrence_mask(chunk) for chunk in np.array_split(hashes, 7)])
+        assert (mask == processor._first_occurrence_mask(hashes)).all()
+        assert len(index) == len(np.unique(hashes[hashes != 0]))
+        assert len(index._runs) <= 2
+        assert index.contains(np.array([hashes[-1], 1000], dtype=np.uint64)).tolist() == [True, False]
+
+
+def test_sorted_run_merger():
+    """测试多个有序段归并后按发布时间降序、相同时间保持输入顺序、无法解析的排最后"""
+    times = pd.Series(pd.to_datetime(['2025-06-01', None, '2025-06-03', '2025-06-01', '2025-07-01', None]))
+    df = pd.DataFrame({'名称': list('abcdef')})
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        runs = SortedRunMerger(tmp_dir)
+        for start in range(0, len(df), 2):
+            runs.add_run(df.iloc[start:start + 2], publish_sort_keys(times.iloc[start:start + 2]))
+        merged = [row[0] for row in runs.iter_rows(['名称'], 1)]
+    assert merged == ['e', 'c', 'a', 'd', 'b', 'f']
+    assert len(runs) == 6
+
+
+def test_chunked_export_matches_full_export():
+    """测试分块导出与整体导出的总表Excel内容一致（Parquet和SQLite数据源）"""
+    processor = DataProcessor()
+    original_config = master_store.CHUNKED_PROCESSING_CONFIG
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            master_store.CHUNKED_PROCESSING_CONFIG = {**original_config, 'spill_dir': os.path.join(tmp_dir, 'spill')}
+            stores = [MasterStore(os.path.join(tmp_dir, 'master_store')),
+                      SQLiteMasterStore(os.path.join(tmp_dir, 'master.db'))]
+            for store in stores:
+                store.upsert(make_df(ROWS), processor)
+                assert store.count() == len(ROWS)
+                assert not store.use_chunked()
+
+                full_filename = os.path.join(tmp_dir, 'full.xlsx')
+                chunked_filename = os.path.join(tmp_dir, 'chunked.xlsx')
+                assert store.export_excel(full_filename, processor, 2)
+                assert store.export_excel_chunked(chunked_filename, processor, 2, chunk_rows=3)
+
+                full_df = pd.read_excel(full_filename, sheet_name='行政处罚信息')
+                chunked_df = pd.read_excel(chunked_filename, sheet_name='行政处罚信息')
+                pd.testing.assert_frame_equal(full_df, chunked_df)
+                assert full_df['当事人名称'].iloc[0] == '己银行'
+                assert full_df['当事人名称'].iloc[-1] == '戊银行'
+
+                full_stats = pd.read_excel(full_filename, sheet_name='数据统计')
+                chunked_stats = pd.read_excel(chunked_filename, sheet_name='数据统计')
+                pd.testing.assert_frame_equal(full_stats[['分类', '记录数']], chunked_stats[['分类', '记录数']])
+            assert os.listdir(os.path.join(tmp_dir, 'spill')) == []
+    finally:
+        master_store.CHUNKED_PROCESSING_CONFIG = original_config
+
+
+def test_exports_apply_same_dedup():
+    """测试两种导出去重规则相同：跨分区的重复记录都去除，SQLite中按降级字段入库的记录都保留"""
+    processor = DataProcessor()
+    original_config = master_store.CHUNKED_PROCESSING_CONFIG
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            master_store.CHUNKED_PROCESSING_CONFIG = {**original_config, 'spill_dir': os.path.join(tmp_dir, 'spill')}
+
+            # 较早写入的数据中，发布时间写法变化的同一记录保存在了另一分区
+            parquet_store = MasterStore(os.path.join(tmp_dir, 'master_store'))
+            parquet_store.upsert(make_df(ROWS), processor)
+            june = pd.read_parquet(parquet_store.partition_path('2025', '06'))
+            moved = june[june['当事人名称'] == '乙银行'].assign(发布时间='2025-07-01')
+            parquet_store._write_partition(parquet_store.partition_path('2025', '07'), moved)
+            assert parquet_store.count() == len(ROWS) + 1
+
+            # 主要字段全部为空的记录按降级字段（当事人名称、违法行为、处罚内容）入库
+            sqlite_store = SQLiteMasterStore(os.path.join(tmp_dir, 'master.db'))
+            fallback_df = make_df([('', '2025-06-05', 9, '监管分局本级'), ('', '2025-06-04', 10, '监管分局本级')])
+            fallback_df['行政处罚决定书文号'] = ''
+            fallback_df['作出决定机关'] = ''
+            fallback_df['主要违法违规行为'] = ['违规发放贷款', '贷款管理不审慎']
+            sqlite_store.upsert(pd.concat([make_df(ROWS), fallback_df], ignore_index=True), processor)
+            assert sqlite_store.count() == len(ROWS) + 2
+
+            for store, expected in [(parquet_store, len(ROWS)), (sqlite_store, len(ROWS) + 2)]:
+                full_filename = os.path.join(tmp_dir, 'full.xlsx')
+                chunked_filename = os.path.join(tmp_dir, 'chunked.xlsx')
+                assert store.export_excel(full_filename, processor)
+                assert store.export_excel_chunked(chunked_filename, processor, chunk_rows=3)
+
+                full_df = pd.read_excel(full_filename, sheet_name='行政处罚信息')
+                chunked_df = pd.read_excel(chunked_filename, sheet_name='行政处罚信息')
+                assert len(full_df) == expected
+                pd.testing.assert_frame_equal(full_df, chunked_df)
+
+                full_stats = pd.read_excel(full_filename, sheet_name='数据统计').set_index('分类')
+                chunked_stats = pd.read_excel(chunked_filename, sheet_name='数据统计').set_index('分类')
+                assert full_stats.loc['总计', '记录数'] == chunked_stats.loc['总计', '记录数'] == expected
+    finally:
+        master_store.CHUNKED_PROCESSING_CONFIG = original_config
+
+
+if __name__ == "__main__":
+    test_external_hash_index()
+    test_sorted_run_merger()
+    test_chunked_export_matches_full_export()
+    test_exports_apply_same_dedup()
+    print("测试完成!")
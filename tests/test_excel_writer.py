@@ -0,0 +1,84 @@
+"""
+测试只写模式Excel导出
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from data_processor import DataProcessor
+from excel_writer import StreamingExcelWriter, read_excel_table, split_sheet_names
+from master_store import read_excel_hyperlinks
+
+
+def test_chunked_sheets_with_hyperlinks():
+    """测试超出单表行数后续写到新工作表，每个工作表带表头"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, 'out', 'chunked.xlsx')
+        writer = StreamingExcelWriter(filename, max_rows_per_sheet=2)
+        rows = [(i, f'当事人{i}', f'http://www.nfra.gov.cn/detail/{i}') for i in range(5)]
+        assert writer.write_table('行政处罚信息', ['序号', '当事人名称', '详情链接'], rows) == 5
+        writer.save()
+        assert writer.hyperlink_count == 5
+
+        workbook = load_workbook(filename)
+        assert workbook.sheetnames == ['行政处罚信息', '行政处罚信息_2', '行政处罚信息_3']
+        last_sheet = workbook['行政处罚信息_3']
+        assert [cell.value for cell in last_sheet[1]] == ['序号', '当事人名称', '详情链接']
+        assert last_sheet['B2'].value == '当事人4'
+        assert last_sheet['C2'].value == '查看详情'
+        assert last_sheet['C2'].hyperlink.target == 'http://www.nfra.gov.cn/detail/4'
+        assert last_sheet['C2'].font.underline == 'single'
+
+
+def test_read_split_sheets():
+    """测试续写到多个工作表的表按顺序合并读取，详情链接从各工作表的超链接恢复"""
+    assert split_sheet_names(['数据统计', '行政处罚信息_10', '行政处罚信息', '行政处罚信息_2', '行政处罚信息x']) == [
+        '行政处罚信息', '行政处罚信息_2', '行政处罚信息_10']
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, 'split.xlsx')
+        writer = StreamingExcelWriter(filename, max_rows_per_sheet=2)
+        rows = [(i, f'当事人{i}', f'http://www.nfra.gov.cn/detail/{i}') for i in range(5)]
+        writer.write_table('行政处罚信息', ['序号', '当事人名称', '详情链接'], rows)
+        writer.write_table('数据统计', ['分类', '记录数'], [('总计', 5)])
+        writer.save()
+
+        df = read_excel_table(filename)
+        assert df['序号'].tolist() == [0, 1, 2, 3, 4]
+        assert read_excel_hyperlinks(filename, df['详情链接']) == [row[2] for row in rows]
+        assert read_excel_table(filename, '数据统计')['记录数'].tolist() == [5]
+
+
+def test_write_excel_with_hyperlinks():
+    """测试DataProcessor导出主数据表和统计表"""
+    processor = DataProcessor()
+    df = pd.DataFrame([
+        {'序号': 1, '当事人名称': '甲银行', '作出决定机关': float('nan'), '详情链接': 'http://www.nfra.gov.cn/detail/1'},
+        {'序号': 2, '当事人名称': '乙银行', '作出决定机关': '菏泽监管分局', '详情链接': ''},
+    ])
+    stats = [{'分类': '总计', '记录数': 2, '最后更新': '2025-06-01 00:00:00'}]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, 'report.xlsx')
+        assert processor.write_excel_with_hyperlinks(df, filename, True, {}, stats)
+
+        workbook = load_workbook(filename)
+        assert workbook.sheetnames == ['行政处罚信息', '数据统计']
+        sheet = workbook['行政处罚信息']
+        assert sheet['C2'].value is None
+        assert sheet['D2'].hyperlink.target == 'http://www.nfra.gov.cn/detail/1'
+        assert sheet['D3'].hyperlink is None
+        assert workbook['数据统计']['B2'].value == 2
+
+
+if __name__ == "__main__":
+    test_chunked_sheets_with_hyperlinks()
+    test_read_split_sheets()
+    test_write_excel_with_hyperlinks()
+    print("测试完成!")
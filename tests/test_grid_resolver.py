@@ -0,0 +1,59 @@
+"""
+测试合并单元格网格展开
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from grid_resolver import resolve_merged_rows
+
+
+def make_rows(html):
+    return BeautifulSoup(f'<table>{html}</table>', 'html.parser').find_all('tr')
+
+
+def test_rowspan_and_colspan():
+    """测试跨行、跨列单元格展开和空单元格继承"""
+    headers = ['序号', '当事人名称', '行政处罚内容', '作出决定机关']
+    rows = make_rows(
+        '<tr><td>1</td><td>甲公司</td><td rowspan="2">罚款10万元</td><td rowspan="3">某监管局</td></tr>'
+        '<tr><td>2</td><td>乙公司</td></tr>'
+        '<tr><td>3</td><td colspan="2">丙公司</td></tr>'
+        '<tr><td>4</td><td>丁</td><td></td></tr>'
+    )
+
+    resolved = list(resolve_merged_rows(headers, rows))
+
+    assert [row_idx for row_idx, _ in resolved] == [0, 1, 2, 3]
+    assert resolved[1][1] == {'行政处罚内容': '罚款10万元', '作出决定机关': '某监管局', '序号': '2', '当事人名称': '乙公司'}
+    assert resolved[2][1]['行政处罚内容'] == '丙公司'
+    # 空单元格从上方覆盖本行的合并单元格继承
+    assert resolved[3][1]['作出决定机关'] == '某监管局'
+
+
+def test_linear_in_table_height():
+    """测试大量空单元格时仍为线性耗时"""
+    headers = ['序号', '当事人名称', '主要违法违规行为', '行政处罚内容']
+    rows = make_rows(''.join(
+        f'<tr><td>{i}</td><td>公司{i}</td><td></td>'
+        + ('<td rowspan="3000">警告</td>' if i == 0 else '')
+        + '</tr>'
+        for i in range(3000)
+    ))
+
+    start = time.perf_counter()
+    resolved = list(resolve_merged_rows(headers, rows))
+    assert len(resolved) == 3000
+    assert resolved[-1][1]['行政处罚内容'] == '警告'
+    assert time.perf_counter() - start < 2.0
+
+
+if __name__ == "__main__":
+    test_rowspan_and_colspan()
+    test_linear_in_table_height()
+    print("测试完成!")
@@ -0,0 +1,51 @@
+"""
+测试表头字段映射规则
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from header_matcher import KeywordAutomaton, horizontal_matcher, key_value_matcher
+
+
+def test_keyword_automaton():
+    """测试一次扫描找出所有关键词（包括互相重叠的关键词）"""
+    automaton = KeywordAutomaton(['处罚', '行政处罚', '处罚依据', '机关'])
+    assert automaton.find_all('行政处罚依据') == {'处罚', '行政处罚', '处罚依据'}
+    assert automaton.find_all('决定书文号') == set()
+
+
+def test_horizontal_plan():
+    """测试横向表头按规则优先级映射"""
+    headers = ['序号', '当事人名称', '主要违法违规行为', '行政处罚内容', '作出决定机关', '行政处罚依据', '备注']
+    assert horizontal_matcher.plan(headers) == [
+        '序号', '当事人名称', '主要违法违规行为', '行政处罚内容', '作出决定机关',
+        # "行政处罚" 规则优先于 "处罚依据" 规则
+        '行政处罚内容',
+        '备注',
+    ]
+    assert horizontal_matcher.field_for('决定日期') == '作出决定日期'
+    # 包含 "处罚决定" 的日期表头按原有优先级归入处罚内容
+    assert horizontal_matcher.field_for('作出处罚决定的日期') == '行政处罚内容'
+    assert horizontal_matcher.field_for('决定书文号') == '行政处罚决定书文号'
+
+
+def test_key_value_rules():
+    """测试键值对左列的精确匹配、包含匹配和排除词"""
+    assert key_value_matcher.field_for('行政处罚依据') == '行政处罚依据'
+    assert key_value_matcher.field_for('行政处罚决定') == '行政处罚内容'
+    assert key_value_matcher.field_for('作出行政处罚决定的机关名称') == '作出决定机关'
+    assert key_value_matcher.field_for('作出处罚决定的日期') == '作出决定日期'
+    assert key_value_matcher.field_for('处罚决定日期（公开）') == '作出决定日期'
+    assert key_value_matcher.field_for('行政处罚决定日期') == '作出决定日期'
+    assert key_value_matcher.field_for('被处罚当事人姓名') == '当事人名称'
+    assert key_value_matcher.field_for('其他说明') == '其他说明'
+
+
+if __name__ == "__main__":
+    test_keyword_automaton()
+    test_horizontal_plan()
+    test_key_value_rules()
+    print("测试完成!")
@@ -0,0 +1,65 @@
+"""
+测试lxml表格定位与整页html.parser解析结果一致，以及从页面源码提取发布时间
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler import NFRACrawler
+from html_tables import (_find_tables_with_lxml, _find_tables_with_soup, _parse_with_lxml, _parse_with_soup,
+                         find_punishment_tables, find_publish_time)
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+PAGE_SOURCES = ['merged_cells_page_source.html', 'page_source_debug.html']
+
+
+def test_same_records_as_full_parse():
+    """测试两种方式解析出的表格和记录完全一致"""
+    spider = NFRACrawler()
+
+    for filename in PAGE_SOURCES:
+        with open(os.path.join(TEST_DIR, filename), encoding='utf-8') as f:
+            page_source = f.read()
+
+        old_tables = _find_tables_with_soup(page_source)
+        new_tables = _find_tables_with_lxml(page_source)
+        assert len(old_tables) == len(new_tables) > 0
+
+        for old_table, new_table in zip(old_tables, new_tables):
+            assert old_table.get_text() == new_table.get_text()
+            assert spider.parse_table_from_soup(old_table) == spider.parse_table_from_soup(new_table)
+
+
+def test_fallback_to_any_table():
+    """测试没有Word样式表格时退回查找所有表格"""
+    page_source = '<html><body><table><tr><td>当事人名称</td><td>某公司</td></tr></table></body></html>'
+    tables = find_punishment_tables(page_source)
+    assert len(tables) == 1
+    assert tables[0].find('td').get_text() == '当事人名称'
+    assert find_punishment_tables('') == []
+
+
+def test_publish_time_from_page_source():
+    """测试从详情页源码提取发布时间"""
+    expected = {'merged_cells_page_source.html': '2025-06-03', 'page_source_debug.html': '2024-07-12'}
+    for filename, publish_time in expected.items():
+        with open(os.path.join(TEST_DIR, filename), encoding='utf-8') as f:
+            page_source = f.read()
+        assert _parse_with_lxml(page_source)[1] == publish_time
+        assert _parse_with_soup(page_source)[1] == publish_time
+
+    # 元素文本优先，其次按源码模式查找
+    page_source = '<div><span class="ng-binding">发布时间：2025-03-07</span></div><p>日期：2024-01-01</p>'
+    assert find_publish_time(page_source) == '2025-03-07'
+    assert find_publish_time('<p>成文日期：2024/1/5</p>') == '2024/1/5'
+    assert find_publish_time('<p>无时间信息</p>') == ''
+    assert find_publish_time('') == ''
+
+
+if __name__ == "__main__":
+    test_same_records_as_full_parse()
+    test_fallback_to_any_table()
+    test_publish_time_from_page_source()
+    print("测试完成!")
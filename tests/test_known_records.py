@@ -0,0 +1,143 @@
+"""
+测试已知记录索引：布隆过滤器 + 精确摘要集合，以及抓取详情页前跳过已知记录
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+import data_processor
+from crawler import NFRACrawler
+from data_processor import DataProcessor
+from known_records import KnownRecordIndex, key_digest, record_keys
+from master_store import SQLiteMasterStore
+from near_duplicates import NearDuplicateIndex
+
+
+def test_index_membership_and_persistence():
+    """测试加入的键全部命中、未加入的键不命中，保存后可重新加载"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, 'cache', 'known_records.npz')
+        index = KnownRecordIndex(filename, 0.01)
+        assert not index.built
+        assert not index.contains(['url:a'])
+
+        keys = [f'url:http://www.nfra.gov.cn/detail/{i}' for i in range(5000)]
+        assert index.add(keys[:100]) == 100
+        # 超出容量后重建布隆过滤器
+        assert index.add(keys) == 4900
+        assert index.add(keys[:10]) == 0
+        assert all(index.contains([key]) for key in keys)
+        assert not any(index.contains([f'url:other/{i}']) for i in range(2000))
+
+        # 布隆过滤器本身的误判率接近配置值
+        false_positives = sum(index._might_contain(key_digest(f'title:新记录{i}')) for i in range(20000))
+        assert false_positives < 20000 * 0.03
+
+        index.save()
+        reloaded = KnownRecordIndex(filename, 0.01)
+        assert reloaded.built
+        assert len(reloaded) == 5000
+        assert reloaded.contains(['url:none', keys[1234]])
+        assert reloaded.source == ''
+
+        reloaded.source = 'sqlite|/data/master.db|5000'
+        reloaded.save()
+        assert KnownRecordIndex(filename, 0.01).source == 'sqlite|/data/master.db|5000'
+
+
+def test_record_keys():
+    """测试识别键：标题中没有决定书文号时只使用详情链接"""
+    assert record_keys('http://a ', '标题', '') == ['url:http://a']
+    assert record_keys('', '标题（罚决字〔2025〕1号）', '罚决字〔2025〕1号') == ['title:标题（罚决字〔2025〕1号）|罚决字〔2025〕1号']
+
+    processor = DataProcessor()
+    keys = processor.known_record_keys(float('nan'), ' 菏泽监管分局行政处罚信息公开表（菏金罚决字〔2025〕12号） ')
+    assert keys == ['title:菏泽监管分局行政处罚信息公开表（菏金罚决字〔2025〕12号）|菏金罚决字〔2025〕12号']
+    assert processor.known_record_keys(None, '行政处罚信息公开表') == []
+
+
+def make_master_df(numbers):
+    return pd.DataFrame([{
+        '标题': f'行政处罚信息公开表{number}',
+        '当事人名称': f'银行{number}',
+        '行政处罚决定书文号': f'罚决字〔2025〕{number}号',
+        '作出决定机关': '菏泽监管分局',
+        '发布时间': '2025-06-03',
+        '详情链接': f'http://www.nfra.gov.cn/detail/{number}',
+    } for number in numbers])
+
+
+def test_index_rebuilt_when_master_changes():
+    """测试索引随总表更新同步增加；总表在别处变化（记录数与保存的标识不一致）时由总表重新建立"""
+    processor = DataProcessor()
+    originals = (data_processor.known_records, data_processor.master_store,
+                 data_processor.near_duplicates, data_processor.MASTER_STORE_CONFIG)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index_filename = os.path.join(tmp_dir, 'known_records.npz')
+            store = SQLiteMasterStore(os.path.join(tmp_dir, 'master.db'))
+            data_processor.known_records = KnownRecordIndex(index_filename)
+            data_processor.master_store = store
+            data_processor.near_duplicates = NearDuplicateIndex(os.path.join(tmp_dir, 'near_duplicates.npz'))
+            data_processor.MASTER_STORE_CONFIG = {**originals[3], 'enabled': True, 'export_excel_on_update': False,
+                                                  'excel_filename': os.path.join(tmp_dir, 'master.xlsx')}
+
+            store.upsert(make_master_df([1]), processor)
+            assert processor.prepare_known_records()
+            assert KnownRecordIndex(index_filename).source == store.fingerprint()
+
+            # 本程序更新总表时索引同步增加，标识随之更新
+            assert processor.update_master_store(make_master_df([2]))
+            assert KnownRecordIndex(index_filename).source == store.fingerprint()
+            assert KnownRecordIndex(index_filename).contains(['url:http://www.nfra.gov.cn/detail/2'])
+
+            # 总表在别处更新后重新建立
+            store.upsert(make_master_df([3]), processor)
+            assert not KnownRecordIndex(index_filename).contains(['url:http://www.nfra.gov.cn/detail/3'])
+            data_processor.known_records = KnownRecordIndex(index_filename)
+            assert processor.prepare_known_records()
+            reloaded = KnownRecordIndex(index_filename)
+            assert reloaded.contains(['url:http://www.nfra.gov.cn/detail/3'])
+            assert reloaded.source == store.fingerprint()
+    finally:
+        (data_processor.known_records, data_processor.master_store,
+         data_processor.near_duplicates, data_processor.MASTER_STORE_CONFIG) = originals
+
+
+def test_iter_details_skips_known_items():
+    """测试设置已知记录过滤后不再抓取已知记录的详情页"""
+    processor = DataProcessor()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = KnownRecordIndex(os.path.join(tmp_dir, 'known_records.npz'))
+        master_df = pd.DataFrame({'标题': ['公开表（商金监罚决字〔2025〕13号）', '公开表'],
+                                  '详情链接': ['', 'http://www.nfra.gov.cn/detail/2']})
+        index.rebuild(processor._dataframe_known_keys(master_df))
+
+        crawler = NFRACrawler()
+        crawler.get_parse_pool = lambda: None
+        fetched = []
+        crawler.process_link_with_new_window = lambda url, title, page: fetched.append(url) or {'当事人名称': title}
+        crawler.known_item_filter = lambda item: index.contains(
+            processor.known_record_keys(item.get('detail_url'), item.get('title')))
+
+        items = [
+            {'title': '公开表（商金监罚决字〔2025〕13号）', 'detail_url': 'http://www.nfra.gov.cn/detail/1'},
+            {'title': '公开表', 'detail_url': 'http://www.nfra.gov.cn/detail/2'},
+            {'title': '公开表', 'detail_url': 'http://www.nfra.gov.cn/detail/3'},
+        ]
+        records = list(crawler.iter_details('监管分局本级', items))
+        assert fetched == ['http://www.nfra.gov.cn/detail/3']
+        assert len(records) == 1
+
+
+if __name__ == "__main__":
+    test_index_membership_and_persistence()
+    test_record_keys()
+    test_index_rebuilt_when_master_changes()
+    test_iter_details_skips_known_items()
+    print("测试完成!")
@@ -0,0 +1,206 @@
+"""
+测试总表数据源：按发布年月分区的Parquet数据集和SQLite数据库
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+import data_processor
+from data_processor import DataProcessor
+from known_records import KnownRecordIndex
+from master_store import (DEDUP_HASH_COLUMN, PUBLISH_TS_COLUMN, MasterStore, SQLiteMasterStore, dedup_key,
+                          partition_of)
+from near_duplicates import NearDuplicateIndex
+from utils import optimize_dtypes
+
+
+def make_df(rows):
+    return pd.DataFrame([{
+        '序号': i,
+        '标题': f'处罚决定书{name}',
+        '当事人名称': name,
+        '行政处罚决定书文号': f'罚决字〔2025〕{number}号',
+        '作出决定机关': '菏泽监管分局',
+        '发布时间': publish_time,
+        '类别': '监管分局本级',
+        '详情链接': f'http://www.nfra.gov.cn/detail/{number}',
+    } for i, (name, publish_time, number) in enumerate(rows, 1)])
+
+
+def test_partition_of():
+    """测试发布时间分区"""
+    assert partition_of('2025-06-03') == ('2025', '06')
+    assert partition_of('2025/6/3') == ('2025', '06')
+    assert partition_of('2024年12月1日') == ('2024', '12')
+    assert partition_of('') == ('unknown', 'unknown')
+    assert partition_of(None) == ('unknown', 'unknown')
+
+
+def test_upsert_touches_only_affected_partitions():
+    """测试更新只写入新数据所在分区并在分区内去重"""
+    processor = DataProcessor()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = MasterStore(os.path.join(tmp_dir, 'master_store'))
+        assert store.is_empty()
+
+        added = store.upsert(make_df([('甲银行', '2025-05-20', 1), ('乙银行', '2025-06-03', 2)]), processor)
+        assert added == 2
+        assert len(store.partition_files()) == 2
+
+        may_partition = store.partition_path('2025', '05')
+        may_mtime = os.path.getmtime(may_partition)
+
+        # 重复记录去重，5月分区不被改写
+        added = store.upsert(make_df([('乙银行', '2025-06-03', 2), ('丙银行', '2025-06-10', 3)]), processor)
+        assert added == 1
+        assert os.path.getmtime(may_partition) == may_mtime
+
+        all_df = store.read_all()
+        assert sorted(all_df['当事人名称']) == ['丙银行', '乙银行', '甲银行']
+        # 解析好的发布时间和去重哈希随分区保存
+        partition_df = pd.read_parquet(may_partition)
+        assert str(partition_df[PUBLISH_TS_COLUMN].dtype).startswith('datetime64')
+        assert partition_df[DEDUP_HASH_COLUMN].dtype == 'uint64'
+
+        excel_filename = os.path.join(tmp_dir, '总表.xlsx')
+        assert store.export_excel(excel_filename, processor, added)
+        sheet = load_workbook(excel_filename)['行政处罚信息']
+        rows = list(sheet.iter_rows(values_only=True))
+        assert list(rows[0]) == processor.merged_columns
+        # 按发布时间降序排列并重新编号
+        assert [row[0] for row in rows[1:]] == [1, 2, 3]
+        assert rows[1][2] == '丙银行'
+
+        # 导出的Excel可重新导入，详情链接从超链接恢复
+        imported_store = MasterStore(os.path.join(tmp_dir, 'imported'))
+        assert imported_store.import_excel(excel_filename, processor) == 3
+        links = set(imported_store.read_all()['详情链接'])
+        assert 'http://www.nfra.gov.cn/detail/1' in links
+
+
+def test_upsert_dedups_across_partitions():
+    """测试发布时间曾为空或写法变化的记录不会在另一分区重复入库"""
+    processor = DataProcessor()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = MasterStore(os.path.join(tmp_dir, 'master_store'))
+        assert store.upsert(make_df([('甲银行', '', 1)]), processor) == 1
+        assert store.upsert(make_df([('甲银行', '2025-06-03', 1), ('乙银行', '2025-06-03', 2)]), processor) == 1
+        # 同一批中落在不同分区的相同记录只保留第一条
+        assert store.upsert(make_df([('丙银行', '2025-05-01', 3), ('丙银行', '2025-07-01', 3)]), processor) == 1
+
+        all_df = store.read_all()
+        assert sorted(all_df['当事人名称']) == ['丙银行', '乙银行', '甲银行']
+        assert len(store.stored_dedup_hashes(processor)) == 3
+
+
+def test_update_with_categorical_frame():
+    """测试分类类型列（含缺失值）的合并结果可以写入各数据源和总表Excel"""
+    processor = DataProcessor()
+    originals = (data_processor.master_store, data_processor.MASTER_STORE_CONFIG,
+                 data_processor.known_records, data_processor.near_duplicates)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_processor.known_records = KnownRecordIndex(os.path.join(tmp_dir, 'known_records.npz'))
+            data_processor.near_duplicates = NearDuplicateIndex(os.path.join(tmp_dir, 'near_duplicates.npz'))
+            stores = [MasterStore(os.path.join(tmp_dir, 'master_store')),
+                      SQLiteMasterStore(os.path.join(tmp_dir, 'master.db')), None]
+            for number, store in enumerate(stores):
+                df = make_df([('甲银行', '2025-06-03', 1), ('乙银行', '', 2), ('丙银行', '2025-05-20', 3)])
+                df.loc[1, '类别'] = np.nan
+                df = optimize_dtypes(df)
+                assert isinstance(df['类别'].dtype, pd.CategoricalDtype)
+
+                excel_filename = os.path.join(tmp_dir, f'master_{number}.xlsx')
+                data_processor.master_store = store or originals[0]
+                data_processor.MASTER_STORE_CONFIG = {**originals[1], 'enabled': store is not None,
+                                                      'export_excel_on_update': True, 'excel_filename': excel_filename}
+                assert processor.update_master_excel(df)
+                assert processor.update_master_excel(df)
+
+                master_df = processor.read_master_records()
+                assert sorted(master_df['当事人名称']) == ['丙银行', '乙银行', '甲银行']
+                assert len(pd.read_excel(excel_filename, sheet_name='行政处罚信息')) == 3
+    finally:
+        (data_processor.master_store, data_processor.MASTER_STORE_CONFIG,
+         data_processor.known_records, data_processor.near_duplicates) = originals
+
+
+def test_sqlite_upsert_on_dedup_key():
+    """测试SQLite按去重键写入，已存在的记录保留原值"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = SQLiteMasterStore(os.path.join(tmp_dir, 'db', 'master.db'))
+        assert store.is_empty()
+
+        assert store.upsert(make_df([('甲银行', '2025-05-20', 1), ('乙银行', '2025-06-03', 2)])) == 2
+        second = make_df([('乙银行', '2025-07-01', 2), ('丙银行', '2025-06-10', 3), ('丙银行', '2025-06-10', 3)])
+        assert store.upsert(second) == 1
+        assert not store.is_empty()
+
+        all_df = store.read_all()
+        assert list(all_df['当事人名称']) == ['甲银行', '乙银行', '丙银行']
+        assert all_df.loc[1, '发布时间'] == '2025-06-03'
+
+        # 主要字段为空时使用降级字段，均为空时不入库
+        empty_primary = pd.DataFrame([
+            {'主要违法违规行为': '违规放贷', '行政处罚内容': '罚款10万元'},
+            {'主要违法违规行为': '违规放贷', '行政处罚内容': '罚款10万元'},
+            {'标题': '只有标题'},
+        ])
+        assert store.upsert(empty_primary) == 1
+        assert len(store.read_all()) == 4
+
+        conn = store._connect()
+        try:
+            assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        finally:
+            conn.close()
+
+
+def test_deduplicate_records_hash_keys():
+    """测试哈希去重键：保留第一条，去除空键记录，已保存的哈希直接使用"""
+    processor = DataProcessor()
+    df = pd.DataFrame({
+        '当事人名称': ['甲银行', '甲银行', '', None, '乙银行', '甲银行'],
+        '行政处罚决定书文号': ['1号', '1号', ' ', '|', '1号', '2号'],
+        '作出决定机关': ['分局', '分局', '', '', '分局', '分局'],
+        '序号': [1, 2, 3, 4, 5, 6],
+    })
+    assert list(processor.deduplicate_records(df.copy())['序号']) == [1, 5, 6]
+
+    # 去重哈希列已存在时不重新计算
+    cached = df.copy()
+    cached[DEDUP_HASH_COLUMN] = processor.dedup_hashes(cached, ['当事人名称', '行政处罚决定书文号', '作出决定机关'])
+    cached.loc[4, DEDUP_HASH_COLUMN] = cached.loc[0, DEDUP_HASH_COLUMN]
+    assert list(processor.deduplicate_records(cached)['序号']) == [1, 6]
+
+    # 降级字段
+    fallback = pd.DataFrame({'主要违法违规行为': ['违规放贷', '违规放贷', ''], '行政处罚内容': ['警告', '警告', '']})
+    assert len(processor.deduplicate_records(fallback)) == 1
+
+
+def test_dedup_key():
+    """测试去重键"""
+    record = {col: '' for col in ['当事人名称', '行政处罚决定书文号', '作出决定机关', '主要违法违规行为', '行政处罚内容']}
+    assert dedup_key(record) is None
+    record['行政处罚内容'] = '警告'
+    assert dedup_key(record) == 'fallback:||警告'
+    record['当事人名称'] = '甲银行'
+    assert dedup_key(record) == '甲银行||'
+
+
+if __name__ == "__main__":
+    test_partition_of()
+    test_upsert_touches_only_affected_partitions()
+    test_upsert_dedups_across_partitions()
+    test_update_with_categorical_frame()
+    test_sqlite_upsert_on_dedup_key()
+    test_deduplicate_records_hash_keys()
+    test_dedup_key()
+    print("测试完成!")
@@ -0,0 +1,114 @@
+"""
+测试阶段耗时统计功能
+"""
+
+import os
+import sys
+import json
+import tempfile
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import (
+    StageMetrics, MAX_SAMPLES_PER_STAGE, crawl_telemetry, percentile,
+    render_metrics, stage_metrics, start_metrics_server,
+)
+
+
+def test_percentile():
+    """测试分位数计算"""
+    samples = sorted(float(i) for i in range(1, 101))
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 95) == 95.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_stage_summary_by_category():
+    """测试按阶段和类别聚合"""
+    metrics = StageMetrics()
+
+    metrics.set_category('总局机关')
+    for duration in [0.1, 0.2, 0.3]:
+        metrics.record('page_load', duration)
+
+    with metrics.span('dedup', '汇总'):
+        pass
+
+    rows = {(row['stage'], row['category']): row for row in metrics.summary()}
+
+    assert rows[('page_load', '总局机关')]['count'] == 3
+    assert rows[('page_load', '总局机关')]['p50'] == 0.2
+    assert rows[('dedup', '汇总')]['count'] == 1
+    print(metrics.format_report())
+
+
+def test_dump_json():
+    """测试写入JSON文件"""
+    metrics = StageMetrics()
+    metrics.record('excel_write', 1.5, '汇总')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, 'metrics', 'test.json')
+        assert metrics.dump_json(filename, {'mode': 'test'})
+
+        with open(filename, encoding='utf-8') as f:
+            payload = json.load(f)
+
+    assert payload['mode'] == 'test'
+    assert payload['stages'][0]['stage'] == 'excel_write'
+
+
+def test_samples_bounded():
+    """测试样本数量有上限，计数和最大值不受影响"""
+    metrics = StageMetrics()
+    for i in range(MAX_SAMPLES_PER_STAGE + 500):
+        metrics.record('wait', i / 1000.0, '总局机关')
+
+    row = metrics.summary()[0]
+    assert row['count'] == MAX_SAMPLES_PER_STAGE + 500
+    assert row['max'] == round((MAX_SAMPLES_PER_STAGE + 499) / 1000.0, 4)
+    assert len(metrics._stats[('wait', '总局机关')].samples) == MAX_SAMPLES_PER_STAGE
+
+
+def test_metrics_endpoint():
+    """测试指标HTTP端点输出"""
+    crawl_telemetry.inc('pages_scanned', category='监管局本级')
+    stage_metrics.record('page_load', 0.3, '监管局本级')
+
+    text = render_metrics()
+    assert 'nfra_pages_scanned_total{category="监管局本级"}' in text
+    # 文本格式中计数器族名与样本名一致，OpenMetrics 中族名不带 _total
+    assert '# TYPE nfra_pages_scanned_total counter' in text
+    assert '# TYPE nfra_pages_scanned counter' in render_metrics(openmetrics=True)
+    assert 'nfra_stage_duration_seconds_bucket{stage="page_load",category="监管局本级",le="0.5"}' in text
+    assert not text.rstrip().endswith('# EOF')
+
+    # 默认只监听本机
+    server = start_metrics_server(0)
+    assert server is not None
+    try:
+        assert server.server_address[0] == '127.0.0.1'
+        port = server.server_address[1]
+        request = urllib.request.Request(
+            f'http://127.0.0.1:{port}/metrics',
+            headers={'Accept': 'application/openmetrics-text'},
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            body = response.read().decode('utf-8')
+            assert response.headers['Content-Type'].startswith('application/openmetrics-text')
+        assert body.rstrip().endswith('# EOF')
+        assert 'nfra_inflight_fetches 0' in body
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_percentile()
+    test_stage_summary_by_category()
+    test_dump_json()
+    test_samples_bounded()
+    test_metrics_endpoint()
+    print("测试完成!")
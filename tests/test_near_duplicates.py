@@ -0,0 +1,123 @@
+"""
+测试MinHash + LSH近似重复检测
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+import data_processor
+from data_processor import DataProcessor
+from known_records import KnownRecordIndex
+from near_duplicates import NearDuplicateIndex, normalize_for_similarity, pack_labels, party_digest, unpack_labels
+
+VIOLATION = '贷款“三查”不尽职，信贷资金被挪用；违规向关系人发放信用贷款'
+CONTENT = '对该行罚款合计80万元；对相关责任人员给予警告并罚款5万元'
+
+
+def make_record(party, violation=VIOLATION, content=CONTENT, number='菏金罚决字〔2025〕12号'):
+    return {'标题': f'行政处罚信息公开表（{number}）', '当事人名称': party, '主要违法违规行为': violation,
+            '行政处罚内容': content, '行政处罚决定书文号': number, '作出决定机关': '菏泽监管分局'}
+
+
+def test_normalize_for_similarity():
+    """测试全角半角、空白和标点差异规范化后一致"""
+    assert normalize_for_similarity('某银行（菏泽分行）　 罚款 80 万元。') == \
+        normalize_for_similarity('某银行(菏泽分行)罚款80万元')
+    assert normalize_for_similarity(None) == ''
+    assert party_digest(' ') == 0
+    assert party_digest('某银行（菏泽分行）') == party_digest('某银行 (菏泽分行)')
+
+
+def test_pack_labels():
+    """测试标签按 UTF-8 拼接保存后原样恢复，不按最长标签补齐"""
+    labels = ['', '短', '行政处罚信息公开表（菏金罚决字〔2025〕12号）（某农村商业银行股份有限公司）' * 10]
+    data, offsets = pack_labels(labels)
+    assert data.dtype == np.uint8 and len(data) == sum(len(label.encode('utf-8')) for label in labels)
+    assert unpack_labels(data, offsets) == labels
+    assert unpack_labels(*pack_labels([])) == []
+
+
+def test_index_finds_near_duplicates():
+    """测试格式稍有不同的重新发布记录被识别，不同当事人和精确重复不算"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, 'near_duplicates.npz')
+        index = NearDuplicateIndex(filename)
+        original = make_record('某农村商业银行股份有限公司')
+        other = make_record('另一银行', violation='未按规定报送监管数据', content='罚款20万元')
+        assert index.add([index.record_signature(original), index.record_signature(other)],
+                         [party_digest(original['当事人名称']), party_digest(other['当事人名称'])],
+                         [1, 2], ['原记录', '另一记录']) == 2
+        assert index.add([index.record_signature(original)], [party_digest('某')], [1], ['重复']) == 0
+
+        republished = make_record(' 某农村商业银行股份有限公司 ', violation=VIOLATION.replace('；', ';').replace('“', '"'),
+                                  content=CONTENT + '。')
+        signature = index.record_signature(republished)
+        match = index.find(signature, party_digest(republished['当事人名称']), 3)
+        assert match['label'] == '原记录' and match['similarity'] >= 0.8
+
+        # 当事人不同、同一去重键（精确重复）、内容不同均不算近似重复
+        assert index.find(signature, party_digest('其他银行'), 3) is None
+        assert index.find(signature, party_digest(republished['当事人名称']), 1) is None
+        unrelated = make_record('某农村商业银行股份有限公司', violation='未按规定报送监管数据', content='警告')
+        assert index.find(index.record_signature(unrelated), party_digest(unrelated['当事人名称']), 3) is None
+
+        index.save()
+        reloaded = NearDuplicateIndex(filename)
+        assert len(reloaded) == 2
+        assert reloaded.find(signature, party_digest(republished['当事人名称']), 3)['label'] == '原记录'
+        # 只与参与比较的记录比较
+        assert reloaded.find(signature, party_digest(republished['当事人名称']), 3, np.array([False, True])) is None
+
+
+def test_filter_near_duplicates_actions():
+    """测试 flag 只标记保留记录，merge 丢弃新记录（与总表或本批之前的记录近似重复）并加入已知记录索引"""
+    processor = DataProcessor()
+    master_df = pd.DataFrame([make_record('某农村商业银行股份有限公司')])
+    new_df = pd.DataFrame([
+        make_record('某农村商业银行股份有限公司', number='菏金罚决字(2025)12号'),
+        make_record('另一银行', violation='未按规定报送监管数据', content='罚款20万元'),
+        make_record('另一银行', violation='未按规定报送监管数据。', content='罚款20万元', number='菏金罚决字〔2025〕13号'),
+    ])
+    new_df['详情链接'] = [f'http://www.nfra.gov.cn/detail/{i}' for i in range(len(new_df))]
+
+    originals = (data_processor.near_duplicates, data_processor.known_records, data_processor.NEAR_DUPLICATE_CONFIG)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_processor.near_duplicates = NearDuplicateIndex(os.path.join(tmp_dir, 'near_duplicates.npz'))
+            known_filename = os.path.join(tmp_dir, 'known_records.npz')
+            data_processor.known_records = KnownRecordIndex(known_filename)
+            data_processor.known_records.save()
+            processor.read_master_records = lambda: master_df
+
+            data_processor.NEAR_DUPLICATE_CONFIG = {**originals[2], 'action': 'flag'}
+            assert len(processor.filter_near_duplicates(new_df)) == 3
+            assert len(data_processor.near_duplicates) == 1
+            assert len(KnownRecordIndex(known_filename)) == 0
+
+            data_processor.NEAR_DUPLICATE_CONFIG = {**originals[2], 'action': 'merge'}
+            kept = processor.filter_near_duplicates(new_df)
+            assert list(kept['详情链接']) == ['http://www.nfra.gov.cn/detail/1']
+            # 丢弃的记录之后不再抓取
+            known = KnownRecordIndex(known_filename)
+            assert known.contains(['url:http://www.nfra.gov.cn/detail/0'])
+            assert known.contains(['url:http://www.nfra.gov.cn/detail/2'])
+            assert not known.contains(['url:http://www.nfra.gov.cn/detail/1'])
+
+            processor.update_near_duplicates(kept)
+            assert len(NearDuplicateIndex(os.path.join(tmp_dir, 'near_duplicates.npz'))) == 2
+    finally:
+        data_processor.near_duplicates, data_processor.known_records, data_processor.NEAR_DUPLICATE_CONFIG = originals
+
+
+if __name__ == "__main__":
+    test_normalize_for_similarity()
+    test_pack_labels()
+    test_index_finds_near_duplicates()
+    test_filter_near_duplicates_actions()
+    print("测试完成!")
@@ -0,0 +1,56 @@
+"""
+测试详情页解析进程池
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler import NFRACrawler
+from metrics import CrawlTelemetry
+from parse_pool import DetailParsePool
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+PAGE_SOURCES = ['merged_cells_page_source.html', 'page_source_debug.html']
+
+
+def test_pool_matches_inline_parse():
+    """测试解析进程的结果与本进程解析一致，且按提交顺序返回"""
+    spider = NFRACrawler()
+    jobs = []
+    for index, filename in enumerate(PAGE_SOURCES):
+        with open(os.path.join(TEST_DIR, filename), encoding='utf-8') as f:
+            jobs.append((f.read(), f'http://example.com/{index}', f'标题{index}', '2025-01-01', '2025-01-02 10:00:00'))
+
+    expected = [spider.parse_detail_page(*job) for job in jobs]
+
+    with DetailParsePool(max_workers=2, max_pending=1) as pool:
+        futures = [pool.submit(*job) for job in jobs]
+        results = [future.result(timeout=120) for future in futures]
+
+    for (result, layout, error, timings, counters), expected_result in zip(results, expected):
+        assert result == expected_result
+        assert layout is not None
+        assert error is None
+        assert 'detail_parse' in timings and 'table_parse' in timings
+        assert isinstance(counters, dict)
+
+
+def test_telemetry_drain_and_merge():
+    """测试解析进程的计数器增量（如解析出的记录数）取出后清空，并在主进程中归入当前类别"""
+    telemetry = CrawlTelemetry()
+    telemetry.inc('records_parsed', category='总局机关')
+    telemetry.inc('records_parsed', 2, category='其他')
+    totals = telemetry.drain()
+    assert totals == {'records_parsed': 3}
+    assert telemetry.counters() == {}
+
+    telemetry.merge(totals, category='监管局本级')
+    assert telemetry.counters() == {('records_parsed', '监管局本级'): 3}
+
+
+if __name__ == "__main__":
+    test_pool_matches_inline_parse()
+    test_telemetry_drain_and_merge()
+    print("测试完成!")
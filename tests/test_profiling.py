@@ -0,0 +1,95 @@
+"""
+测试运行模式剖析开关
+"""
+
+import os
+import sys
+import pstats
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crawler
+import profiling
+from crawler import NFRACrawler
+from parse_pool import parsing_inline
+from profiling import PROFILERS, profile_call
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def busy_work(n):
+    """用于剖析的示例函数"""
+    rows = [{'序号': str(i), '当事人名称': f'公司{i}'} for i in range(n)]
+    return len(sorted(rows, key=lambda row: row['当事人名称']))
+
+
+def test_profile_outputs():
+    """测试三种剖析方式均返回原函数结果并写出文件"""
+    original_dir = profiling.PROFILE_CONFIG['output_dir']
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        profiling.PROFILE_CONFIG['output_dir'] = tmp_dir
+        try:
+            for profiler in PROFILERS:
+                assert profile_call(profiler, 'test', busy_work, 20000) == 20000
+        finally:
+            profiling.PROFILE_CONFIG['output_dir'] = original_dir
+
+        files = sorted(os.listdir(tmp_dir))
+        assert len(files) == 3
+        assert all(name.startswith('test_') for name in files)
+
+        prof_file = next(name for name in files if name.endswith('.prof'))
+        stats = pstats.Stats(os.path.join(tmp_dir, prof_file))
+        assert any(func[2] == 'busy_work' for func in stats.stats)
+
+        txt_file = next(name for name in files if name.endswith('.txt'))
+        with open(os.path.join(tmp_dir, txt_file), encoding='utf-8') as f:
+            assert '峰值' in f.read()
+
+    # 未指定剖析方式时直接执行
+    assert profile_call(None, 'test', busy_work, 10) == 10
+
+
+def crawl_details(spider, page_source):
+    """模拟抓取：浏览器返回固定的详情页源码，其余流程与正常运行相同"""
+    spider.fetch_detail_page = lambda href, title: (page_source, href, title, None, '2025-01-02 10:00:00')
+    items = [{'title': '行政处罚信息公开表', 'detail_url': 'http://www.nfra.gov.cn/detail/1'}]
+    return list(spider.iter_details('监管分局本级', items))
+
+
+def test_profile_includes_detail_parsing():
+    """测试启用解析进程池时，剖析期间详情页仍在本进程内解析，解析阶段出现在剖析结果中"""
+    with open(os.path.join(TEST_DIR, 'merged_cells_page_source.html'), encoding='utf-8') as f:
+        page_source = f.read()
+
+    originals = (profiling.PROFILE_CONFIG['output_dir'], crawler.PARSE_POOL_CONFIG, crawler.CRAWL_CONFIG)
+    spider = NFRACrawler()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        profiling.PROFILE_CONFIG['output_dir'] = tmp_dir
+        crawler.PARSE_POOL_CONFIG = {**originals[1], 'enabled': True}
+        crawler.CRAWL_CONFIG = {**originals[2], 'delay_between_requests': 0}
+        try:
+            assert profile_call('cprofile', 'test', crawl_details, spider, page_source)
+            assert spider._parse_pool is None
+        finally:
+            profiling.PROFILE_CONFIG['output_dir'] = originals[0]
+            crawler.PARSE_POOL_CONFIG, crawler.CRAWL_CONFIG = originals[1:]
+            spider.close_parse_pool()
+
+        prof_file = next(name for name in os.listdir(tmp_dir) if name.endswith('.prof'))
+        functions = pstats.Stats(os.path.join(tmp_dir, prof_file)).stats
+        names = {(os.path.basename(func[0]), func[2]) for func in functions}
+        assert ('crawler.py', 'parse_detail_page') in names
+        assert ('html_tables.py', 'parse_detail_document') in names
+        # BeautifulSoup 的解析过程同样在剖析结果中
+        assert any(f'{os.sep}bs4{os.sep}' in func[0] for func in functions)
+
+    # 剖析结束后恢复使用进程池
+    assert not parsing_inline()
+
+
+if __name__ == "__main__":
+    test_profile_outputs()
+    test_profile_includes_detail_parsing()
+    print("测试完成!")
@@ -5,6 +5,7 @@
 import time
 import logging
 from crawler import NFRACrawler
+from html_tables import find_publish_time
 from utils import setup_logging
 import json
 
@@ -76,7 +77,7 @@ def test_specific_url():
             logger.info("提取发布时间:")
             logger.info("=" * 50)
             
-            publish_time = crawler.extract_publish_time()
+            publish_time = find_publish_time(crawler.driver.page_source)
             if publish_time:
                 logger.info(f"发布时间: {publish_time}")
             else:
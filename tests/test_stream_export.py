@@ -0,0 +1,90 @@
+"""
+测试流式导出管道
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import load_workbook
+
+from crawler import NFRACrawler
+from stream_export import open_stream_exporter
+
+
+def make_record(index):
+    return {
+        'title': f'国家金融监督管理总局行政处罚决定书（金罚决字〔2025〕{index}号）',
+        'detail_url': f'http://www.nfra.gov.cn/detail/{index}',
+        '当事人名称': f'某银行  股份有限公司　{index}',
+        '发布时间': '2025-06-01',
+    }
+
+
+def test_export_records_as_they_arrive():
+    """测试记录逐条写入NDJSON和Excel"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        basename = os.path.join(tmp_dir, 'out', 'test模式')
+        ndjson_file = basename + '.ndjson'
+
+        with open_stream_exporter(basename) as exporter:
+            exporter.write('总局机关', make_record(1))
+            # 写入后立即可读，不等待导出结束
+            with open(ndjson_file, encoding='utf-8') as f:
+                assert len(f.readlines()) == 1
+            exporter.consume([('监管局本级', make_record(2)), ('监管局本级', make_record(3))])
+
+        assert exporter.total_count == 3
+        assert exporter.category_counts == {'总局机关': 1, '监管局本级': 2}
+
+        with open(ndjson_file, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        assert [r['序号'] for r in records] == [1, 2, 3]
+        assert records[0]['标题'].endswith('1号）')
+        assert records[0]['当事人名称'] == '某银行 股份有限公司 1'
+        assert records[1]['类别'] == '监管局本级'
+        assert records[2]['详情链接'] == 'http://www.nfra.gov.cn/detail/3'
+        assert records[2]['行政处罚决定书文号']
+
+        sheet = load_workbook(basename + '.xlsx')['行政处罚信息']
+        rows = list(sheet.iter_rows(values_only=True))
+        assert rows[0][0] == '序号'
+        assert len(rows) == 4
+        link_cell = sheet.cell(row=2, column=rows[0].index('详情链接') + 1)
+        assert link_cell.value == '查看详情'
+        assert link_cell.hyperlink.target == 'http://www.nfra.gov.cn/detail/1'
+
+
+def test_iter_details_is_lazy():
+    """测试详情记录按需逐条产出"""
+    crawler = NFRACrawler()
+    crawler.get_parse_pool = lambda: None
+    fetched = []
+
+    def fake_process(href, title, page=None):
+        fetched.append(href)
+        return {'当事人名称': title}
+
+    crawler.process_link_with_new_window = fake_process
+    items = [{'title': f'标题{i}', 'detail_url': f'http://example.com/{i}'} for i in range(3)]
+
+    import crawler as crawler_module
+    original_delay = crawler_module.CRAWL_CONFIG['delay_between_requests']
+    crawler_module.CRAWL_CONFIG['delay_between_requests'] = 0
+    try:
+        records = crawler.iter_details('总局机关', items)
+        first = next(records)
+        assert first['当事人名称'] == '标题0'
+        assert fetched == ['http://example.com/0']
+        assert len(list(records)) == 2
+    finally:
+        crawler_module.CRAWL_CONFIG['delay_between_requests'] = original_delay
+
+
+if __name__ == "__main__":
+    test_export_records_as_they_arrive()
+    test_iter_details_is_lazy()
+    print("测试完成!")
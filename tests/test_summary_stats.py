@@ -0,0 +1,96 @@
+"""
+测试向量化的总表统计：缺失值视为空，各列类型结果一致，并支持按批累加
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from data_processor import DataProcessor
+from summary_stats import MasterSummaryStats, complete_mask
+
+
+def reference_complete_count(df):
+    """逐条统计：各必填字段都有值（不是缺失值、也不是空字符串）"""
+    required_fields = ['当事人名称', '行政处罚内容', '作出决定机关']
+    return sum(1 for record in df.to_dict('records')
+               if all(pd.notna(record.get(field)) and record.get(field, '') for field in required_fields))
+
+
+def make_df():
+    return pd.DataFrame({
+        '当事人名称': pd.Series(['甲银行', '', None, '丁银行', float('nan'), '己银行'], dtype=object),
+        '行政处罚内容': ['罚款', '罚款', '罚款', '', '罚款', '警告'],
+        '作出决定机关': ['菏泽监管分局'] * 6,
+        '类别': ['监管分局本级', '监管局本级', '监管分局本级', None, '总局机关', '监管分局本级'],
+    })
+
+
+def test_complete_mask_treats_missing_as_empty():
+    """测试完整记录掩码：空字符串和缺失值（None、NaN、pd.NA）都视为空，各列类型结果一致"""
+    df = make_df()
+    assert complete_mask(df).tolist() == [True, False, False, False, False, True]
+    assert complete_mask(df).sum() == reference_complete_count(df)
+
+    for dtype in ['str', 'category', 'string[pyarrow]', object]:
+        converted = df.astype({'当事人名称': dtype, '行政处罚内容': dtype})
+        assert complete_mask(converted).tolist() == complete_mask(df).tolist()
+        assert complete_mask(converted).sum() == reference_complete_count(converted)
+
+    # 缺少必填字段时没有完整记录
+    assert complete_mask(df.drop(columns=['作出决定机关'])).sum() == 0
+
+
+def test_master_summary_stats_rows():
+    """测试统计行与原实现一致，分批累加与整体统计结果相同"""
+    processor = DataProcessor()
+    df = make_df()
+    rows = processor.generate_master_summary_stats(df, 3)
+    assert [(row['分类'], row['记录数']) for row in rows] == [
+        ('监管分局本级', 3), ('监管局本级', 1), ('总局机关', 1),
+        ('总计', 6), (f'{pd.Timestamp.now().strftime("%Y年%m月")}新增', 3), ('数据完整记录', 2),
+    ]
+    assert rows[-1]['最后更新'] == '完整性: 33.3%'
+
+    stats = MasterSummaryStats().add(df.iloc[:2]).add(df.iloc[2:4]).add(df.iloc[4:])
+    assert [(row['分类'], row['记录数']) for row in stats.rows(3)] == [(row['分类'], row['记录数']) for row in rows]
+
+    empty_rows = MasterSummaryStats().add(pd.DataFrame(columns=['类别'])).rows(0)
+    assert [row['分类'] for row in empty_rows][0] == '总计'
+
+
+def test_generate_summary_stats_counts():
+    """测试分类统计一次遍历得到各类别记录数"""
+    processor = DataProcessor()
+    all_data = {'总局机关': [{}], '监管局本级': [{}, {}], '监管分局本级': []}
+    all_records = [{'类别': '监管局本级'}, {'类别': '总局机关'}, {'类别': '监管局本级'}, {}]
+    rows = processor.generate_summary_stats(all_data, all_records)
+    assert [(row['分类'], row['记录数']) for row in rows] == [
+        ('总局机关', 1), ('监管局本级', 2), ('监管分局本级', 0), ('总计', 4)]
+
+
+def test_large_master_stats():
+    """测试百万行总表（分类类别列）的向量化统计结果"""
+    n = 1000000
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        '当事人名称': np.where(rng.random(n) < 0.1, '', '某银行'),
+        '行政处罚内容': '罚款',
+        '作出决定机关': '菏泽监管分局',
+        '类别': pd.Categorical(rng.choice(['总局机关', '监管局本级', '监管分局本级'], n)),
+    })
+    rows = DataProcessor().generate_master_summary_stats(df, 0)
+    assert rows[-1]['记录数'] == int((df['当事人名称'] != '').sum())
+    assert sum(row['记录数'] for row in rows[:3]) == n
+
+
+if __name__ == "__main__":
+    test_complete_mask_treats_missing_as_empty()
+    test_master_summary_stats_rows()
+    test_generate_summary_stats_counts()
+    test_large_master_stats()
+    print("测试完成!")
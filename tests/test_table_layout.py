@@ -0,0 +1,67 @@
+"""
+测试表格布局识别：横向表格按表头关键词识别，只有横向多行表格才检测合并单元格
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from crawler import NFRACrawler
+
+
+MERGED_TABLE = """
+<table>
+<tr><td>序号</td><td>当事人名称</td><td>主要违法违规行为</td><td>行政处罚内容</td><td>作出决定机关</td></tr>
+<tr><td>1</td><td>甲银行</td><td rowspan="2">贷款管理不审慎</td><td>罚款30万元</td><td rowspan="2">菏泽监管分局</td></tr>
+<tr><td>2</td><td>张三</td><td>警告</td></tr>
+</table>
+"""
+
+KEY_VALUE_TABLE = """
+<table>
+<tr><td>名称</td><td colspan="2">甲银行</td><td>备注</td></tr>
+<tr><td>内容</td><td colspan="3">罚款30万元</td></tr>
+<tr><td>依据</td><td colspan="3">《银行业监督管理法》</td></tr>
+</table>
+"""
+
+
+def table_rows(html):
+    return BeautifulSoup(html, 'html.parser').find('table').find_all('tr')
+
+
+def test_detect_table_layout():
+    """测试布局识别结果，键值对表格不扫描合并单元格"""
+    parser = NFRACrawler()
+    scanned = []
+    original_scan = parser.has_merged_cells
+    parser.has_merged_cells = lambda rows: scanned.append(len(rows)) or original_scan(rows)
+
+    layout, headers, fields = parser.detect_table_layout(table_rows(MERGED_TABLE))
+    assert layout == 'horizontal_merged'
+    assert headers[1] == '当事人名称' and fields[1] == '当事人名称'
+    assert scanned == [2]
+
+    layout, _, fields = parser.detect_table_layout(table_rows(KEY_VALUE_TABLE))
+    assert layout == 'key_value' and fields is None
+    assert scanned == [2]
+
+    rows = table_rows(MERGED_TABLE)
+    assert parser.detect_table_layout(rows[:2])[0] == 'horizontal_single'
+
+
+def test_merged_table_records():
+    """测试合并单元格表格按识别出的布局解析"""
+    parser = NFRACrawler()
+    result = parser.parse_table_from_soup(BeautifulSoup(MERGED_TABLE, 'html.parser').find('table'))
+    assert parser.last_table_layout == 'horizontal_merged'
+    assert result['additional_records'][0]['作出决定机关'] == '菏泽监管分局'
+
+
+if __name__ == "__main__":
+    test_detect_table_layout()
+    test_merged_table_records()
+    print("测试完成!")
@@ -0,0 +1,83 @@
+"""
+测试处罚依据和处罚内容提取
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler import NFRACrawler
+from text_extractor import (
+    SuffixAutomaton,
+    extract_fine_sentences,
+    extract_punishment_basis,
+    extract_punishment_content,
+    merge_sentences,
+)
+
+SAMPLE_TEXT = '对某某保险公司分公司警告并罚款30万元；对张三警告并罚款5万元。依据《中华人民共和国保险法》第一百六十二条。合计罚款35万元。'
+
+
+def test_extract_punishment_basis_and_content():
+    """测试提取依据、内容和去重后的处罚句子"""
+    sentences = merge_sentences(extract_fine_sentences(SAMPLE_TEXT))
+
+    assert extract_punishment_basis(SAMPLE_TEXT) == '中华人民共和国保险法'
+    assert sentences == [
+        '对某某保险公司分公司警告并罚款30万元',
+        '对张三警告并罚款5万元。依据《中华人民共和国保险法》第一百六十二条。合计罚款35万元',
+    ]
+    assert extract_punishment_content(SAMPLE_TEXT) == '；'.join(sentences)
+
+
+def test_crawler_methods_use_extractor():
+    """测试爬虫方法与提取模块结果一致"""
+    spider = NFRACrawler()
+
+    assert spider.extract_punishment_basis_from_text(SAMPLE_TEXT) == extract_punishment_basis(SAMPLE_TEXT)
+    assert spider.extract_punishment_content_from_text(SAMPLE_TEXT) == extract_punishment_content(SAMPLE_TEXT)
+    assert spider.extract_punishment_basis_from_text('') == ''
+    assert spider.extract_punishment_content_from_text('某公司') == ''
+
+
+def test_merge_keeps_longest_version():
+    """测试去重只保留不被其他句子包含的最完整版本，并按首次出现顺序输出"""
+    sentences = [
+        '对项开宝警告并罚款1万元',
+        '对陈雄斌警告并罚款2万元',
+        '合计罚款158万元',
+        '对项开宝警告并罚款1万元对陈雄斌警告并罚款2万元',
+        '对项开宝警告并罚款1万元对陈雄斌警告并罚款2万元',
+        '对复星联合健康保险股份有限公司合计罚款158万元。',
+        '对王某警告',
+    ]
+    assert merge_sentences(sentences) == [
+        '对项开宝警告并罚款1万元对陈雄斌警告并罚款2万元',
+        '对复星联合健康保险股份有限公司合计罚款158万元',
+        '对王某警告',
+    ]
+
+
+def test_suffix_automaton_and_many_parties():
+    """测试子串判断正确，且多当事人文本在毫秒级完成"""
+    automaton = SuffixAutomaton()
+    for word in ['abcab', 'bcd']:
+        automaton.add(word)
+    assert all(sub in automaton for sub in ['', 'cab', 'bca', 'bcd', 'abcab'])
+    assert not any(sub in automaton for sub in ['abcd', 'dc', 'cabc'])
+
+    text = '。'.join(f'对某某保险公司第{i}分公司警告并罚款{i}万元' for i in range(300))
+    start = time.perf_counter()
+    sentences = merge_sentences(extract_fine_sentences(text))
+    assert len(sentences) == 300
+    assert time.perf_counter() - start < 1.0
+
+
+if __name__ == "__main__":
+    test_extract_punishment_basis_and_content()
+    test_crawler_methods_use_extractor()
+    test_merge_keeps_longest_version()
+    test_suffix_automaton_and_many_parties()
+    print("测试完成!")
@@ -0,0 +1,85 @@
+"""
+测试详情页结构化追踪日志
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crawler
+from crawler import NFRACrawler
+from metrics import stage_metrics
+from trace_log import DetailTraceLog
+
+
+def read_events(filename):
+    with open(filename, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_emit_ndjson():
+    """测试写入NDJSON事件"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, 'trace', 'detail_trace.ndjson')
+        trace_log = DetailTraceLog(filename, max_bytes=1024 * 1024, backup_count=1)
+        try:
+            trace_log.emit('http://example.com/a', '总局机关', 2, {'detail_fetch': 1.23456},
+                           'key_value', 1, 'success')
+            trace_log.emit('http://example.com/b', '总局机关', 2, {}, None, 0, 'error', error='TimeoutException: ')
+        finally:
+            trace_log.close()
+
+        events = read_events(filename)
+
+    assert len(events) == 2
+    assert events[0]['timings'] == {'detail_fetch': 1.2346}
+    assert events[0]['layout'] == 'key_value'
+    assert events[1]['outcome'] == 'error'
+    assert 'error' not in events[0]
+
+
+def test_process_link_emits_event():
+    """测试处理详情链接时记录阶段耗时、布局和记录数"""
+    spider = NFRACrawler()
+
+    def fake_process(href, title):
+        stage_metrics.record('detail_fetch', 0.5)
+        stage_metrics.record('wait', 0.1)
+        stage_metrics.record('wait', 0.2)
+        spider.last_table_layout = 'horizontal_merged'
+        return {'is_multi_record': True, 'records': [{}, {}, {}], 'total_count': 3}
+
+    spider._process_link_with_new_window = fake_process
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, 'detail_trace.ndjson')
+        original_trace_log = crawler.detail_trace_log
+        crawler.detail_trace_log = DetailTraceLog(filename, max_bytes=1024 * 1024, backup_count=1)
+        try:
+            stage_metrics.set_category('监管分局本级')
+            result = spider.process_link_with_new_window('http://example.com/c', '标题', page=3)
+        finally:
+            crawler.detail_trace_log.close()
+            crawler.detail_trace_log = original_trace_log
+            stage_metrics.set_category(None)
+
+        events = read_events(filename)
+
+    assert result['total_count'] == 3
+    event = events[0]
+    assert event['category'] == '监管分局本级'
+    assert event['page'] == 3
+    assert event['outcome'] == 'multi_record'
+    assert event['records'] == 3
+    assert event['layout'] == 'horizontal_merged'
+    assert event['timings']['wait'] == 0.3
+    assert 'detail_total' in event['timings']
+
+
+if __name__ == "__main__":
+    test_emit_ndjson()
+    test_process_link_emits_event()
+    print("测试完成!")
@@ -0,0 +1,127 @@
+"""
+测试文本清理函数和发布时间解析
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils import clean_text, normalize_whitespace, optimize_dtypes, parse_publish_times, StringTable, string_table
+from data_processor import DataProcessor
+
+
+def test_clean_text():
+    """测试空白合并和HTML实体替换"""
+    assert clean_text(None) == ""
+    assert clean_text('\n  当事人　名称\xa0 ') == '当事人 名称'
+    # 短文本走缓存，结果与长文本一致
+    assert clean_text(' 序号 ') == clean_text(' 序号 ') == '序号'
+    long_text = '对某银行罚款30万元 ' * 10
+    assert clean_text(long_text) == long_text.strip()
+    # 实体按顺序替换，替换出的空格不再合并
+    assert clean_text('&nbsp;A &amp;&nbsp; B&amp;lt;') == 'A &  B<'
+    assert clean_text('a&b') == 'a&b'
+
+
+def test_clean_punishment_data_whitespace():
+    """测试记录清理时的空白处理"""
+    processor = DataProcessor()
+    cleaned = processor.clean_punishment_data({
+        '当事人': ' 某　银行\xa0\xa0股份有限公司\n',
+        '罚款金额': '  30 万元 ',
+        '页码': 2,
+    })
+    assert cleaned['当事人名称'] == '某 银行 股份有限公司'
+    assert cleaned['罚款金额'] == '罚款30.0万元'
+    assert cleaned['页码'] == 2
+    assert normalize_whitespace('\t　') == ''
+
+
+def test_parse_publish_times():
+    """测试多种写法的发布时间解析，无法解析的为NaT"""
+    values = pd.Series(['2024-01-15', ' 2024/1/5 ', '2024年1月5日', '2024-01-15 10:30:00',
+                        '2025-06-03T08:00:00', '2024-02-30', '', None, '无'])
+    parsed = parse_publish_times(values)
+    assert str(parsed.dtype).startswith('datetime64')
+    assert list(parsed[:5]) == [pd.Timestamp('2024-01-15'), pd.Timestamp('2024-01-05'), pd.Timestamp('2024-01-05'),
+                                pd.Timestamp('2024-01-15 10:30:00'), pd.Timestamp('2025-06-03 08:00:00')]
+    assert parsed[5:].isna().all()
+
+
+def test_sort_by_publish_time():
+    """测试按发布时间降序排列，无法解析的排在最后"""
+    processor = DataProcessor()
+    df = pd.DataFrame({'标题': ['a', 'b', 'c', 'd'],
+                       '发布时间': ['2024/1/5', '未知', '2025年6月3日', '2024-01-15 10:30:00']})
+    assert list(processor.sort_by_publish_time(df)['标题']) == ['c', 'd', 'a', 'b']
+
+
+def test_optimize_dtypes():
+    """测试低基数列转为分类类型，文本列转为Arrow字符串，值不变"""
+    df = pd.DataFrame({
+        '序号': [1, 2, 3],
+        '当事人名称': pd.Series(['甲银行', '乙银行', '丙银行'], dtype=object),
+        '类别': ['总局机关', '总局机关', '监管局本级'],
+        '发布时间': ['2025-06-03', '2025-06-03', '2025-05-20'],
+    })
+    expected = df.astype(object).values.tolist()
+    optimized = optimize_dtypes(df)
+    assert isinstance(optimized['类别'].dtype, pd.CategoricalDtype)
+    assert isinstance(optimized['发布时间'].dtype, pd.CategoricalDtype)
+    assert isinstance(optimized['当事人名称'].dtype, pd.StringDtype)
+    assert optimized['序号'].dtype == 'int64'
+    assert optimized.astype(object).values.tolist() == expected
+
+
+def test_create_merged_dataframe_dtypes():
+    """测试合并DataFrame使用紧凑记录构建，输出列和值与字段顺序一致"""
+    processor = DataProcessor()
+    records = [
+        {'序号': '2', 'title': '公开表（菏金罚决字〔2025〕2号）', '当事人名称': '乙银行', '类别': '监管分局本级',
+         '发布时间': '2025-05-20', 'detail_url': 'http://www.nfra.gov.cn/detail/2'},
+        {'序号': '1', '标题': '公开表', '当事人名称': '甲银行', '类别': '监管分局本级', '发布时间': '2025-06-03'},
+    ]
+    df = processor.create_merged_dataframe(records)
+    assert list(df.columns) == processor.merged_columns
+    assert list(df['当事人名称']) == ['甲银行', '乙银行']
+    assert list(df['序号']) == [1, 2]
+    assert df.loc[1, '行政处罚决定书文号'] == '菏金罚决字〔2025〕2号'
+    assert isinstance(df['类别'].dtype, pd.CategoricalDtype)
+
+
+def test_string_table_shares_fields():
+    """测试清理后各记录的共用字段引用同一字符串对象"""
+    table = StringTable()
+    title = ''.join(['行政处罚信息公开表', '（菏金罚决字〔2025〕12号）'])
+    same_title = ''.join(['行政处罚信息公开表（', '菏金罚决字〔2025〕12号）'])
+    assert title == same_title and title is not same_title
+    first = table.intern_record({'标题': title, '当事人名称': '甲银行', '页码': 1})
+    second = table.intern_record({'标题': same_title, '当事人名称': '乙银行'})
+    assert second['标题'] is first['标题']
+    assert table.intern(None) is None and len(table) == 1
+    table.clear()
+    assert len(table) == 0
+
+    processor = DataProcessor()
+    raw = [{'标题': ' 公开表（罚决字〔2025〕1号） ', '作出决定机关': ' 菏泽监管分局', '当事人名称': name}
+           for name in ['甲银行', '乙银行']]
+    try:
+        records = processor.process_category_data(raw, '监管分局本级')
+        assert records[0]['标题'] is records[1]['标题']
+        assert records[0]['作出决定机关'] is records[1]['作出决定机关']
+    finally:
+        string_table.clear()
+
+
+if __name__ == "__main__":
+    test_clean_text()
+    test_clean_punishment_data_whitespace()
+    test_parse_publish_times()
+    test_sort_by_publish_time()
+    test_optimize_dtypes()
+    test_create_merged_dataframe_dtypes()
+    test_string_table_shares_fields()
+    print("测试完成!")
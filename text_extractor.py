@@ -0,0 +1,231 @@
+"""
+处罚文本提取模块 - 从表格完整文本中提取行政处罚依据和行政处罚内容
+所有正则在模块加载时预编译，每个正则先用其必需的关键词做子串预检，
+文本中不可能匹配的模式直接跳过，不再逐个执行 re.findall。
+"""
+
+import re
+from typing import Dict, List
+
+from utils import clean_text
+
+
+# 行政处罚依据模式：(必需关键词, 预编译正则)，顺序决定输出顺序
+BASIS_PATTERNS = [
+    # 完整的法条引用
+    (('依据', '第', '条'), re.compile(r'依据[《]?([^》。；\n]+第[^。；\n]+条[^。；\n]*)[》]?', re.IGNORECASE)),
+    (('根据', '第', '条'), re.compile(r'根据[《]?([^》。；\n]+第[^。；\n]+条[^。；\n]*)[》]?', re.IGNORECASE)),
+    (('按照', '第', '条'), re.compile(r'按照[《]?([^》。；\n]+第[^。；\n]+条[^。；\n]*)[》]?', re.IGNORECASE)),
+    # 法律法规名称
+    (('《', '》', '法'), re.compile(r'《([^》]+法[^》]*)》', re.IGNORECASE)),
+    (('《', '》', '规定'), re.compile(r'《([^》]+规定[^》]*)》', re.IGNORECASE)),
+    (('《', '》', '办法'), re.compile(r'《([^》]+办法[^》]*)》', re.IGNORECASE)),
+    (('《', '》', '条例'), re.compile(r'《([^》]+条例[^》]*)》', re.IGNORECASE)),
+    # 简单的依据引用
+    (('依据',), re.compile(r'依据[《]?([^》。；\n]+)[》]?[，。]', re.IGNORECASE)),
+    (('根据',), re.compile(r'根据[《]?([^》。；\n]+)[》]?[，。]', re.IGNORECASE)),
+    (('违反',), re.compile(r'违反[了]?[《]?([^》。；\n]+)[》]?', re.IGNORECASE)),
+]
+
+# "对...处罚" 模式：(必需关键词, 预编译正则)
+FINE_PATTERNS = [
+    # 匹配：对XXX警告并罚款X万元
+    (('对', '警告并罚款', '万元'), re.compile(r'对([^对。；\n]+?)(警告并罚款[0-9]+万元)', re.MULTILINE | re.DOTALL)),
+    # 匹配：对XXX罚款X万元
+    (('对', '罚款', '万元'), re.compile(r'对([^对。；\n]+?)(罚款[0-9]+万元[^。；\n]*)', re.MULTILINE | re.DOTALL)),
+    # 匹配：对XXX警告
+    (('对', '警告'), re.compile(r'对([^对。；\n]+?)(警告[^。；\n]*)', re.MULTILINE | re.DOTALL)),
+]
+
+# 合计信息和详细说明
+SUMMARY_PATTERNS = [
+    (('合计罚款', '万元'), re.compile(r'(合计罚款[0-9]+万元[^。；\n]*)', re.MULTILINE | re.DOTALL)),
+    (('其中', '万元'), re.compile(r'(其中[^。；\n]*[0-9]+万元[^。；\n]*)', re.MULTILINE | re.DOTALL)),
+]
+
+# 按"对...警告/罚款"切分一行中的多个处罚
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?=对[^对]*(?:警告|罚款))')
+
+# 包含处罚信息的行需要出现的关键词
+LINE_KEYWORDS = ('对', '罚款', '万元', '警告')
+
+
+def _has_keywords(text: str, keywords) -> bool:
+    """子串预检：所有必需关键词都出现时模式才可能匹配"""
+    return all(keyword in text for keyword in keywords)
+
+
+def extract_basis_list(text: str) -> List[str]:
+    """提取所有行政处罚依据片段（按模式顺序、去重）"""
+    found_basis = []
+    seen = set()
+
+    for keywords, pattern in BASIS_PATTERNS:
+        if not _has_keywords(text, keywords):
+            continue
+        for match in pattern.findall(text):
+            if match and len(match.strip()) > 3:
+                clean_match = clean_text(match).strip()
+                # 避免重复和过短的匹配
+                if clean_match not in seen and len(clean_match) > 5:
+                    seen.add(clean_match)
+                    found_basis.append(clean_match)
+
+    return found_basis
+
+
+def extract_fine_sentences(text: str) -> List[str]:
+    """提取所有处罚相关的句子（未去重）"""
+    punishment_sentences = []
+
+    for keywords, pattern in FINE_PATTERNS:
+        if not _has_keywords(text, keywords):
+            continue
+        for person, punishment in pattern.findall(text):
+            # 对当事人的处罚
+            person = clean_text(person).strip()
+            punishment = clean_text(punishment).strip()
+            if person and punishment:
+                punishment_sentences.append(f"对{person}{punishment}")
+
+    for keywords, pattern in SUMMARY_PATTERNS:
+        if not _has_keywords(text, keywords):
+            continue
+        for match in pattern.findall(text):
+            sentence = clean_text(match).strip()
+            if sentence and len(sentence) > 3:
+                punishment_sentences.append(sentence)
+
+    # 使用行分割的方式重新提取，确保不遗漏
+    seen = set(punishment_sentences)
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+
+        # 查找包含处罚关键词的行
+        if not any(keyword in line for keyword in LINE_KEYWORDS):
+            continue
+
+        # 分割可能包含多个处罚的行（切分点必须以"对"开头）
+        sub_sentences = SENTENCE_SPLIT_PATTERN.split(line) if '对' in line else [line]
+        for sub_sentence in sub_sentences:
+            sub_sentence = sub_sentence.strip()
+            if len(sub_sentence) > 3 and ('罚款' in sub_sentence or '警告' in sub_sentence):
+                clean_sentence = clean_text(sub_sentence)
+                # 避免重复添加
+                if clean_sentence not in seen:
+                    seen.add(clean_sentence)
+                    punishment_sentences.append(clean_sentence)
+
+    return punishment_sentences
+
+
+class SuffixAutomaton:
+    """广义后缀自动机：可逐个加入字符串，并在 O(len) 时间内判断某字符串是否为已加入字符串的子串"""
+
+    __slots__ = ('_next', '_link', '_length')
+
+    def __init__(self):
+        self._next: List[Dict[str, int]] = [{}]
+        self._link: List[int] = [-1]
+        self._length: List[int] = [0]
+
+    def _clone(self, state: int, length: int) -> int:
+        clone = len(self._next)
+        self._next.append(dict(self._next[state]))
+        self._link.append(self._link[state])
+        self._length.append(length)
+        return clone
+
+    def _redirect(self, state: int, char: str, old_target: int, new_target: int) -> None:
+        while state != -1 and self._next[state].get(char) == old_target:
+            self._next[state][char] = new_target
+            state = self._link[state]
+
+    def add(self, text: str) -> None:
+        """加入一个字符串"""
+        transitions, link, length = self._next, self._link, self._length
+        last = 0
+        for char in text:
+            target = transitions[last].get(char)
+            if target is not None:
+                # 该前缀已存在（来自之前加入的字符串）
+                if length[last] + 1 == length[target]:
+                    last = target
+                else:
+                    clone = self._clone(target, length[last] + 1)
+                    self._redirect(last, char, target, clone)
+                    link[target] = clone
+                    last = clone
+                continue
+
+            current = len(transitions)
+            transitions.append({})
+            link.append(-1)
+            length.append(length[last] + 1)
+
+            state = last
+            while state != -1 and char not in transitions[state]:
+                transitions[state][char] = current
+                state = link[state]
+
+            if state == -1:
+                link[current] = 0
+            else:
+                target = transitions[state][char]
+                if length[state] + 1 == length[target]:
+                    link[current] = target
+                else:
+                    clone = self._clone(target, length[state] + 1)
+                    self._redirect(state, char, target, clone)
+                    link[target] = clone
+                    link[current] = clone
+            last = current
+
+    def __contains__(self, text: str) -> bool:
+        """判断 text 是否为某个已加入字符串的子串"""
+        transitions = self._next
+        state = 0
+        for char in text:
+            state = transitions[state].get(char)
+            if state is None:
+                return False
+        return True
+
+
+def merge_sentences(punishment_sentences: List[str]) -> List[str]:
+    """智能去重：移除完全包含在其他句子中的内容，保留最完整的版本
+
+    按长度从长到短处理，已保留的句子加入后缀自动机，
+    被任一已保留句子包含的句子即为重复，整体复杂度与句子总长度成线性关系。
+    结果按句子首次出现的顺序输出。
+    """
+    candidates = []
+    for index, sentence in enumerate(punishment_sentences):
+        if sentence and len(sentence) > 3:
+            candidates.append((index, sentence.strip('。；，')))
+
+    # 稳定排序：长度相同的句子保持原有先后，相同句子保留第一次出现的位置
+    candidates.sort(key=lambda item: -len(item[1]))
+
+    kept_index = SuffixAutomaton()
+    kept = []
+    for index, sentence in candidates:
+        if sentence in kept_index:
+            continue
+        kept_index.add(sentence)
+        kept.append((index, sentence))
+
+    kept.sort()
+    return [sentence for _, sentence in kept]
+
+
+def extract_punishment_basis(text: str) -> str:
+    """提取行政处罚依据，多个依据以"；"连接"""
+    return "；".join(extract_basis_list(text))
+
+
+def extract_punishment_content(text: str) -> str:
+    """提取完整的行政处罚内容，多个处罚以"；"连接"""
+    return "；".join(merge_sentences(extract_fine_sentences(text)))
@@ -0,0 +1,103 @@
+"""
+详情页追踪日志模块 - 每处理一个详情链接输出一条结构化事件
+事件以NDJSON格式（每行一个JSON对象）写入滚动文件，便于离线分析慢页面、表格布局分布和失败热点
+"""
+
+import os
+import json
+import time
+import logging
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Optional
+
+# 检测exe模式并导入相应配置
+if os.environ.get('NFRA_EXE_MODE') == '1':
+    # EXE模式：使用exe专用配置
+    from config_exe import TRACE_LOG_CONFIG
+else:
+    # 正常模式：使用标准配置
+    from config import TRACE_LOG_CONFIG
+
+
+# 事件结果取值
+OUTCOME_SUCCESS = 'success'
+OUTCOME_MULTI_RECORD = 'multi_record'
+OUTCOME_NO_TABLE_DATA = 'no_table_data'
+OUTCOME_ERROR = 'error'
+
+
+class DetailTraceLog:
+    """详情页追踪日志写入器"""
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int, enabled: bool = True):
+        self.enabled = enabled
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._logger = None
+
+    def _get_logger(self) -> logging.Logger:
+        """首次写入时再创建文件和处理器，未启用或未使用时不产生文件"""
+        if self._logger is None:
+            output_dir = os.path.dirname(self.filename)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+
+            logger = logging.getLogger(f'nfra.detail_trace.{os.path.abspath(self.filename)}')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False  # 不进入 crawl.log 和控制台
+
+            handler = RotatingFileHandler(
+                self.filename,
+                maxBytes=self.max_bytes,
+                backupCount=self.backup_count,
+                encoding='utf-8',
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+    def emit(self, url: str, category: str, page: Optional[int], timings: Dict[str, float],
+             layout: Optional[str], record_count: int, outcome: str, error: str = None,
+             started_at: float = None) -> None:
+        """写入一条详情页事件"""
+        if not self.enabled:
+            return
+
+        event = {
+            'ts': datetime.fromtimestamp(started_at or time.time()).isoformat(timespec='milliseconds'),
+            'url': url,
+            'category': category,
+            'page': page,
+            'timings': {stage: round(duration, 4) for stage, duration in timings.items()},
+            'layout': layout,
+            'records': record_count,
+            'outcome': outcome,
+        }
+        if error:
+            event['error'] = error
+
+        try:
+            self._get_logger().info(json.dumps(event, ensure_ascii=False))
+        except Exception:
+            # 追踪日志只用于诊断，写入失败不影响爬取
+            pass
+
+    def close(self) -> None:
+        """关闭文件处理器"""
+        if self._logger is not None:
+            for handler in list(self._logger.handlers):
+                handler.close()
+                self._logger.removeHandler(handler)
+            self._logger = None
+
+
+# 全局追踪日志写入器，爬虫各线程共用
+detail_trace_log = DetailTraceLog(
+    filename=TRACE_LOG_CONFIG['filename'],
+    max_bytes=TRACE_LOG_CONFIG['max_file_size'],
+    backup_count=TRACE_LOG_CONFIG['backup_count'],
+    enabled=TRACE_LOG_CONFIG['enabled'],
+)
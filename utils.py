@@ -3,11 +3,19 @@
 """
 
 import os
+import re
 import logging
 import pandas as pd
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Dict, Any
 
+try:
+    import pyarrow
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 # 检测exe模式并导入相应配置
 if os.environ.get('NFRA_EXE_MODE') == '1':
     # EXE模式：使用exe专用配置
@@ -18,7 +26,9 @@ else:
 
 
 def setup_logging():
-    """设置日志配置"""
+    """设置日志配置（已配置过日志时不重复创建处理器，解析进程只输出到控制台）"""
+    if logging.getLogger().handlers:
+        return logging.getLogger(__name__)
     logging.basicConfig(
         level=getattr(logging, LOG_CONFIG['level']),
         format=LOG_CONFIG['format'],
@@ -126,21 +136,137 @@ def format_date(date_str: str) -> str:
         return date_str
 
 
-def clean_text(text: str) -> str:
-    """清理文本内容"""
-    if not text:
-        return ""
-    
+# 常见的日期时间写法：2024-01-15、2024/1/15、2024年1月15日、2024-01-15 10:30:00
+_DATE_TIME_PATTERN = re.compile(
+    r'^(\d{4})\s*[-/年.]\s*(\d{1,2})\s*[-/月.]\s*(\d{1,2})\s*日?'
+    r'(?:[\sT]+(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?)?$'
+)
+
+
+def parse_publish_times(values: pd.Series) -> pd.Series:
+    """向量化解析时间列：正则规范化为ISO格式后一次性转换，无法解析的值为NaT
+
+    不符合常见写法的少量文本再逐个通用解析。
+    """
+    text = values.astype('string').str.strip()
+    parts = text.str.extract(_DATE_TIME_PATTERN)
+    iso_text = (
+        parts[0] + '-' + parts[1].str.zfill(2) + '-' + parts[2].str.zfill(2)
+        + 'T' + parts[3].fillna('0').str.zfill(2)
+        + ':' + parts[4].fillna('0').str.zfill(2)
+        + ':' + parts[5].fillna('0').str.zfill(2)
+    )
+    result = pd.to_datetime(iso_text, format='ISO8601', errors='coerce')
+
+    leftover = result.isna() & text.fillna('').ne('')
+    for index in leftover[leftover].index:
+        try:
+            parsed = pd.Timestamp(text[index])
+        except (ValueError, TypeError, OverflowError):
+            continue
+        if parsed.tzinfo is not None:
+            parsed = parsed.tz_localize(None)
+        result[index] = parsed
+
+    return result
+
+
+# 取值种类少的列（类别、发文机关、发布日期）转为分类类型
+CATEGORICAL_COLUMNS = ['类别', '作出决定机关', '发布时间']
+
+
+def optimize_dtypes(df: pd.DataFrame, categorical_columns: List[str] = None) -> pd.DataFrame:
+    """压缩DataFrame内存（原地转换并返回）：低基数列转为分类类型，其余纯文本列转为Arrow字符串（需要pyarrow）"""
+    categorical_columns = CATEGORICAL_COLUMNS if categorical_columns is None else categorical_columns
+    for col in df.columns:
+        column = df[col]
+        if col in categorical_columns:
+            df[col] = column.astype('category')
+        elif PYARROW_AVAILABLE and column.dtype == object and pd.api.types.infer_dtype(column) == 'string':
+            df[col] = column.astype('string[pyarrow]')
+    return df
+
+
+def text_values(column: pd.Series) -> pd.Series:
+    """列的取值转为字符串，缺失值为空字符串
+    分类类型列先转为普通列再填充（直接 fillna('') 会因空字符串不在类别中而报错）"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        column = column.astype(object)
+    return column.fillna('').astype(str)
+
+
+# 清理后多条记录共用取值的字段（多记录批文的标题、链接，以及发布时间、发文机关、文号、类别等）
+SHARED_FIELDS = ('标题', '详情链接', '发布时间', '作出决定机关', '行政处罚决定书文号', '类别', '抓取时间',
+                 'title', 'detail_url', 'category', 'publish_date')
+
+
+class StringTable:
+    """字符串驻留表：相同取值只保留一个字符串对象，各记录引用同一对象
+    与 sys.intern 不同，表按次运行使用，运行开始时清空，不会在常驻进程中无限增长"""
+
+    def __init__(self):
+        self._strings: Dict[str, str] = {}
+
+    def intern(self, value: Any) -> Any:
+        """返回表中与 value 相等的字符串对象，非字符串原样返回"""
+        if type(value) is not str:
+            return value
+        return self._strings.setdefault(value, value)
+
+    def intern_record(self, record: Dict, fields=SHARED_FIELDS) -> Dict:
+        """原地驻留记录中的共用字段并返回记录"""
+        for field in fields:
+            value = record.get(field)
+            if type(value) is str:
+                record[field] = self._strings.setdefault(value, value)
+        return record
+
+    def clear(self) -> None:
+        self._strings.clear()
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+
+# 全局字符串驻留表（每次运行开始时清空）
+string_table = StringTable()
+
+
+# 常见的HTML实体（按顺序替换）
+HTML_ENTITIES = (('&nbsp;', ' '), ('&amp;', '&'), ('&lt;', '<'), ('&gt;', '>'))
+
+# 不超过该长度的文本（表头、字段名等大量重复的短文本）使用缓存结果
+CLEAN_TEXT_MEMO_LENGTH = 32
+
+
+def normalize_whitespace(text: str) -> str:
+    """空白字符（含全角空格、不间断空格等Unicode空白）合并为单个空格并去除首尾空白"""
+    return ' '.join(text.split())
+
+
+def _clean_text(text: str) -> str:
     # 移除多余的空白字符
     text = ' '.join(text.split())
     
-    # 移除常见的HTML实体
-    text = text.replace('&nbsp;', ' ')
-    text = text.replace('&amp;', '&')
-    text = text.replace('&lt;', '<')
-    text = text.replace('&gt;', '>')
+    # 移除常见的HTML实体（不含"&"的文本无需逐个替换）
+    if '&' in text:
+        for entity, char in HTML_ENTITIES:
+            text = text.replace(entity, char)
+        text = text.strip()
     
-    return text.strip()
+    return text
+
+
+_clean_short_text = lru_cache(maxsize=4096)(_clean_text)
+
+
+def clean_text(text: str) -> str:
+    """清理文本内容"""
+    if not text:
+        return ""
+    if len(text) <= CLEAN_TEXT_MEMO_LENGTH:
+        return _clean_short_text(text)
+    return _clean_text(text)
 
 
 def get_current_timestamp() -> str:
@@ -31,6 +31,9 @@ except ImportError as e:
     MODULES_LOADED = False
     IMPORT_ERROR = str(e)
 
+from utils import optimize_dtypes, parse_publish_times
+from excel_writer import read_excel_table
+
 # 页面配置
 st.set_page_config(
     page_title="金融监管总局行政处罚信息爬虫",
@@ -455,7 +458,14 @@ def show_analytics_tab():
             )
             
             try:
-                df = pd.read_excel(selected_file)
+                # 超过单表行数上限的文件续写在多个工作表中，合并后分析；按分类保存的文件读取第一个工作表
+                try:
+                    df = read_excel_table(selected_file)
+                except ValueError:
+                    df = pd.read_excel(selected_file)
+                # 低基数列转为分类类型、文本列转为Arrow字符串，减少内存占用
+                df = optimize_dtypes(df)
+                publish_times = parse_publish_times(df['发布时间']) if '发布时间' in df.columns else None
                 
                 # 基础统计
                 col1, col2, col3, col4 = st.columns(4)
@@ -466,8 +476,8 @@ def show_analytics_tab():
                     if '类别' in df.columns:
                         st.metric("类别数", df['类别'].nunique())
                 with col3:
-                    if '发布时间' in df.columns:
-                        latest = df['发布时间'].max()
+                    if publish_times is not None:
+                        latest = publish_times.max()
                         st.metric("最新日期", str(latest)[:10] if pd.notna(latest) else "N/A")
                 with col4:
                     if '当事人名称' in df.columns:
@@ -488,9 +498,9 @@ def show_analytics_tab():
                     st.plotly_chart(fig, use_container_width=True)
                 
                 # 时间趋势
-                if '发布时间' in df.columns:
+                if publish_times is not None:
                     st.markdown("### 📈 时间趋势")
-                    df['发布日期'] = pd.to_datetime(df['发布时间']).dt.date
+                    df['发布日期'] = publish_times.dt.date
                     daily_counts = df['发布日期'].value_counts().sort_index()
                     
                     fig = px.line(